@@ -0,0 +1,25 @@
+"""
+Start-up time of the ``i2`` command-line interface, in a fresh interpreter
+each round.
+"""
+
+import os
+import subprocess
+import sys
+
+I2 = 'import sys; from icinga2client.cli import main; main()'
+
+
+def run(home, *arguments):
+    env = dict(os.environ, HOME=home, I2_NO_DAEMON='1')
+    subprocess.check_call([sys.executable, '-c', I2] + list(arguments),
+                          env=env, stdout=subprocess.DEVNULL)
+
+
+def test_version(benchmark, home):
+    benchmark.pedantic(run, args=(home, '--version'), rounds=10)
+
+
+def test_remove_acknowledgement(benchmark, home):
+    benchmark.pedantic(run, args=(home, 'acknowledge', 'remove', 'host',
+                                  'host-00001'), rounds=10)
@@ -0,0 +1,110 @@
+"""
+Request throughput of :class:`ApiClient` against the fake API.
+"""
+
+from icinga2client.api import ApiClient
+from icinga2client.api import filters as f
+from icinga2client.api import Target
+from icinga2client.api.bulk import BulkActions
+from icinga2client.api.cache import ObjectCache, QueryCache
+from icinga2client.api.executor import Call, ParallelExecutor
+from icinga2client.api.problems import ProblemIndex
+
+from .conftest import HOSTS
+
+
+def hostnames(count):
+    return ['host-{:05d}'.format(i) for i in range(count)]
+
+
+def test_single_action(benchmark, client):
+    benchmark(client.remove_acknowledgement, 'Host', f.host('host-00001'))
+
+
+def test_bulk_action(benchmark, client):
+    targets = [Target('Host', name) for name in hostnames(HOSTS)]
+    bulk = BulkActions(client)
+
+    results = benchmark(bulk.remove_acknowledgement, targets)
+
+    assert all(result.code == 200 for result in results)
+
+
+def test_query_hosts(benchmark, client):
+    def query():
+        return [host.name for host in client.hosts(attrs=['name', 'state'])]
+
+    assert len(benchmark(query)) == HOSTS
+
+
+def test_query_services_with_joins(benchmark, client):
+    def query():
+        return sum(1 for service in client.services(
+            f.hostgroup('group-1'), attrs=['name', 'state'],
+            joins=['host.name', 'host.state']))
+
+    assert benchmark(query) == HOSTS
+
+
+def test_query_services_compressed(benchmark, client, fake):
+    def query():
+        return sum(1 for service in client.services(attrs=['name', 'state']))
+
+    fake.compress = True
+    try:
+        assert benchmark(query) == HOSTS * 10
+    finally:
+        fake.compress = False
+
+
+def test_query_cached(benchmark, fake):
+    client = ApiClient(fake.url, verify=False,
+                       query_cache=QueryCache(ttl=3600))
+
+    def query():
+        return sum(1 for service in client.services(attrs=['name', 'state']))
+
+    with client:
+        assert benchmark(query) == HOSTS * 10
+
+
+def test_parallel_calls(benchmark, client, latency):
+    executor = ParallelExecutor(max_workers=8)
+    calls = [Call(client.remove_acknowledgement, 'Host', f.host(name))
+             for name in hostnames(64)]
+
+    results = benchmark(executor.run, calls)
+
+    assert all(result.ok for result in results)
+
+
+def test_problem_index_build(benchmark, client):
+    index = benchmark(ProblemIndex.build, client)
+
+    assert len(index) > 0
+
+
+def test_problem_index_select(benchmark, client):
+    index = ProblemIndex.build(client)
+
+    benchmark(index.select, states=[2], hostgroup='group-3',
+              acknowledged=False)
+
+
+def test_cache_apply_events(benchmark, client, fake):
+    """
+    A burst of events applied to a cache holding every host and a query per
+    host, as a daemon following the event stream would.
+    """
+
+    cache = ObjectCache(client, max_entries=HOSTS * 20)
+    for name in hostnames(HOSTS):
+        cache.services_on_host(name)
+
+    events = [fake.synthetic_event() for _ in range(HOSTS)]
+
+    def apply():
+        for event in events:
+            cache.apply_event(event)
+
+    benchmark(apply)
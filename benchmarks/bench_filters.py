@@ -0,0 +1,29 @@
+"""
+Building and compiling filter expressions.
+"""
+
+from icinga2client.api import filters as f
+
+
+def test_host_in_compile(benchmark):
+    names = ['host-{:05d}'.format(i) for i in range(5000)]
+
+    benchmark(lambda: f.host_in(names).compile())
+
+
+def test_host_in_render(benchmark):
+    names = ['host-{:05d}'.format(i) for i in range(5000)]
+
+    benchmark(lambda: str(f.host_in(names)))
+
+
+def test_combined_parameters(benchmark):
+    def build():
+        expression = f.any_of(*[
+            f.service('host-{:05d}'.format(i), 'svc-{}'.format(i % 10))
+            for i in range(200)
+        ]) & ~f.hostgroup('maintenance')
+
+        return f.parameters(expression)
+
+    benchmark(build)
@@ -0,0 +1,94 @@
+"""
+Encoding and decoding with each available JSON serializer, using response
+bodies recorded from the fake API: every service of every host with all
+attributes, and a burst of check result events.
+"""
+
+import pytest
+
+from icinga2client.api import filters as f
+from icinga2client.helpers.serializer import SERIALIZERS, get_serializer
+from icinga2client.helpers.stream import iter_results
+from icinga2client.api.models import ServiceRecord
+
+from .conftest import HOSTS
+
+
+def available():
+    names = []
+
+    for name in sorted(SERIALIZERS):
+        try:
+            get_serializer(name)
+        except ImportError:
+            continue
+        names.append(name)
+
+    return names
+
+
+@pytest.fixture(params=available())
+def serializer(request):
+    return get_serializer(request.param)
+
+
+@pytest.fixture(scope='module')
+def services_body(fake):
+    """
+    The body of ``objects/services``, all attributes of every service.
+    """
+
+    from icinga2client.api import ApiClient
+
+    with ApiClient(fake.url, verify=False) as client:
+        response = client.send('post', 'objects/services', {},
+                               {'X-HTTP-Method-Override': 'GET'})
+
+    return response.content
+
+
+@pytest.fixture(scope='module')
+def event_lines(fake):
+    """
+    Event stream lines, as the client reads them one at a time.
+    """
+
+    return [get_serializer('json').dumps(fake.synthetic_event())
+            for _ in range(HOSTS)]
+
+
+def test_decode_objects(benchmark, serializer, services_body):
+    result = benchmark(serializer.loads, services_body)
+
+    assert len(result['results']) == HOSTS * 10
+
+
+def test_decode_records(benchmark, serializer, services_body, monkeypatch):
+    """
+    Streamed records, decoded when first accessed.
+    """
+
+    from icinga2client.helpers import serializer as module
+
+    monkeypatch.setattr(module, '_serializer', serializer)
+
+    def decode():
+        return sum(1 for raw in iter_results([services_body], raw=True)
+                   if ServiceRecord(raw).state is not None)
+
+    assert benchmark(decode) == HOSTS * 10
+
+
+def test_decode_events(benchmark, serializer, event_lines):
+    def decode():
+        return [serializer.loads(line) for line in event_lines]
+
+    assert len(benchmark(decode)) == HOSTS
+
+
+def test_encode_bulk_filter(benchmark, serializer):
+    names = ['host-{:05d}'.format(i) for i in range(HOSTS * 10)]
+    data = f.parameters(f.host_in(names))
+    data['type'] = 'Host'
+
+    assert benchmark(serializer.dumps, data).startswith(b'{')
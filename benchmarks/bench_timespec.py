@@ -0,0 +1,23 @@
+"""
+Timespec parsing, with and without the compiled timespec cache.
+"""
+
+import pytest
+
+from icinga2client.helpers.timespec import TimespecCompiler
+
+TIMESPECS = ['now', '+2 hours', 'tomorrow 9am', '2030-01-01T09:00:00',
+             '1893488400']
+
+
+@pytest.mark.parametrize('timespec', TIMESPECS)
+def test_uncached(benchmark, timespec):
+    benchmark(lambda: TimespecCompiler().timestamp(timespec))
+
+
+@pytest.mark.parametrize('timespec', TIMESPECS)
+def test_cached(benchmark, timespec):
+    compiler = TimespecCompiler()
+    compiler.timestamp(timespec)
+
+    benchmark(compiler.timestamp, timespec)
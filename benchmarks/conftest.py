@@ -0,0 +1,70 @@
+"""
+Fixtures for the pytest-benchmark suite. Run it with ``make bench``, or::
+
+    python -m pytest benchmarks -o python_files='bench_*.py'
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from icinga2client.api import ApiClient, Comment
+
+from .fake import FakeIcinga
+
+HOSTS = 1000
+
+
+def pytest_configure(config):
+    # The fake API's certificate is self-signed
+    config.addinivalue_line(
+        'filterwarnings',
+        'ignore::urllib3.exceptions.InsecureRequestWarning')
+
+
+@pytest.fixture(scope='session')
+def fake():
+    with FakeIcinga(hosts=HOSTS, services=10, event_interval=60) as server:
+        yield server
+
+
+@pytest.fixture
+def client(fake):
+    with ApiClient(fake.url, verify=False) as client:
+        yield client
+
+
+@pytest.fixture
+def latency(fake):
+    """
+    Answer each request after a delay, as a remote endpoint would.
+    """
+
+    fake.latency = 0.005
+    yield fake.latency
+    fake.latency = 0
+
+
+@pytest.fixture
+def comment():
+    return Comment('benchmark', 'benchmark')
+
+
+@pytest.fixture(scope='session')
+def home(fake):
+    """
+    A home directory with an ``~/.i2rc`` pointing at the fake server.
+    """
+
+    directory = tempfile.mkdtemp()
+
+    with open(os.path.join(directory, '.i2rc'), 'w') as f:
+        json.dump({'url': fake.url, 'username': 'benchmark',
+                   'password': 'benchmark', 'verify': False}, f)
+
+    yield directory
+
+    shutil.rmtree(directory, ignore_errors=True)
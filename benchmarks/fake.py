@@ -0,0 +1,853 @@
+"""
+A stateful stand-in for the icinga2 API, for benchmarks and for trying the
+client out without an icinga2 instance.
+
+The server holds a generated inventory of hosts and services, and implements
+the actions the client uses (``schedule-downtime``, ``remove-downtime``,
+``acknowledge-problem``, ``remove-acknowledgement``), object queries and the
+event stream. Filters are evaluated by a small interpreter covering the
+subset of the DSL the client emits: literals, attribute lookups,
+``filter_vars``, comparisons, ``in``, ``&&``, ``||``, ``!``, ``match()`` and
+``regex()``.
+
+The server speaks HTTP/1.1 with keep-alive, over TLS by default using a
+throwaway self-signed certificate generated with the ``openssl`` binary.
+
+Latency and failures can be injected per request::
+
+    with FakeIcinga(hosts=500, latency=0.005, failure_rate=0.01) as server:
+        client = ApiClient(server.url, verify=False)
+
+::
+
+  Usage:
+    python -m benchmarks.fake [<port> [<hosts>]]
+"""
+
+import fnmatch
+import gzip
+import hashlib
+import json
+import operator
+import os
+import random
+import re
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+
+try:
+    from queue import Queue, Empty
+except ImportError:
+    from Queue import Queue, Empty
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+ACTIONS = {
+    'schedule-downtime', 'remove-downtime', 'acknowledge-problem',
+    'remove-acknowledgement',
+}
+
+# Comment entry_type recording an acknowledgement
+ACKNOWLEDGEMENT_ENTRY = 4.0
+
+TOKEN_PATTERN = re.compile(r'''
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*")
+      | (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<operator>==|!=|<=|>=|&&|\|\||[<>!()\[\],])
+      | (?P<name>[A-Za-z_][A-Za-z0-9_.]*)
+    )''', re.VERBOSE)
+
+ESCAPE_PATTERN = re.compile(r'\\(.)')
+UNESCAPES = {'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class FilterError(Exception):
+    pass
+
+
+def tokenize(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if not match:
+            raise FilterError('Unexpected input at {}'.format(position))
+
+        kind = match.lastgroup
+        value = match.group(kind)
+
+        if kind == 'string':
+            value = ESCAPE_PATTERN.sub(
+                lambda m: UNESCAPES.get(m.group(1), m.group(1)), value[1:-1])
+        elif kind == 'number':
+            value = float(value)
+
+        tokens.append((kind, value))
+        position = match.end()
+
+    return tokens
+
+
+class Filter:
+    """
+    Compiles a filter once, by recursive descent, into a tree of closures to
+    be evaluated against many objects.
+
+    :param str text: The filter expression.
+    :param dict filter_vars: Values of variables used by the expression.
+    """
+
+    def __init__(self, text, filter_vars=None):
+        self.tokens = tokenize(text) if text else []
+        self.filter_vars = filter_vars or {}
+        self.position = 0
+
+        if self.tokens:
+            self.evaluate = self.disjunction()
+
+            if self.position != len(self.tokens):
+                raise FilterError('Trailing input in filter')
+        else:
+            self.evaluate = lambda scope: True
+
+    def __call__(self, scope):
+        return bool(self.evaluate(scope))
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def accept(self, value):
+        if self.peek() == ('operator', value):
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, value):
+        if not self.accept(value):
+            raise FilterError('Expected {!r}'.format(value))
+
+    def disjunction(self):
+        terms = [self.conjunction()]
+        while self.accept('||'):
+            terms.append(self.conjunction())
+
+        if len(terms) == 1:
+            return terms[0]
+        return lambda scope: any(term(scope) for term in terms)
+
+    def conjunction(self):
+        terms = [self.comparison()]
+        while self.accept('&&'):
+            terms.append(self.comparison())
+
+        if len(terms) == 1:
+            return terms[0]
+        return lambda scope: all(term(scope) for term in terms)
+
+    def comparison(self):
+        left = self.unary()
+        kind, value = self.peek()
+
+        if kind == 'name' and value == 'in':
+            self.position += 1
+            right = self.unary()
+            return lambda scope: left(scope) in (right(scope) or [])
+
+        if kind == 'operator' and value in COMPARISONS:
+            self.position += 1
+            right = self.unary()
+            compare = COMPARISONS[value]
+
+            return lambda scope: compare(left(scope), right(scope))
+
+        return left
+
+    def unary(self):
+        if self.accept('!'):
+            operand = self.unary()
+            return lambda scope: not operand(scope)
+        return self.primary()
+
+    def primary(self):
+        kind, value = self.peek()
+        self.position += 1
+
+        if kind in ('string', 'number'):
+            return lambda scope: value
+
+        if self.peek() == ('operator', '(') and kind == 'name':
+            return self.call(value)
+
+        if kind == 'name':
+            return self.lookup(value)
+
+        if (kind, value) == ('operator', '('):
+            result = self.disjunction()
+            self.expect(')')
+            return result
+
+        if (kind, value) == ('operator', '['):
+            items = []
+            while not self.accept(']'):
+                items.append(self.disjunction())
+                self.accept(',')
+            return lambda scope: [item(scope) for item in items]
+
+        raise FilterError('Unexpected {!r}'.format(value))
+
+    def call(self, name):
+        self.expect('(')
+        arguments = []
+        while not self.accept(')'):
+            arguments.append(self.disjunction())
+            self.accept(',')
+
+        if name not in FUNCTIONS or len(arguments) != 2:
+            raise FilterError('Unknown function {}'.format(name))
+
+        function = FUNCTIONS[name]
+        pattern, value = arguments
+
+        def call(scope):
+            values = value(scope)
+            if not isinstance(values, list):
+                values = [values]
+            return any(function(pattern(scope), str(v)) for v in values)
+
+        return call
+
+    def lookup(self, name):
+        if name in CONSTANTS:
+            return lambda scope: CONSTANTS[name]
+
+        if name in self.filter_vars:
+            value = self.filter_vars[name]
+            # Membership tests against large filter_vars lists
+            if isinstance(value, list):
+                value = ValueList(value)
+            return lambda scope: value
+
+        head, _, rest = name.partition('.')
+        path = rest.split('.') if rest else []
+
+        def lookup(scope):
+            value = scope.get(head)
+            for part in path:
+                value = value.get(part) if isinstance(value, dict) else None
+            return value
+
+        return lookup
+
+
+class ValueList(list):
+    """
+    A list with constant-time membership tests, for ``filter_vars``.
+    """
+
+    def __init__(self, values):
+        list.__init__(self, values)
+        self.members = set(v for v in values if not isinstance(v, list))
+
+    def __contains__(self, value):
+        try:
+            return value in self.members
+        except TypeError:
+            return list.__contains__(self, value)
+
+
+def ordered(compare):
+    def wrapper(left, right):
+        if left is None or right is None:
+            return False
+        return compare(left, right)
+    return wrapper
+
+
+COMPARISONS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': ordered(operator.lt),
+    '>': ordered(operator.gt),
+    '<=': ordered(operator.le),
+    '>=': ordered(operator.ge),
+}
+
+CONSTANTS = {'true': True, 'false': False, 'null': None}
+
+FUNCTIONS = {
+    'match': lambda pattern, value: fnmatch.fnmatchcase(value, pattern),
+    'regex': lambda pattern, value: re.search(pattern, value) is not None,
+}
+
+
+class Inventory:
+    """
+    Hosts, services, downtimes and comments, keyed by full name. Every host
+    gets the same set of services; a seeded fraction of checks are failing.
+
+    :param int hosts: Number of hosts.
+    :param int services: Services on each host.
+    :param float problem_rate: Fraction of hosts and services not OK.
+    :param int seed: Seed for choosing states.
+    """
+
+    def __init__(self, hosts=100, services=10, problem_rate=0.05, seed=0):
+        rng = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.objects = {'Host': {}, 'Service': {}, 'Downtime': {},
+                        'Comment': {}}
+
+        for i in range(hosts):
+            hostname = 'host-{:05d}'.format(i)
+            self.objects['Host'][hostname] = {
+                '__name': hostname,
+                'name': hostname,
+                'display_name': hostname,
+                'groups': ['group-{}'.format(i % 10)],
+                'state': 1.0 if rng.random() < problem_rate else 0.0,
+                'acknowledgement': 0.0,
+                'downtime_depth': 0.0,
+                'last_state_change': 0.0,
+                'vars': {'os': 'linux' if i % 3 else 'windows'},
+            }
+
+            for j in range(services):
+                name = '{}!svc-{}'.format(hostname, j)
+                self.objects['Service'][name] = {
+                    '__name': name,
+                    'name': 'svc-{}'.format(j),
+                    'display_name': 'svc-{}'.format(j),
+                    'host_name': hostname,
+                    'groups': ['sgroup-{}'.format(j % 5)],
+                    'state': float(rng.choice([1, 2, 3]))
+                    if rng.random() < problem_rate else 0.0,
+                    'acknowledgement': 0.0,
+                    'downtime_depth': 0.0,
+                    'last_state_change': 0.0,
+                    'vars': {},
+                }
+
+    def scope(self, object_type, attrs):
+        """
+        The names visible to a filter evaluated against an object.
+        """
+
+        scope = {object_type.lower(): attrs}
+
+        host_name = attrs.get('host_name')
+        if host_name:
+            scope['host'] = self.objects['Host'].get(host_name)
+
+        service_name = attrs.get('service_name')
+        if service_name:
+            scope['service'] = self.objects['Service'].get(
+                '{}!{}'.format(host_name, service_name))
+
+        return scope
+
+    def select(self, object_type, object_filter=None, filter_vars=None):
+        matches = Filter(object_filter, filter_vars)
+        objects = self.objects.get(object_type, {})
+
+        return [attrs for attrs in list(objects.values())
+                if matches(self.scope(object_type, attrs))]
+
+    def joins(self, object_type, attrs, joins):
+        result = {}
+
+        for join in joins or []:
+            related, _, name = join.partition('.')
+            scope = self.scope(object_type, attrs)
+
+            if scope.get(related) is not None:
+                joined = result.setdefault(related, {})
+                value = scope[related]
+                joined.update({name: value.get(name)} if name else value)
+
+        return result
+
+    def add_downtime(self, object_type, target, data):
+        host_name = target.get('host_name', target['name'])
+        service_name = target['name'] if object_type == 'Service' else ''
+
+        name = '!'.join(filter(None, [host_name, service_name,
+                                      str(uuid.uuid4())]))
+        self.objects['Downtime'][name] = {
+            '__name': name,
+            'name': name.rsplit('!', 1)[-1],
+            'host_name': host_name,
+            'service_name': service_name,
+            'author': data.get('author'),
+            'comment': data.get('comment'),
+            'start_time': data.get('start_time'),
+            'end_time': data.get('end_time'),
+            'duration': data.get('duration') or 0,
+            'fixed': data.get('fixed', True),
+            'entry_time': time.time(),
+            'trigger_name': data.get('trigger_name') or '',
+        }
+        target['downtime_depth'] += 1
+
+        return name
+
+    def remove_downtime(self, name):
+        downtime = self.objects['Downtime'].pop(name, None)
+
+        if downtime is not None:
+            owner = self.owner(downtime)
+            if owner is not None:
+                owner['downtime_depth'] = max(owner['downtime_depth'] - 1, 0)
+
+        return downtime
+
+    def add_comment(self, object_type, target, data, entry_type):
+        host_name = target.get('host_name', target['name'])
+        service_name = target['name'] if object_type == 'Service' else ''
+
+        name = '!'.join(filter(None, [host_name, service_name,
+                                      str(uuid.uuid4())]))
+        self.objects['Comment'][name] = {
+            '__name': name,
+            'name': name.rsplit('!', 1)[-1],
+            'host_name': host_name,
+            'service_name': service_name,
+            'author': data.get('author'),
+            'text': data.get('comment'),
+            'entry_type': float(entry_type),
+            'entry_time': time.time(),
+            'expire_time': data.get('expiry') or 0.0,
+        }
+
+        return name
+
+    def remove_comments(self, target, entry_type):
+        for name, comment in list(self.objects['Comment'].items()):
+            if comment['entry_type'] == entry_type and \
+                    self.owner(comment) is target:
+                del self.objects['Comment'][name]
+
+    def owner(self, record):
+        if record['service_name']:
+            return self.objects['Service'].get('{}!{}'.format(
+                record['host_name'], record['service_name']))
+        return self.objects['Host'].get(record['host_name'])
+
+
+def generate_certificate(directory):
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+
+    subprocess.check_call([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+        '-keyout', key, '-out', cert, '-days', '1',
+        '-subj', '/CN=localhost',
+    ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    return cert, key
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self):
+        server = self.server.fake
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length).decode('utf-8') or '{}') \
+            if length else {}
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.rng.random() < server.failure_rate:
+            return self.send_json(server.failure_status, {
+                'error': float(server.failure_status),
+                'status': 'Injected failure.',
+            }, {'Retry-After': '0'})
+
+        path = self.path.split('?')[0].rstrip('/')
+        parts = path.split('/')[2:]
+
+        try:
+            if len(parts) == 2 and parts[0] == 'actions' and \
+                    parts[1] in ACTIONS:
+                return self.action(parts[1], body)
+            if parts[:1] == ['objects'] and len(parts) == 2:
+                return self.objects(parts[1], body)
+            if parts == ['events']:
+                return self.events(body)
+            if parts == []:
+                return self.send_json(200, {'results': [{
+                    'status': 'Fake icinga2 API',
+                }]})
+        except FilterError as e:
+            return self.send_json(400, {'error': 400.0, 'status': str(e)})
+
+        self.send_json(404, {'error': 404.0, 'status': 'Not found.'})
+
+    do_GET = do_POST = do_PUT = do_DELETE = respond
+
+    def send_json(self, code, document, headers=None, etag=False):
+        server = self.server.fake
+        body = json.dumps(document).encode('utf-8')
+        headers = dict(headers or {})
+
+        if etag and server.etags:
+            headers['ETag'] = '"{}"'.format(hashlib.sha1(body).hexdigest())
+
+            if self.headers.get('If-None-Match') == headers['ETag']:
+                self.send_response(304)
+                self.send_header('ETag', headers['ETag'])
+                self.end_headers()
+                return
+
+        accepted = self.headers.get('Accept-Encoding') or ''
+        if server.compress and 'gzip' in accepted:
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        elif server.compress and 'deflate' in accepted:
+            body = zlib.compress(body)
+            headers['Content-Encoding'] = 'deflate'
+
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def action(self, action, body):
+        server = self.server.fake
+        inventory = server.inventory
+        object_type = body.get('type') or 'Downtime'
+        results = []
+
+        with inventory.lock:
+            if action == 'remove-downtime' and body.get('downtime'):
+                names = [body['downtime']]
+                targets = [inventory.objects['Downtime'][name]
+                           for name in names
+                           if name in inventory.objects['Downtime']]
+            else:
+                targets = inventory.select(object_type, body.get('filter'),
+                                           body.get('filter_vars'))
+
+            if not targets:
+                return self.send_json(404, {
+                    'error': 404.0, 'status': 'No objects found.',
+                })
+
+            for target in targets:
+                results.append(getattr(self, action.replace('-', '_'))(
+                    inventory, object_type, target, body))
+
+        for result in results:
+            server.publish(result.pop('event'))
+
+        self.send_json(200, {'results': results})
+
+    def schedule_downtime(self, inventory, object_type, target, body):
+        name = inventory.add_downtime(object_type, target, body)
+
+        return {
+            'code': 200.0,
+            'name': name,
+            'status': "Successfully scheduled downtime '{}' for object "
+            "'{}'.".format(name, target['__name']),
+            'event': {'type': 'DowntimeAdded',
+                      'downtime': inventory.objects['Downtime'][name]},
+        }
+
+    def remove_downtime(self, inventory, object_type, target, body):
+        if object_type == 'Downtime' or 'fixed' in target:
+            removed = [target['__name']]
+        else:
+            removed = [name for name, downtime
+                       in list(inventory.objects['Downtime'].items())
+                       if inventory.owner(downtime) is target]
+
+        for name in removed:
+            inventory.remove_downtime(name)
+
+        return {
+            'code': 200.0,
+            'status': "Successfully removed all downtimes for object "
+                      "'{}'.".format(target['__name']),
+            'event': {'type': 'DowntimeRemoved', 'names': removed},
+        }
+
+    def acknowledge_problem(self, inventory, object_type, target, body):
+        if not target['state']:
+            # icinga2's wording, which doesn't quote the name
+            return {
+                'code': 409.0,
+                'status': '{} {} is {}.'.format(
+                    object_type, target['__name'],
+                    'OK' if object_type == 'Service' else 'UP'),
+                'event': None,
+            }
+
+        target['acknowledgement'] = 2.0 if body.get('sticky') else 1.0
+        inventory.add_comment(object_type, target, body,
+                              ACKNOWLEDGEMENT_ENTRY)
+
+        return {
+            'code': 200.0,
+            'status': "Successfully acknowledged problem for object "
+                      "'{}'.".format(target['__name']),
+            'event': self.object_event('AcknowledgementSet', object_type,
+                                       target, author=body.get('author'),
+                                       comment=body.get('comment')),
+        }
+
+    def remove_acknowledgement(self, inventory, object_type, target, body):
+        target['acknowledgement'] = 0.0
+        inventory.remove_comments(target, ACKNOWLEDGEMENT_ENTRY)
+
+        return {
+            'code': 200.0,
+            'status': "Successfully removed acknowledgement for object "
+                      "'{}'.".format(target['__name']),
+            'event': self.object_event('AcknowledgementCleared', object_type,
+                                       target),
+        }
+
+    @staticmethod
+    def object_event(event_type, object_type, target, **fields):
+        event = {'type': event_type, 'timestamp': time.time()}
+
+        if object_type == 'Service':
+            event.update(host=target['host_name'], service=target['name'])
+        else:
+            event['host'] = target['name']
+
+        event.update(fields)
+        return event
+
+    def objects(self, collection, body):
+        inventory = self.server.fake.inventory
+        object_type = {
+            'hosts': 'Host', 'services': 'Service',
+            'downtimes': 'Downtime', 'comments': 'Comment',
+        }.get(collection)
+
+        if object_type is None:
+            return self.send_json(404, {'error': 404.0,
+                                        'status': 'Unknown type.'})
+
+        attrs = body.get('attrs')
+        results = []
+
+        with inventory.lock:
+            for record in inventory.select(object_type, body.get('filter'),
+                                           body.get('filter_vars')):
+                results.append({
+                    'name': record['__name'],
+                    'type': object_type,
+                    'attrs': dict((k, record.get(k)) for k in attrs)
+                    if attrs else dict(record),
+                    'joins': inventory.joins(object_type, record,
+                                             body.get('joins')),
+                    'meta': {},
+                })
+
+        self.send_json(200, {'results': results}, etag=True)
+
+    def events(self, body):
+        server = self.server.fake
+        types = set(body.get('types') or [])
+        queue = server.subscribe()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        try:
+            while server.running:
+                try:
+                    event = queue.get(timeout=server.event_interval)
+                except Empty:
+                    event = server.synthetic_event()
+
+                if event is None or (types and event['type'] not in types):
+                    continue
+
+                line = json.dumps(event).encode('utf-8') + b'\n'
+                self.wfile.write('{:x}\r\n'.format(len(line)).encode('ascii')
+                                 + line + b'\r\n')
+                self.wfile.flush()
+
+            self.wfile.write(b'0\r\n\r\n')
+
+        except (IOError, OSError):
+            pass
+
+        finally:
+            server.unsubscribe(queue)
+            self.close_connection = True
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeIcinga:
+    """
+    Run the fake API in a background thread::
+
+        with FakeIcinga() as server:
+            client = ApiClient(server.url, verify=False)
+
+    :param bool tls: Serve HTTPS rather than plain HTTP.
+
+    :param int hosts: Number of hosts in the inventory.
+    :param int services: Services on each host.
+    :param float latency: Seconds to wait before answering each request.
+    :param float failure_rate: Fraction of requests answered with
+        ``failure_status`` instead.
+    :param int failure_status: HTTP status for injected failures.
+    :param float event_interval: Seconds between synthetic ``CheckResult``
+        and ``StateChange`` events on the event stream.
+    :param int seed: Seed for states and injected failures.
+    :param bool compress: Compress responses if the client accepts gzip or
+        deflate.
+    :param bool etags: Tag object query responses, and answer
+        ``If-None-Match`` with ``304 Not Modified``.
+    """
+
+    handler = FakeHandler
+
+    def __init__(self, host='127.0.0.1', port=0, tls=True, hosts=100,
+                 services=10, latency=0, failure_rate=0, failure_status=503,
+                 event_interval=0.1, seed=0, compress=False, etags=False):
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.directory = None
+        self.server = None
+        self.thread = None
+
+        self.inventory = Inventory(hosts, services, seed=seed)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.event_interval = event_interval
+        self.compress = compress
+        self.etags = etags
+        self.rng = random.Random(seed)
+        self.subscribers = []
+        self.running = False
+
+    @property
+    def url(self):
+        scheme = 'https' if self.tls else 'http'
+        return '{}://{}:{}'.format(scheme, self.host,
+                                   self.server.server_address[1])
+
+    def start(self):
+        self.running = True
+        self.server = ThreadingServer((self.host, self.port), self.handler)
+        self.server.fake = self
+
+        if self.tls:
+            self.directory = tempfile.mkdtemp()
+            cert, key = generate_certificate(self.directory)
+
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(cert, key)
+            self.server.socket = context.wrap_socket(self.server.socket,
+                                                     server_side=True)
+
+        # Poll often, so that stopping the server is quick
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       args=(0.05,))
+        self.thread.daemon = True
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        self.running = False
+        self.server.shutdown()
+        self.server.server_close()
+
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def subscribe(self):
+        queue = Queue()
+        self.subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.remove(queue)
+
+    def publish(self, event):
+        if event is None:
+            return
+
+        for queue in list(self.subscribers):
+            queue.put(event)
+
+    def synthetic_event(self):
+        services = self.inventory.objects['Service']
+        if not services:
+            return None
+
+        target = services[self.rng.choice(list(services))]
+        state = target['state']
+        event_type = 'StateChange' if self.rng.random() < 0.1 \
+            else 'CheckResult'
+
+        if event_type == 'StateChange':
+            state = 0.0 if state else 2.0
+            target['state'] = state
+
+        return FakeHandler.object_event(
+            event_type, 'Service', target, state=state,
+            check_result={'state': state, 'output': 'fake'})
+
+
+def main(port=5665, hosts=100):
+    with FakeIcinga(port=port, tls=False, hosts=hosts) as server:
+        print('Listening on {}'.format(server.url))
+
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,65 @@
+"""
+Measure how long ``import icinga2client.cli`` takes, using
+``python -X importtime``, and fail if it exceeds a threshold or if modules
+which should only be loaded on demand are imported at startup.
+
+::
+
+  Usage:
+    python -m benchmarks.import_time [<threshold-ms>]
+"""
+
+import re
+import subprocess
+import sys
+
+MODULE = 'icinga2client.cli'
+DEFAULT_THRESHOLD_MS = 30.0
+RUNS = 5
+
+# Modules which the CLI must not import until a command needs them
+DEFERRED = ['requests', 'urllib3', 'parsedatetime']
+
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def import_times(module=MODULE):
+    """
+    :returns: A dict of top-level module name to cumulative import time in
+        microseconds, for a single fresh interpreter.
+    """
+
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        stderr=subprocess.PIPE, universal_newlines=True
+    )
+    _, stderr = process.communicate()
+
+    times = {}
+    for match in LINE.finditer(stderr):
+        times[match.group(4)] = int(match.group(2))
+
+    return times
+
+
+def main(threshold_ms=DEFAULT_THRESHOLD_MS):
+    runs = [import_times() for _ in range(RUNS)]
+    best = min(run[MODULE] for run in runs) / 1000.0
+    loaded = [name for name in DEFERRED
+              if any(name in run for run in runs)]
+
+    print('{:<28}{:>10.1f} ms (threshold {:.1f} ms)'.format(
+        'import ' + MODULE, best, threshold_ms))
+
+    failures = []
+    if best > threshold_ms:
+        failures.append('import time regressed beyond threshold')
+    if loaded:
+        failures.append('imported at startup: ' + ', '.join(loaded))
+
+    if failures:
+        sys.exit('\n'.join(failures))
+
+
+if __name__ == '__main__':
+    main(*[float(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,54 @@
+"""
+Compare requests per second for one-connection-per-request against the
+pooled, keep-alive session held by :class:`ApiClient`.
+
+::
+
+  Usage:
+    python -m benchmarks.session_reuse [<requests>]
+"""
+
+import json
+import sys
+import time
+
+import requests
+
+from icinga2client.api import ApiClient, Comment
+
+from .fake import FakeIcinga
+
+# The request the client sends, acknowledging the fake's one host
+BODY = json.dumps({'type': 'Host', 'filter': 'true', 'author': 'benchmark',
+                   'comment': 'benchmark'})
+
+
+def per_request_connections(url, count):
+    for _ in range(count):
+        requests.post(url + '/v1/actions/acknowledge-problem',
+                      data=BODY, verify=False).json()
+
+
+def pooled_session(url, count):
+    comment = Comment('benchmark', 'benchmark')
+
+    with ApiClient(url, verify=False) as client:
+        for _ in range(count):
+            client.acknowledge_problem('Host', 'true', comment)
+
+
+def measure(fn, url, count):
+    start = time.time()
+    fn(url, count)
+    return count / (time.time() - start)
+
+
+def main(count=500):
+    with FakeIcinga(hosts=1, services=0) as server:
+        for fn in [per_request_connections, pooled_session]:
+            rate = measure(fn, server.url, count)
+            print('{:<28}{:>10.1f} req/s'.format(fn.__name__, rate))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
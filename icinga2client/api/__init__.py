@@ -1,7 +1,28 @@
+import importlib
 import logging
-from .base import ApiClient
 from .models import *
 
 logging.captureWarnings(True)
 
-__all__ = ['ApiClient', 'Comment']
+__all__ = ['ApiClient', 'ApiError', 'Comment', 'Target', 'TargetResult',
+           'ActionResult', 'ApiObject', 'HostRecord', 'ServiceRecord',
+           'DowntimeRecord', 'CommentRecord']
+
+# The client and its exceptions depend on requests, which is comparatively
+# slow to import. They are loaded on first access instead, so that importing
+# this package (e.g. for filters or models) stays cheap.
+_lazy = {
+    'ApiClient': '.base',
+    'ApiError': '.exceptions',
+}
+
+
+def __getattr__(name):
+    if name in _lazy:
+        module = importlib.import_module(_lazy[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError('module {!r} has no attribute {!r}'
+                         .format(__name__, name))
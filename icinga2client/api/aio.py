@@ -0,0 +1,119 @@
+"""
+An asyncio client for the icinga2 API, built on `aiohttp`_.
+
+:class:`AsyncApiClient` exposes the same methods as
+:class:`~icinga2client.api.ApiClient`, but each of them returns an awaitable.
+Many actions can then be in flight at once from a single thread::
+
+    async with AsyncApiClient(url) as client:
+        client.authenticate(username='root', password='secret')
+        results = await asyncio.gather(*[
+            client.schedule_downtime('Host', f.host(name), 'now', '+2 hours',
+                                     comment)
+            for name in hostnames
+        ])
+
+.. _aiohttp: https://pypi.python.org/pypi/aiohttp
+"""
+
+import asyncio
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .base import BaseClient
+from .exceptions import ApiError
+from ..helpers import serializer
+
+
+class AsyncApiClient(BaseClient):
+    default_concurrency = 100
+    default_pool_size = 100
+
+    def __init__(self, base_uri, verify=True, concurrency=None,
+                 pool_size=None):
+        """
+        :param str base_uri: URI of icinga2 api.
+            Typically https://some-address:5665
+        :param bool verify: Whether or not to verify TLS certificate trust
+        :param int concurrency: Maximum number of requests in flight at once.
+            Further requests wait for a free slot.
+            Defaults to :py:attr:`default_concurrency`.
+        :param int pool_size: Maximum number of connections held open to the
+            API. Defaults to :py:attr:`default_pool_size`.
+        """
+
+        if aiohttp is None:
+            raise ImportError('AsyncApiClient requires aiohttp, install it '
+                              'with: pip install icinga2client[async]')
+
+        super(AsyncApiClient, self).__init__(base_uri, verify=verify)
+
+        self.concurrency = concurrency or self.default_concurrency
+        self.pool_size = pool_size or self.default_pool_size
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def session(self):
+        """
+        The :class:`aiohttp.ClientSession` shared by every request made by
+        this client. It must first be used from within a running event loop.
+        """
+
+        if self._session is None:
+            self._session = self.build_session()
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        return self._session
+
+    def build_session(self):
+        connector = aiohttp.TCPConnector(limit=self.pool_size,
+                                         ssl=self.tls_context)
+
+        return aiohttp.ClientSession(connector=connector)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._semaphore = None
+
+    def build_options(self):
+        options = {}
+        auth = self.request_parameters.get('auth')
+
+        if auth:
+            options['auth'] = aiohttp.BasicAuth(*auth)
+
+        return options
+
+    async def request(self, method, command, data=None, headers={},
+                      **kwargs):
+        """
+        Make an API request. See :py:meth:`ApiClient.request`.
+        """
+
+        session = self.session
+
+        async with self._semaphore:
+            response = await session.request(
+                method.upper(), self.url(command),
+                headers=self.build_headers(headers),
+                data=self.build_body(data, kwargs.get('preserve_none')),
+                **self.build_options()
+            )
+
+            async with response:
+                if response.status >= 400:
+                    raise ApiError(response.status, await response.read())
+
+                return serializer.loads(await response.read())
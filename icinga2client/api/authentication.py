@@ -12,10 +12,21 @@ class AuthenticationManager:
             'auth': (args['username'], args['password'])
         }
 
+    def authenticate_certificate(self, args):
+        if not args.get('cert'):
+            raise ValueError(
+                'certificate authentication requires a certificate'
+            )
+
+        if args.get('key'):
+            return {'cert': (args['cert'], args['key'])}
+
+        return {'cert': args['cert']}
+
     def authenticate(self, method='password', **kwargs):
         if method == 'password':
             return self.authenticate_password(kwargs)
         elif method == 'certificate':
-            raise NotImplementedError('TODO')
+            return self.authenticate_certificate(kwargs)
         else:
             raise ValueError('TODO')
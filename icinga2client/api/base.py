@@ -1,27 +1,48 @@
-import json
+import contextlib
+import logging
+import os
+import socket
+import time
 import requests as requests_lib
 
 from . import filters as f
-from .methods import APIMethodsMixin
+from .methods import APIMethodsMixin, ObjectQueryMixin
 from .authentication import AuthenticationManager
-from ..helpers.data import deep_merge, dict_no_nones
+from .exceptions import ApiError
+from .hooks import Hooks, RequestEvent
+from .policy import RequestPolicy
+from .tls import CONNECTION_PHASES, TLSAdapter, recording, tls_context
+from ..helpers import serializer
+from ..helpers.data import dict_no_nones
+from ..helpers.throttle import backoff
 
+log = logging.getLogger(__name__)
+
+
+class BaseClient(APIMethodsMixin):
+    """
+    Transport-independent parts of an API client. Subclasses provide
+    :py:meth:`request`, which the methods in :class:`APIMethodsMixin`
+    return the result of.
+    """
 
-class ApiClient(APIMethodsMixin):
     api_prefix = 'v1'
     default_headers = {
-        'Accept': 'application/json'
+        'Accept': 'application/json',
+        # Decompressed incrementally as the response is read
+        'Accept-Encoding': 'gzip, deflate',
     }
-    request_parameters = {}
 
     def __init__(self, base_uri, verify=True):
         """
         :param str base_uri: URI of icinga2 api.
             Typically https://some-address:5665
-        :param bool verify: Whether or not to verify TLS certificate trust
+        :param verify: Whether or not to verify TLS certificate trust, or
+            the path of the CA certificate to verify it against
         """
 
         self.base_uri = base_uri
+        self.request_parameters = {}
         self.set_request_option('verify', verify)
 
         self.authentication_manager = AuthenticationManager()
@@ -29,9 +50,137 @@ class ApiClient(APIMethodsMixin):
     def set_request_option(self, option, value):
         self.request_parameters[option] = value
 
-    def url(self, command):
-        return '{}/{}/{}'.format(self.base_uri.rstrip('/'), self.api_prefix,
-                                 command.lstrip('/'))
+    def url(self, command, base_uri=None):
+        return '{}/{}/{}'.format((base_uri or self.base_uri).rstrip('/'),
+                                 self.api_prefix, command.lstrip('/'))
+
+    def build_headers(self, headers):
+        if headers == {}:
+            return self.default_headers
+
+        final_headers = self.default_headers.copy()
+        final_headers.update(headers)
+
+        return final_headers
+
+    def build_body(self, data, preserve_none=False):
+        """
+        Encode request data as JSON.
+
+        :returns: ``bytes``, or ``None`` if there is no data to send.
+        """
+
+        if data is None:
+            return None
+
+        if not preserve_none:
+            data = dict_no_nones(data)
+
+        return serializer.dumps(data)
+
+    def authenticate(self, **kwargs):
+        options = self.authentication_manager.authenticate(**kwargs)
+
+        for key, val in options.items():
+            self.set_request_option(key, val)
+
+    @property
+    def tls_context(self):
+        """
+        The process-wide TLS context for this client's ``verify`` and
+        ``cert`` options. See :mod:`~icinga2client.api.tls`.
+        """
+
+        return tls_context(self.request_parameters.get('verify', True),
+                           self.request_parameters.get('cert'))
+
+
+class ApiClient(ObjectQueryMixin, BaseClient):
+    default_pool_size = 10
+    # Number of distinct hosts for which connection pools are kept
+    pool_connections = 1
+
+    def __init__(self, base_uri, verify=True, pool_size=None, policy=None,
+                 query_cache=None):
+        """
+        :param str base_uri: URI of icinga2 api.
+            Typically https://some-address:5665
+        :param verify: Whether or not to verify TLS certificate trust, or
+            the path of the CA certificate to verify it against
+        :param int pool_size: Maximum number of keep-alive connections held
+            open to the API. Defaults to :py:attr:`default_pool_size`.
+        :param RequestPolicy policy: Rate limits, retries and timeouts to
+            apply to requests.
+        :param QueryCache query_cache: Reuse the results of identical object
+            queries. See :class:`~icinga2client.api.cache.QueryCache`.
+        """
+
+        self._session = None
+
+        super(ApiClient, self).__init__(base_uri, verify=verify)
+
+        self.pool_size = pool_size or self.default_pool_size
+        self.policy = policy or RequestPolicy()
+        self.hooks = Hooks()
+        self.query_cache = query_cache
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def session(self):
+        """
+        The :class:`requests.Session` shared by every request made by this
+        client. It is created on first use, so that connections (and their
+        TLS handshakes) are reused for the lifetime of the client.
+        """
+
+        if self._session is None:
+            self._session = self.build_session()
+
+        return self._session
+
+    def set_request_option(self, option, value):
+        super(ApiClient, self).set_request_option(option, value)
+
+        # The session's TLS context is built from these. Only the session is
+        # reset: close() may do more in subclasses, such as stopping health
+        # checks, and may run before they have finished __init__
+        if option in ('verify', 'cert'):
+            self.reset_session()
+
+    def build_session(self):
+        session = requests_lib.Session()
+        adapter = TLSAdapter(self.tls_context,
+                             pool_connections=self.pool_connections,
+                             pool_maxsize=self.pool_size)
+
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        return session
+
+    def reset_session(self):
+        """
+        Close the session and its pooled connections. A new one is created
+        the next time it's used.
+        """
+
+        session, self._session = self._session, None
+
+        if session is not None:
+            session.close()
+
+    def close(self):
+        """
+        Close any pooled connections. The client may still be used
+        afterwards, in which case a new session is created.
+        """
+
+        self.reset_session()
 
     def request(self, method, command, data=None, headers={}, **kwargs):
         """
@@ -40,45 +189,210 @@ class ApiClient(APIMethodsMixin):
         :param str method: The HTTP verb used in the request.
         :param str command: The path of the command, excluding the prefix.
             For example: ``objects/hosts`` or ``actions/acknowledge-problem``.
-        :param object data: Additional request data. Must be serializable by
-            :func:`json.dumps`.
+        :param object data: Additional request data. Must be serializable as
+            JSON. See :mod:`~icinga2client.helpers.serializer`.
         :param dict headers: Any additional HTTP headers.
+        :raises ApiError: If the API responds with an error status.
         """
 
-        method = method.lower()
+        response = self.send(method, command, data, headers, **kwargs)
 
-        if headers == {}:
-            final_headers = self.default_headers
-        else:
-            final_headers = self.default_headers.copy()
-            final_headers.update(headers)
+        if not response.ok:
+            raise ApiError.from_response(response)
 
-        if not kwargs.get('preserve_none'):
-            data = dict_no_nones(data)
+        started = time.time()
+        result = serializer.loads(response.content)
+
+        event = getattr(response, 'event', None)
+        if event is not None:
+            event.timings['decode'] = time.time() - started
+            self.hooks.run(self.hooks.after_decode, event)
+
+        return result
+
+    def send(self, method, command, data=None, headers={}, stream=False,
+             **kwargs):
+        """
+        Send a request, applying the client's :class:`RequestPolicy`, and
+        return the response whatever its status. The :class:`RequestEvent`
+        describing the final attempt is attached to the response as
+        ``response.event``.
+
+        :param bool failover: Raise connection errors and timeouts at once,
+            without retrying, as the caller can try another endpoint.
+        :rtype: requests.Response
+        """
+
+        method = method.lower()
+        policy = self.policy
+
+        # Actions change object state, so cached query results are suspect
+        if self.query_cache is not None and command.startswith('actions/'):
+            self.query_cache.clear()
 
         params = {}
         params.update(self.request_parameters)
-        params['headers'] = final_headers
-        params['data'] = json.dumps(data)
+        params['headers'] = self.build_headers(headers)
+        params['data'] = self.build_body(data, kwargs.get('preserve_none'))
+        params['timeout'] = kwargs.get('timeout', policy.timeout)
+        params['stream'] = stream
+
+        url = self.url(command, kwargs.get('base_uri'))
 
         # if method == 'get' and data:
         #     method = 'post'
         #     headers['X-HTTP-Method-Override'] = 'get'
 
-        response = getattr(requests_lib, method)(self.url(command), **params)
+        delays = policy.delays()
+        attempt = 0
 
-        try:
-            response.raise_for_status()
+        while True:
+            event = RequestEvent(method, command, attempt,
+                                 len(params['data'] or ''))
+            self.hooks.run(self.hooks.before_request, event)
 
-        except Exception as e:
-            # TODO: err...
-            print(response.content)
-            raise e
+            try:
+                policy.throttle(command)
 
-        return response.json()
+                with policy.slot():
+                    sent = time.time()
+                    event.timings['throttle'] = sent - event.started
 
-    def authenticate(self, **kwargs):
-        options = self.authentication_manager.authenticate(**kwargs)
+                    with recording(event.timings):
+                        response = self.session.request(method, url,
+                                                        **params)
 
-        for key, val in options.items():
-            self.set_request_option(key, val)
+                    # Less any time spent opening a connection
+                    event.timings['response'] = time.time() - sent - sum(
+                        event.timings.get(phase, 0.0)
+                        for phase in CONNECTION_PHASES)
+
+            except requests_lib.RequestException as e:
+                event.error = e
+                event.timings['total'] = time.time() - event.started
+                self.hooks.run(self.hooks.after_request, event)
+
+                if kwargs.get('failover') and isinstance(
+                        e, (requests_lib.ConnectionError,
+                            requests_lib.Timeout)):
+                    raise
+
+                if not policy.should_retry(attempt, method, command, headers,
+                                           error=e):
+                    raise
+
+                log.warning('Retrying %s %s after error: %s',
+                            method.upper(), command, e)
+                delay = next(delays)
+
+            else:
+                response.event = event
+                event.response = response
+                event.bytes_received = len(response.content) if not stream \
+                    else int(response.headers.get('Content-Length') or 0)
+                event.timings['total'] = time.time() - event.started
+                self.hooks.run(self.hooks.after_request, event)
+
+                if response.ok or not policy.should_retry(
+                        attempt, method, command, headers,
+                        status=response.status_code):
+                    return response
+
+                log.warning('Retrying %s %s after status %s',
+                            method.upper(), command, response.status_code)
+                delay = retry_after(response) or next(delays)
+                response.close()
+
+            attempt += 1
+            time.sleep(delay)
+
+    def stream(self, method, command, data=None, headers={}, **kwargs):
+        """
+        Make an API request without reading the response body, which can
+        then be consumed incrementally. The caller is responsible for closing
+        the response. See :py:meth:`request` for parameters.
+
+        :rtype: requests.Response
+        """
+
+        response = self.send(method, command, data, headers, stream=True,
+                             **kwargs)
+
+        if not response.ok:
+            try:
+                raise ApiError.from_response(response)
+            finally:
+                response.close()
+
+        return response
+
+    def events(self, types, queue=None, object_filter=None, reconnect=True,
+               timeout=None):
+        """
+        Subscribe to the `event-streams`_ API, yielding each event as it
+        arrives. Events are parsed one line at a time, so memory use doesn't
+        grow however long the stream is consumed for.
+
+        If the connection drops, it is re-established after an exponentially
+        increasing delay. Events emitted while disconnected are lost.
+
+        :param list types: Event types to subscribe to, such as
+            ``CheckResult``, ``StateChange`` or ``AcknowledgementSet``.
+        :param str queue: Name of the event queue. Clients sharing a queue
+            name share the events between them. A name unique to this process
+            is used by default.
+        :param str object_filter: A `filter`_ to apply to events.
+        :param bool reconnect: Whether to reconnect when the stream ends or
+            the connection fails.
+        :param float timeout: Seconds to wait for data before treating the
+            connection as failed.
+
+        .. _event-streams: http://docs.icinga.org/icinga2/latest/doc/module/icinga2/chapter/icinga2-api#icinga2-api-event-streams
+        .. _filter: http://docs.icinga.org/icinga2/latest/doc/module/icinga2/chapter/icinga2-api#icinga2-api-filters
+        """  # nopep8
+
+        data = {
+            'types': list(types),
+            'queue': queue or 'i2-{}-{}'.format(socket.gethostname(),
+                                                os.getpid()),
+            'filter': object_filter,
+        }
+
+        delays = backoff()
+
+        while True:
+            try:
+                response = self.stream('post', 'events', data,
+                                       timeout=timeout)
+
+                with contextlib.closing(response):
+                    for line in response.iter_lines():
+                        if line:
+                            yield serializer.loads(line)
+                            delays = backoff()
+
+            except (requests_lib.ConnectionError, requests_lib.Timeout,
+                    requests_lib.exceptions.ChunkedEncodingError,
+                    ApiError) as e:
+                if not reconnect or getattr(e, 'status_code', 500) < 500:
+                    raise
+
+                log.warning('Event stream interrupted: %s', e)
+
+            else:
+                if not reconnect:
+                    return
+
+            time.sleep(next(delays))
+
+
+def retry_after(response):
+    """
+    :returns: The delay requested by a response's ``Retry-After`` header, in
+        seconds, if it specifies one.
+    """
+
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
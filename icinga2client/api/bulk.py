@@ -0,0 +1,209 @@
+"""
+Apply one action to many hosts and services with as few API calls as
+possible.
+
+Targets sharing an object type are coalesced into ``in [...]`` membership
+filters, which are split into chunks so that no single request body grows
+beyond :py:attr:`BulkActions.max_body_size`. Every target gets its own
+:class:`~icinga2client.api.models.TargetResult`, recovered from the
+per-object results the API returns::
+
+    bulk = BulkActions(client)
+    targets = [Target('Service', 'web01', 'http'),
+               Target('Service', 'web02', 'http')]
+
+    for result in bulk.acknowledge_problem(targets, comment):
+        print(result.target.name, result.code)
+"""
+
+import re
+
+from . import filters as f
+from .exceptions import ApiError
+from ..helpers.timespec import timespecs
+from .models import TargetResult
+
+# Where the object's name is found in the status of a per-object result
+OBJECT_PATTERNS = [
+    # "Successfully acknowledged problem for object 'web01'."
+    re.compile(r"for object '(.*)'"),
+    # "Object 'web01' is already acknowledged."
+    re.compile(r"^Object '(.*?)' "),
+    # "Host web01 is UP.", "Service web01!http is OK."
+    re.compile(r"^(?:Host|Service) (.*) is [A-Z]+\.$"),
+]
+
+
+class BulkActions:
+    default_max_body_size = 64 * 1024
+
+    def __init__(self, client, max_body_size=None):
+        """
+        :param ApiClient client: The client used to make requests.
+        :param int max_body_size: Approximate upper bound, in bytes, of the
+            body of each request.
+        """
+
+        self.client = client
+        self.max_body_size = max_body_size or self.default_max_body_size
+
+    def schedule_downtime(self, targets, start, end, comment,
+                          duration=False, trigger_name=None):
+        """
+        Schedule the same downtime for many targets.
+        See :py:meth:`APIMethodsMixin.schedule_downtime`.
+
+        :param list targets: :class:`Target` objects to schedule downtime for.
+        :returns: A list of :class:`TargetResult`.
+        """
+
+        return self.run(self.client.schedule_downtime, targets,
+                        start=start, end=end, comment=comment,
+                        duration=duration, trigger_name=trigger_name)
+
+    def remove_downtime(self, targets):
+        """
+        Remove all downtimes from many targets.
+        See :py:meth:`APIMethodsMixin.remove_downtime_filter`.
+        """
+
+        return self.run(self.client.remove_downtime_filter, targets)
+
+    def acknowledge_problem(self, targets, comment, expiry=None,
+                            sticky=True, notify=True):
+        """
+        Acknowledge problems on many targets.
+        See :py:meth:`APIMethodsMixin.acknowledge_problem`.
+        """
+
+        return self.run(self.client.acknowledge_problem, targets,
+                        comment=comment, expiry=expiry, sticky=sticky,
+                        notify=notify)
+
+    def remove_acknowledgement(self, targets):
+        """
+        Remove acknowledgements from many targets.
+        See :py:meth:`APIMethodsMixin.remove_acknowledgement`.
+        """
+
+        return self.run(self.client.remove_acknowledgement, targets)
+
+    def run(self, fn, targets, **kwargs):
+        """
+        Call ``fn(object_type, object_filter, **kwargs)`` once per chunk of
+        targets, and map the results back onto individual targets. Timespecs
+        resolve against the same time for every chunk.
+        """
+
+        results = []
+
+        with timespecs.anchored():
+            for object_type, object_filter, chunk in self.plan(targets):
+                try:
+                    response = fn(object_type, object_filter, **kwargs)
+
+                except ApiError as e:
+                    response = self.error_response(e)
+
+                results.extend(self.match_results(chunk, response))
+
+        return results
+
+    def plan(self, targets):
+        """
+        Group targets by object type and split each group into chunks.
+
+        :returns: An iterator of ``(object_type, filter, targets)`` tuples.
+        """
+
+        by_type = {}
+        for target in targets:
+            by_type.setdefault(target.type.title(), []).append(target)
+
+        for object_type, group in sorted(by_type.items()):
+            build = f.service_in if object_type == 'Service' else f.host_in
+
+            for chunk in self.chunk(group):
+                yield object_type, build([t.name for t in chunk]), chunk
+
+    def chunk(self, targets):
+        # Leave headroom for the rest of the request body (comment etc.)
+        limit = self.max_body_size // 2
+        chunk, size = [], 0
+
+        for target in targets:
+            # Each quoted name also gains a separator
+            length = len(f.quote(target.name)) + 2
+
+            if chunk and size + length > limit:
+                yield chunk
+                chunk, size = [], 0
+
+            chunk.append(target)
+            size += length
+
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def error_response(error):
+        """
+        Recover per-object results from a failed request, if the API provided
+        any. Otherwise, attribute the failure to every target in the chunk.
+        """
+
+        if error.results:
+            return {'results': error.results}
+
+        return {'error': error.status_code, 'status': str(error)}
+
+    @staticmethod
+    def match_results(targets, response):
+        pending = dict((target.name, target) for target in targets)
+        results = []
+
+        if 'error' in response:
+            return [TargetResult(target, response['error'],
+                                 response.get('status'), None)
+                    for target in targets]
+
+        for result in response.get('results', []):
+            status = result.get('status', '')
+            name = object_name(status, pending)
+
+            if name is None:
+                continue
+
+            results.append(TargetResult(pending.pop(name),
+                                        int(result.get('code', 0)),
+                                        status, result.get('name')))
+
+        for target in pending.values():
+            results.append(TargetResult(target, 404, 'No matching object',
+                                        None))
+
+        return results
+
+
+def object_name(status, names):
+    """
+    Find which of ``names`` the status of a per-object result is about.
+    Names are only recognised whole, so that ``web1`` isn't mistaken for
+    ``web10``.
+
+    :returns: The name, or ``None`` if none of the names is mentioned.
+    """
+
+    for pattern in OBJECT_PATTERNS:
+        match = pattern.search(status)
+
+        if match and match.group(1) in names:
+            return match.group(1)
+
+    # An unfamiliar status: the longest name mentioned, delimited by
+    # whitespace, quotes or the end of a sentence
+    mentioned = [name for name in names if re.search(
+        r'(?:^|[\s\'"]){}(?=$|[\s\'"]|\.(?:$|\s))'.format(re.escape(name)),
+        status)]
+
+    return max(mentioned, key=len) if mentioned else None
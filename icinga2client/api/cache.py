@@ -0,0 +1,643 @@
+"""
+A local cache of icinga2 object state, to answer repeated lookups (which
+hosts are in a group, which services on a host have problems) without
+querying the API each time.
+
+Entries expire after a TTL, the least recently used entries are evicted
+once the cache is full, and the cache can optionally be saved to and
+restored from disk between runs. Following the event stream invalidates
+the entries of objects as their state changes::
+
+    cache = ObjectCache(client, ttl=60, snapshot_path='~/.cache/i2.json')
+    cache.follow()
+
+    for name in cache.hosts_in_group('webservers'):
+        ...
+
+    cache.save()
+
+:py:meth:`ObjectCache.index` holds a compact index of every host and service,
+which filters can be evaluated against locally (see
+:mod:`~icinga2client.api.plan`).
+
+:py:meth:`ObjectCache.problems` similarly holds an index of every service
+problem, kept current while following the event stream (see
+:mod:`~icinga2client.api.problems`).
+
+:class:`QueryCache` is a lower-level cache of whole query results, which
+:class:`~icinga2client.api.ApiClient` can use to answer repeated identical
+queries.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from . import filters as f
+from ..helpers import serializer
+
+log = logging.getLogger(__name__)
+
+# Events which indicate that the cached state of an object is out of date.
+# A check result which changes an object's state comes with a StateChange.
+INVALIDATING_EVENTS = [
+    'StateChange', 'AcknowledgementSet', 'AcknowledgementCleared',
+    'DowntimeAdded', 'DowntimeRemoved', 'DowntimeStarted',
+    'DowntimeTriggered',
+]
+
+# Events followed to keep the cache current. The problem index also applies
+# check results, to pick up problems it doesn't hold yet.
+FOLLOWED_EVENTS = ['CheckResult'] + INVALIDATING_EVENTS
+
+
+class LRUCache:
+    """
+    A thread-safe mapping whose entries expire ``ttl`` seconds after they
+    were stored, holding at most ``max_entries`` entries.
+    """
+
+    def __init__(self, ttl=300, max_entries=10000, clock=time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                return default
+
+            stored, value = entry
+            if self.clock() - stored > self.ttl:
+                del self.entries[key]
+                return default
+
+            self._touch(key)
+            return value
+
+    def set(self, key, value, stored=None):
+        with self.lock:
+            self.entries[key] = (stored or self.clock(), value)
+            self._touch(key)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _touch(self, key):
+        self.entries[key] = self.entries.pop(key)
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        with self.lock:
+            for key in [k for k in self.entries if predicate(k)]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def items(self):
+        """
+        :returns: A list of ``(key, stored, value)`` for unexpired entries.
+        """
+
+        with self.lock:
+            now = self.clock()
+            return [(key, stored, value)
+                    for key, (stored, value) in self.entries.items()
+                    if now - stored <= self.ttl]
+
+
+class QueryCache:
+    """
+    The results of object queries, keyed by a hash of the query, so that a
+    script repeating an identical query within a session doesn't transfer
+    the objects again::
+
+        client = ApiClient(url, query_cache=QueryCache(ttl=30))
+
+    Results are kept for ``ttl`` seconds, and dropped whenever the client
+    performs an action, as object state may have changed. If the API (or a
+    proxy in front of it) sent an ``ETag``, an expired entry is revalidated
+    with ``If-None-Match`` rather than fetched again.
+
+    Each entry holds every result of its query as raw JSON, so a cached query
+    costs about as much memory as its response body, where an uncached query
+    holds only one object at a time. The cache holds up to ``max_entries``
+    times ``max_bytes`` of results. Queries with more results than
+    ``max_bytes`` are streamed as usual, but not kept.
+
+    :param float ttl: Seconds for which results are reused without asking
+        the API.
+    :param int max_entries: Number of distinct queries kept.
+    :param int max_bytes: Size of the largest result set kept, measured as
+        raw JSON.
+    """
+
+    def __init__(self, ttl=60, max_entries=32, max_bytes=4 * 1024 * 1024,
+                 clock=time.time):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        # Expired entries are kept while they can still be revalidated
+        self.entries = LRUCache(ttl=float('inf'), max_entries=max_entries,
+                                clock=clock)
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0,
+                      'too_large': 0}
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(command, body):
+        """
+        :param str command: The query's command, such as ``objects/hosts``.
+        :param bytes body: The encoded request body.
+        """
+
+        return hashlib.sha1(command.encode('utf-8') + b'\0' +
+                            (body or b'')).hexdigest()
+
+    def lookup(self, key):
+        """
+        :returns: A tuple of ``(results, etag)``. ``results`` is the list of
+            raw results if they are fresh, otherwise ``None``, in which case
+            ``etag`` is the tag to revalidate them with, if any.
+        """
+
+        entry = self.entries.get(key)
+
+        if entry is None:
+            self.stats['misses'] += 1
+            return None, None
+
+        fetched, etag, results = entry
+
+        if self.clock() - fetched <= self.ttl:
+            self.stats['hits'] += 1
+            return results, None
+
+        self.stats['misses'] += 1
+        return None, etag
+
+    def store(self, key, results, etag=None):
+        self.entries.set(key, (self.clock(), etag, results))
+
+    def revalidated(self, key):
+        """
+        Mark an entry fresh again, after the API confirmed it is unchanged.
+
+        :returns: Its results, or ``None`` if it has since been dropped.
+        """
+
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        fetched, etag, results = entry
+        self.store(key, results, etag)
+        self.stats['revalidated'] += 1
+
+        return results
+
+    def clear(self):
+        self.entries.clear()
+
+
+# Attributes held for every object in an ObjectIndex
+INDEX_ATTRS = {
+    'Host': ['__name', 'name', 'display_name', 'groups', 'state',
+             'acknowledgement', 'downtime_depth'],
+    'Service': ['__name', 'name', 'display_name', 'host_name', 'groups',
+                'state', 'acknowledgement', 'downtime_depth'],
+}
+
+
+class ObjectIndex:
+    """
+    Every host and service, with the attributes in :data:`INDEX_ATTRS`,
+    indexed by name and group so that the filters the command-line interface
+    builds only need evaluating against the objects they could match.
+
+    :param dict data: ``{'Host': [attrs...], 'Service': [attrs...]}``
+    :param float fetched: When the objects were fetched.
+    """
+
+    def __init__(self, data, fetched):
+        self.data = data
+        self.fetched = fetched
+
+        self.hosts = dict((attrs['name'], attrs) for attrs in data['Host'])
+        self.services = dict((attrs['__name'], attrs)
+                             for attrs in data['Service'])
+        self.by_group = {'Host': {}, 'Service': {}}
+        self.by_host = {}
+
+        for object_type, objects in data.items():
+            groups = self.by_group[object_type]
+
+            for attrs in objects:
+                for group in attrs.get('groups') or []:
+                    groups.setdefault(group, []).append(attrs)
+
+        for attrs in data['Service']:
+            self.by_host.setdefault(attrs['host_name'], []).append(attrs)
+
+    def __len__(self):
+        return len(self.hosts) + len(self.services)
+
+    def scope(self, object_type, attrs):
+        if object_type == 'Service':
+            return {'service': attrs,
+                    'host': self.hosts.get(attrs['host_name']) or {}}
+
+        return {'host': attrs}
+
+    def candidates(self, object_type, expression):
+        """
+        Narrow down the objects an expression could match, using the name and
+        group indexes, or return every object of the type.
+        """
+
+        narrowed = self.narrow(object_type, expression)
+
+        if narrowed is None:
+            return self.data[object_type]
+
+        return narrowed
+
+    def narrow(self, object_type, expression):
+        if isinstance(expression, f.And):
+            narrowed = [self.narrow(object_type, e)
+                        for e in expression.expressions]
+            narrowed = [n for n in narrowed if n is not None]
+
+            return min(narrowed, key=len) if narrowed else None
+
+        attribute = str(getattr(expression, 'attribute', ''))
+        hosts = object_type == 'Host'
+
+        if isinstance(expression, f.Contains):
+            if attribute == '{}.groups'.format(object_type.lower()):
+                return self.by_group[object_type].get(expression.operand, [])
+
+            if attribute == 'host.groups' and not hosts:
+                return [attrs for host in self.by_group['Host'].get(
+                    expression.operand, []) for attrs in
+                    self.by_host.get(host['name'], [])]
+
+        names = None
+
+        if isinstance(expression, f.Comparison) and \
+                expression.operator == '==':
+            names = [expression.operand]
+        elif isinstance(expression, f.Membership):
+            names = expression.values
+
+        if names is None:
+            return None
+
+        if attribute == 'host.name':
+            if hosts:
+                return [self.hosts[n] for n in names if n in self.hosts]
+            return [attrs for n in names for attrs in self.by_host.get(n, [])]
+
+        if attribute == 'service.__name' and not hosts:
+            return [self.services[n] for n in names if n in self.services]
+
+        return None
+
+    def select(self, object_type, expression):
+        """
+        :returns: The attributes of every object of a type matching an
+            expression.
+        :raises LookupError: If the expression refers to attributes which
+            aren't indexed.
+        :raises ValueError: If the expression can't be evaluated locally.
+        """
+
+        if object_type not in self.data:
+            raise ValueError('{} objects are not indexed'.format(object_type))
+
+        if expression is None:
+            return list(self.data[object_type])
+
+        expression = f.as_expression(expression)
+
+        return [attrs for attrs in self.candidates(object_type, expression)
+                if expression.evaluate(self.scope(object_type, attrs))]
+
+
+class ObjectCache:
+    def __init__(self, client, ttl=300, max_entries=10000,
+                 snapshot_path=None):
+        """
+        :param ApiClient client: The client used to fetch objects.
+        :param int ttl: Seconds for which fetched state is considered fresh.
+        :param int max_entries: Maximum number of objects and query results
+            to hold.
+        :param str snapshot_path: A file to save the cache to and restore it
+            from. If it exists, the cache is restored from it immediately.
+        """
+
+        self.client = client
+        self.store = LRUCache(ttl=ttl, max_entries=max_entries)
+        # The keys of cached query results, by object type, so that they can
+        # be invalidated without scanning every entry
+        self.queries = {}
+        self.snapshot_path = snapshot_path and \
+            os.path.expanduser(snapshot_path)
+        self._follower = None
+        self._index = None
+        self._problems = None
+
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            self.load()
+
+    def get(self, object_type, name):
+        """
+        :param str object_type: ``Host``, ``Service``, etc.
+        :param str name: The full object name, ``host!service`` for services.
+        :returns: The attributes of the object, or ``None`` if there is no
+            such object.
+        """
+
+        object_type = object_type.title()
+        attrs = self.store.get(('object', object_type, name))
+
+        if attrs is None:
+            object_filter = f.service_in([name]) if object_type == 'Service' \
+                else f.attr(object_type.lower() + '.name').equals(name)
+            objects = self.query(object_type, object_filter)
+            attrs = objects[0] if objects else None
+
+        return attrs
+
+    def query(self, object_type, object_filter=None):
+        """
+        Fetch the attributes of all objects of a type matching a filter. Both
+        the result and each matching object are cached.
+
+        :returns: A list of attribute dicts.
+        """
+
+        object_type = object_type.title()
+        key = ('query', object_type,
+               str(object_filter) if object_filter is not None else None)
+        names = self.store.get(key)
+
+        if names is not None:
+            objects = [self.store.get(('object', object_type, name))
+                       for name in names]
+
+            if all(attrs is not None for attrs in objects):
+                return objects
+
+        objects = self.fetch(object_type, object_filter)
+
+        for attrs in objects:
+            self.store.set(('object', object_type, attrs['__name']), attrs)
+
+        self.store_query(key, [attrs['__name'] for attrs in objects])
+
+        return objects
+
+    def store_query(self, key, names, stored=None):
+        with self.store.lock:
+            self.store.set(key, names, stored=stored)
+
+            queries = self.queries.setdefault(key[1], set())
+            queries.add(key)
+
+            # Forget keys the store has since evicted
+            if len(queries) > self.store.max_entries:
+                queries.intersection_update(self.store.entries)
+
+    def fetch(self, object_type, object_filter=None):
+        return [result.attrs for result in
+                self.client.query_objects(object_type, object_filter)]
+
+    def index(self, refresh=False):
+        """
+        :param bool refresh: Fetch every host and service to build the index
+            if it is missing or has expired.
+        :returns: The :class:`ObjectIndex`, or ``None`` if it has expired and
+            ``refresh`` isn't set.
+        """
+
+        with self.store.lock:
+            entry = self.store.entries.get(('index',))
+            data = self.store.get(('index',))
+
+        if data is not None:
+            if self._index is None or self._index.data is not data:
+                self._index = ObjectIndex(data, entry[0])
+            return self._index
+
+        if not refresh:
+            return None
+
+        fetched = time.time()
+        data = dict((object_type, [
+            result.attrs for result in
+            self.client.query_objects(object_type, attrs=attrs)
+        ]) for object_type, attrs in INDEX_ATTRS.items())
+
+        self.store.set(('index',), data, stored=fetched)
+        self._index = ObjectIndex(data, fetched)
+
+        return self._index
+
+    def problems(self, refresh=False, rebuild=False):
+        """
+        :param bool refresh: Fetch every service problem to build the index
+            if it is missing or has expired.
+        :param bool rebuild: Build the index afresh regardless.
+        :returns: The :class:`~icinga2client.api.problems.ProblemIndex`, or
+            ``None`` if it has expired and ``refresh`` isn't set. While the
+            event stream is followed, the index is kept current and doesn't
+            expire.
+        """
+
+        from .problems import ProblemIndex
+
+        if not rebuild:
+            data = self.store.get(('problems',))
+
+            if self._problems is not None and (self._follower is not None or
+                                               data is not None):
+                return self._problems
+
+            if data is not None:
+                self._problems = ProblemIndex.from_data(self.client, data)
+                return self._problems
+
+            if not refresh:
+                return None
+
+        self._problems = ProblemIndex.build(self.client)
+        self.store.set(('problems',), self._problems.to_data(),
+                       stored=self._problems.fetched)
+
+        return self._problems
+
+    def hosts_in_group(self, group):
+        """
+        :returns: The names of the hosts in a hostgroup.
+        """
+
+        return [attrs['name']
+                for attrs in self.query('Host', f.hostgroup(group))]
+
+    def services_on_host(self, hostname, problems=False):
+        """
+        :param bool problems: Only return services in a non-OK state.
+        :returns: The full names of services on a host.
+        """
+
+        object_filter = f.host(hostname)
+        if problems:
+            object_filter &= f.attr('service.state').not_equals(0)
+
+        return [attrs['__name']
+                for attrs in self.query('Service', object_filter)]
+
+    def invalidate(self, object_type, name):
+        """
+        Forget the state of one object, and any cached query results for
+        objects of its type.
+        """
+
+        object_type = object_type.title()
+
+        with self.store.lock:
+            self.store.invalidate(('object', object_type, name))
+            self.invalidate_queries(object_type)
+
+    def invalidate_queries(self, object_type):
+        """
+        Forget the cached query results for objects of a type, whose matches
+        may have changed.
+        """
+
+        with self.store.lock:
+            for key in self.queries.pop(object_type, ()):
+                self.store.invalidate(key)
+
+    def apply_event(self, event):
+        """
+        Apply an event from the event stream to the problem index, and
+        invalidate the objects it refers to if it changes their state.
+        """
+
+        problems = self._problems
+        if problems is not None:
+            try:
+                problems.apply_event(event)
+
+            except Exception as e:
+                # Better rebuilt on next use than silently wrong
+                log.warning('Dropping problem index, failed to apply %s '
+                            'event: %s', event.get('type'), e)
+                self._problems = None
+                self.store.invalidate(('problems',))
+
+        if event.get('type') not in INVALIDATING_EVENTS:
+            return
+
+        if event.get('host'):
+            targets = [(event['host'], event.get('service'))]
+        else:
+            from .problems import downtime_targets
+            targets = set(downtime_targets(event))
+
+        for host, service in targets:
+            if service:
+                self.invalidate('Service', '{}!{}'.format(host, service))
+            else:
+                self.invalidate('Host', host)
+                # Services are matched by their host's state too
+                self.invalidate_queries('Service')
+
+    def follow(self, types=FOLLOWED_EVENTS, object_filter=None):
+        """
+        Apply events from the event stream to the cache, in a background
+        thread, until the process exits.
+        """
+
+        if self._follower is not None:
+            return
+
+        def consume():
+            for event in self.client.events(types,
+                                            object_filter=object_filter):
+                self.apply_event(event)
+
+        self._follower = threading.Thread(target=consume)
+        self._follower.daemon = True
+        self._follower.start()
+
+    def save(self, path=None):
+        """
+        Write unexpired entries to the snapshot file.
+        """
+
+        path = path or self.snapshot_path
+
+        # Include changes applied from the event stream
+        if self._problems is not None and ('problems',) in self.store:
+            self.store.set(('problems',), self._problems.to_data(),
+                           stored=self._problems.fetched)
+
+        entries = [[list(key), stored, value]
+                   for key, stored, value in self.store.items()]
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as fh:
+            fh.write(serializer.dumps(entries))
+
+        os.rename(temporary, path)
+
+    def load(self, path=None):
+        """
+        Restore entries from the snapshot file. Entries keep the time at
+        which they were originally fetched, so stale entries stay stale.
+        """
+
+        path = path or self.snapshot_path
+
+        try:
+            with open(path, 'rb') as fh:
+                entries = serializer.loads(fh.read())
+
+        except (IOError, ValueError) as e:
+            log.warning('Ignoring unreadable cache snapshot %s: %s', path, e)
+            return
+
+        for key, stored, value in entries:
+            key = tuple(key)
+
+            if key[0] == 'query':
+                self.store_query(key, value, stored=stored)
+            else:
+                self.store.set(key, value, stored=stored)
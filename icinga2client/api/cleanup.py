@@ -0,0 +1,260 @@
+"""
+Remove downtimes and acknowledgements in bulk, chosen by who set them, what
+they say or how old they are, rather than by the objects they belong to::
+
+    cleanup = Cleanup(client)
+    criteria = Criteria(author='deploy-bot', comment='Deploy *',
+                        older_than='2 days')
+
+    for result in cleanup.remove_downtimes(criteria):
+        print(result.name, result.code)
+
+Downtimes are removed with a single ``remove-downtime`` request, filtered
+on the ``downtime.*`` attributes. If the API rejects the filter, the
+matching downtimes are listed instead (filtered locally if need be) and
+removed by name, concurrently, as the list arrives.
+
+Acknowledgements aren't objects in their own right, so the comments which
+record them are listed instead, and the acknowledgements removed from the
+hosts and services those comments belong to, coalesced as in
+:mod:`~icinga2client.api.bulk`.
+"""
+
+import re
+
+from . import filters as f
+from .bulk import BulkActions
+from .exceptions import ApiError
+from .executor import Call, ParallelExecutor
+from .models import Target, TargetResult
+from ..helpers.data import to_timedelta, to_timestamp
+from ..helpers.timespec import timespecs
+
+# The comment entry_type which records an acknowledgement
+ACKNOWLEDGEMENT = 4
+
+DOWNTIME_ATTRS = ['author', 'comment', 'entry_time', 'end_time']
+COMMENT_ATTRS = ['host_name', 'service_name', 'author', 'text',
+                 'entry_type', 'entry_time']
+
+NAME_PATTERN = re.compile(r"'([^']+)'")
+
+
+class Criteria:
+    def __init__(self, author=None, comment=None, older_than=None,
+                 ending_before=None):
+        """
+        :param str author: Only objects set by this author.
+        :param str comment: A glob pattern the comment must match, in which
+            ``*`` matches any characters.
+        :param str older_than: A timespec duration, such as ``2 days``. Only
+            objects created longer ago than this.
+        :param str ending_before: A timespec. Only downtimes ending before
+            this time.
+        """
+
+        self.author = author
+        self.comment = comment
+        self.older_than = older_than
+        self.ending_before = ending_before
+
+    def __bool__(self):
+        return any(value is not None for value in (
+            self.author, self.comment, self.older_than, self.ending_before))
+
+    def expressions(self, scope, text):
+        if not self:
+            # Matching everything is too easy to do by accident
+            raise ValueError('No criteria given')
+
+        expressions = []
+
+        if self.author is not None:
+            expressions.append(
+                f.attr(scope + '.author').equals(self.author))
+
+        if self.comment is not None:
+            expressions.append(
+                f.attr('{}.{}'.format(scope, text)).matches(self.comment))
+
+        if self.older_than is not None:
+            age = abs(to_timedelta(self.older_than).total_seconds())
+            expressions.append(f.attr(scope + '.entry_time').less_than(
+                timespecs.now() - age))
+
+        return expressions
+
+    def downtime_filter(self):
+        """
+        :rtype: Expression
+        """
+
+        expressions = self.expressions('downtime', 'comment')
+
+        if self.ending_before is not None:
+            expressions.append(f.attr('downtime.end_time').less_than(
+                to_timestamp(self.ending_before)))
+
+        return f.all_of(*expressions)
+
+    def acknowledgement_filter(self):
+        """
+        A filter for the comments recording matching acknowledgements.
+
+        :rtype: Expression
+        """
+
+        if self.ending_before is not None:
+            raise ValueError('Acknowledgements have no end time')
+
+        return f.all_of(
+            f.attr('comment.entry_type').equals(ACKNOWLEDGEMENT),
+            *self.expressions('comment', 'text'))
+
+
+def downtime_target(name):
+    """
+    :param str name: A downtime's full name, ``host!uuid`` or
+        ``host!service!uuid``.
+    :returns: The :class:`Target` the downtime belongs to.
+    """
+
+    parts = name.split('!')
+
+    if len(parts) == 3:
+        return Target('Service', parts[0], parts[1])
+
+    return Target('Host', parts[0])
+
+
+class Cleanup:
+    def __init__(self, client, workers=8):
+        """
+        :param ApiClient client: The client used to make requests.
+        :param int workers: Concurrent requests when removing downtimes one
+            at a time.
+        """
+
+        self.client = client
+        self.bulk = BulkActions(client)
+        self.executor = ParallelExecutor(max_workers=workers)
+
+    def select(self, object_type, object_filter, attrs):
+        """
+        Stream the objects matching a filter, evaluated by the API if it
+        can, otherwise locally.
+        """
+
+        try:
+            for record in self.client.query_objects(
+                    object_type, object_filter, attrs=attrs):
+                yield record
+            return
+
+        except ApiError as e:
+            if e.status_code != 400:
+                raise
+
+        scope = object_type.lower()
+
+        for record in self.client.query_objects(object_type, attrs=attrs):
+            if object_filter.evaluate({scope: record.attrs}):
+                yield record
+
+    def remove_downtimes(self, criteria):
+        """
+        Remove every downtime matching ``criteria``.
+
+        :param Criteria criteria: The downtimes to remove.
+        :returns: An iterator of :class:`TargetResult`, one per downtime,
+            named after the downtime.
+        """
+
+        object_filter = criteria.downtime_filter()
+
+        try:
+            response = self.client.remove_downtime_filter('Downtime',
+                                                          object_filter)
+
+        except ApiError as e:
+            if e.status_code == 404:
+                # No objects found
+                return
+
+            if e.status_code != 400:
+                raise
+
+        else:
+            for result in response.get('results', []):
+                status = result.get('status', '')
+                match = NAME_PATTERN.search(status)
+                name = result.get('name') or (match and match.group(1))
+
+                yield TargetResult(downtime_target(name or ''),
+                                   int(result.get('code', 0)), status, name)
+            return
+
+        for result in self.remove_downtimes_by_name(
+                record.name for record in self.select(
+                    'Downtime', object_filter, DOWNTIME_ATTRS)):
+            yield result
+
+    def remove_downtimes_by_name(self, names):
+        """
+        Remove downtimes one at a time, concurrently. Removal starts while
+        ``names`` is still being consumed.
+
+        :param names: An iterable of full downtime names.
+        :returns: An iterator of :class:`TargetResult`.
+        """
+
+        calls = (Call(self.client.remove_downtime, name) for name in names)
+
+        for result in self.executor.iter_results(calls):
+            name = result.call.args[0]
+            target = downtime_target(name)
+
+            if not result.ok:
+                yield TargetResult(target,
+                                   getattr(result.error, 'status_code', 0),
+                                   str(result.error), name)
+                continue
+
+            results = result.response.get('results') or [{}]
+            yield TargetResult(target, int(results[0].get('code', 0)),
+                               results[0].get('status'), name)
+
+    def acknowledged(self, criteria):
+        """
+        :returns: The hosts and services with acknowledgements matching
+            ``criteria``, as a list of :class:`Target`.
+        """
+
+        targets = {}
+
+        for record in self.select('Comment', criteria.acknowledgement_filter(),
+                                  COMMENT_ATTRS):
+            if record.service_name:
+                target = Target('Service', record.host_name,
+                                record.service_name)
+            else:
+                target = Target('Host', record.host_name)
+
+            targets[target.name] = target
+
+        return [targets[name] for name in sorted(targets)]
+
+    def remove_acknowledgements(self, criteria):
+        """
+        Remove every acknowledgement matching ``criteria``.
+
+        :param Criteria criteria: The acknowledgements to remove.
+        :returns: A list of :class:`TargetResult`, one per host or service.
+        """
+
+        targets = self.acknowledged(criteria)
+
+        if not targets:
+            return []
+
+        return self.bulk.remove_acknowledgement(targets)
@@ -0,0 +1,39 @@
+import requests as requests_lib
+
+from ..helpers import serializer
+
+
+class ApiError(requests_lib.HTTPError):
+    """
+    Raised when the API responds with an error status. The body of the
+    response is kept, as the API frequently reports per-object results
+    alongside the failure.
+    """
+
+    def __init__(self, status_code, content, response=None):
+        self.status_code = status_code
+        self.content = content
+
+        if isinstance(content, bytes):
+            content = content.decode('utf-8', 'replace')
+
+        super(ApiError, self).__init__(
+            'API returned {}: {}'.format(status_code, content),
+            response=response
+        )
+
+    @classmethod
+    def from_response(cls, response):
+        return cls(response.status_code, response.content, response=response)
+
+    @property
+    def results(self):
+        """
+        The ``results`` array of the response body, or an empty list if
+        there isn't one.
+        """
+
+        try:
+            return serializer.loads(self.content).get('results') or []
+        except (ValueError, TypeError, AttributeError):
+            return []
@@ -0,0 +1,139 @@
+"""
+Run many independent API calls on a thread pool.
+
+Use this for batches which can't be merged into a single filter (see
+:mod:`~icinga2client.api.bulk`), for example because every item has its own
+comment or expiry time. A failing call doesn't interrupt the batch; its
+exception is recorded in its :class:`CallResult` instead::
+
+    executor = ParallelExecutor(max_workers=16, per_host=4, rate=50)
+    results = executor.run([
+        Call(client.acknowledge_problem, 'Host', f.host(name), comment)
+        for name, comment in items
+    ])
+
+    failed = [result for result in results if not result.ok]
+"""
+
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from urllib.parse import urlparse
+
+from . import hooks
+from ..helpers.throttle import TokenBucket
+from ..helpers.timespec import timespecs
+
+
+class Call:
+    """
+    A deferred call to an API method, typically a bound method of
+    :class:`APIMethodsMixin` such as ``client.schedule_downtime``.
+    """
+
+    def __init__(self, method, *args, **kwargs):
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+
+    @property
+    def host(self):
+        """
+        The API endpoint the call is made against, used to apply per-host
+        concurrency limits.
+        """
+
+        client = getattr(self.method, '__self__', None)
+        base_uri = getattr(client, 'base_uri', None)
+
+        return urlparse(base_uri).netloc if base_uri else None
+
+    def __call__(self):
+        return self.method(*self.args, **self.kwargs)
+
+    def __repr__(self):
+        return '<Call {}{!r}>'.format(
+            getattr(self.method, '__name__', self.method), self.args)
+
+
+class CallResult(namedtuple('CallResult', ['call', 'response', 'error'])):
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class ParallelExecutor:
+    default_max_workers = 8
+
+    def __init__(self, max_workers=None, per_host=None, rate=None,
+                 burst=None):
+        """
+        :param int max_workers: Size of the thread pool.
+        :param int per_host: Maximum number of calls in flight against any
+            single API endpoint. Unlimited (beyond ``max_workers``) if unset.
+        :param float rate: Maximum number of calls started per second, across
+            all endpoints. Unlimited if unset.
+        :param int burst: Number of calls which may be started at once before
+            ``rate`` applies.
+        """
+
+        self.max_workers = max_workers or self.default_max_workers
+        self.per_host = per_host
+        self.bucket = TokenBucket(rate, burst) if rate else None
+
+        self._host_semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = \
+                    threading.BoundedSemaphore(self.per_host)
+
+            return self._host_semaphores[host]
+
+    def _execute(self, call, anchor, origin):
+        if self.per_host:
+            semaphore = self._semaphore(call.host)
+            semaphore.acquire()
+
+        try:
+            if self.bucket:
+                self.bucket.acquire()
+
+            with timespecs.anchored(anchor), hooks.working_for(origin):
+                return CallResult(call, call(), None)
+
+        except Exception as e:
+            return CallResult(call, None, e)
+
+        finally:
+            if self.per_host:
+                semaphore.release()
+
+    def iter_results(self, calls):
+        """
+        Execute ``calls`` and yield a :class:`CallResult` for each of them,
+        in the order they were given. Timespecs resolve against the time the
+        batch started, for every call, and requests are made on behalf of
+        the calling thread (see :func:`~icinga2client.api.hooks.origin`).
+        """
+
+        anchor = timespecs.now()
+        origin = hooks.origin()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for result in pool.map(
+                    lambda call: self._execute(call, anchor, origin), calls):
+                yield result
+
+    def run(self, calls):
+        """
+        Execute ``calls``, returning a list of :class:`CallResult` in the
+        order the calls were given.
+        """
+
+        return list(self.iter_results(calls))
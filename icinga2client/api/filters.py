@@ -1,15 +1,424 @@
+"""
+Build `filter`_ expressions for the API.
+
+Expressions are composed from attributes and literal values, and combined
+with ``&`` (and), ``|`` (or) and ``~`` (not)::
+
+    expression = attr('host.name').in_(hostnames) & \\
+        ~attr('service.name').equals('ping')
+
+``str(expression)`` renders the expression with its values inline and
+quoted. :py:meth:`Expression.compile` instead moves the values into
+``filter_vars``, so the expression text stays short and identical from one
+request to the next however many names it matches.
+
+The helper functions (:func:`host`, :func:`hostgroup`, etc.) return
+expressions for the filters used by the command-line interface.
+
+Expressions can also be evaluated locally with :py:meth:`Expression.evaluate`,
+against object attributes fetched earlier, to preview what a filter would
+match without asking the API.
+
+.. _filter: http://docs.icinga.org/icinga2/latest/doc/module/icinga2/chapter/icinga2-api#icinga2-api-filters
+"""  # nopep8
+
+import fnmatch
+import numbers
+import operator
+
+ESCAPES = [('\\', '\\\\'), ('"', '\\"'), ('\n', '\\n'), ('\r', '\\r'),
+           ('\t', '\\t')]
+
+
+def quote(value):
+    """
+    Render ``value`` as a double-quoted icinga2 DSL string literal.
+    """
+
+    for character, escaped in ESCAPES:
+        value = value.replace(character, escaped)
+
+    return '"{}"'.format(value)
+
+
+def literal(value):
+    """
+    Render a Python value as an icinga2 DSL literal.
+    """
+
+    if value is None:
+        return 'null'
+    elif isinstance(value, bool):
+        return 'true' if value else 'false'
+    elif isinstance(value, numbers.Number):
+        return repr(value)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        return '[{}]'.format(', '.join(literal(v) for v in value))
+
+    return quote(value)
+
+
+COMPARISONS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+}
+
+
+class Variables:
+    """
+    Collects the values of an expression being compiled into
+    ``filter_vars``.
+    """
+
+    def __init__(self):
+        self.values = {}
+
+    def add(self, value):
+        if isinstance(value, (set, frozenset, tuple)):
+            value = sorted(value) if isinstance(value, (set, frozenset)) \
+                else list(value)
+
+        name = 'v{}'.format(len(self.values))
+        self.values[name] = value
+
+        return name
+
+
+class Expression:
+    """
+    A filter expression. Subclasses implement :py:meth:`render`.
+    """
+
+    # Whether the rendered expression binds tighter than && and ||, so
+    # needs no parentheses as an operand of either
+    atomic = True
+
+    def render(self, variables=None):
+        """
+        :param Variables variables: Collects values into filter variables.
+            If ``None``, values are rendered inline.
+        :rtype: str
+        """
+
+        raise NotImplementedError
+
+    def evaluate(self, scope):
+        """
+        Evaluate the expression locally.
+
+        :param dict scope: The attributes of the objects in scope, keyed by
+            lowercase type, such as ``{'host': {...}, 'service': {...}}``.
+        :raises LookupError: If the expression refers to an attribute which
+            isn't in scope.
+        :raises ValueError: If the expression can't be evaluated locally.
+        :rtype: bool
+        """
+
+        raise NotImplementedError
+
+    def compile(self):
+        """
+        :returns: A tuple of ``(filter, filter_vars)``.
+        """
+
+        variables = Variables()
+        return self.render(variables), variables.values
+
+    def value(self, value, variables):
+        if variables is None or not isinstance(value, (str, list, tuple,
+                                                       set, frozenset)):
+            return literal(value)
+
+        return variables.add(value)
+
+    def __and__(self, other):
+        return And(self, as_expression(other))
+
+    def __or__(self, other):
+        return Or(self, as_expression(other))
+
+    def __invert__(self):
+        return Not(self)
+
+    def __str__(self):
+        return self.render()
+
+    def __repr__(self):
+        return '<{} {}>'.format(type(self).__name__, self)
+
+    def __eq__(self, other):
+        return isinstance(other, Expression) and str(self) == str(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(str(self))
+
+
+class Raw(Expression):
+    """
+    An expression given as DSL text.
+    """
+
+    atomic = False
+
+    def __init__(self, text):
+        self.text = text
+
+    def render(self, variables=None):
+        return self.text
+
+    def evaluate(self, scope):
+        raise ValueError('Filters given as text cannot be evaluated locally')
+
+
+class Comparison(Expression):
+    """
+    ``<attribute> <operator> <value>``
+    """
+
+    def __init__(self, attribute, operator, value):
+        self.attribute = attribute
+        self.operator = operator
+        self.operand = value
+
+    def render(self, variables=None):
+        return '{} {} {}'.format(self.attribute, self.operator,
+                                 self.value(self.operand, variables))
+
+    def evaluate(self, scope):
+        value = self.attribute.resolve(scope)
+
+        if self.operator in ('<', '>') and (value is None or
+                                            self.operand is None):
+            return False
+
+        return COMPARISONS[self.operator](value, self.operand)
+
+
+class Membership(Expression):
+    """
+    ``<attribute> in [<values>...]``: the attribute is one of the values.
+    """
+
+    def __init__(self, attribute, values):
+        self.attribute = attribute
+        # Sets are sorted, so that the same values render the same way
+        self.values = sorted(values) if isinstance(values, (set, frozenset)) \
+            else list(values)
+
+    def render(self, variables=None):
+        return '{} in {}'.format(self.attribute,
+                                 self.value(self.values, variables))
+
+    def evaluate(self, scope):
+        return self.attribute.resolve(scope) in self.values
+
+
+class Contains(Expression):
+    """
+    ``<value> in <attribute>``: the array attribute contains the value.
+    """
+
+    def __init__(self, attribute, value):
+        self.attribute = attribute
+        self.operand = value
+
+    def render(self, variables=None):
+        return '{} in {}'.format(self.value(self.operand, variables),
+                                 self.attribute)
+
+    def evaluate(self, scope):
+        return self.operand in (self.attribute.resolve(scope) or [])
+
+
+class Match(Expression):
+    """
+    ``match(<pattern>, <attribute>)``: the attribute matches a glob pattern,
+    in which ``*`` matches any characters and ``?`` any one character.
+    """
+
+    def __init__(self, attribute, pattern):
+        self.attribute = attribute
+        self.pattern = pattern
+
+    def render(self, variables=None):
+        return 'match({}, {})'.format(self.value(self.pattern, variables),
+                                      self.attribute)
+
+    def evaluate(self, scope):
+        value = self.attribute.resolve(scope)
+        values = value if isinstance(value, list) else [value]
+
+        # Like icinga2, array attributes match if any element does
+        return any(isinstance(v, str) and fnmatch.fnmatchcase(v, self.pattern)
+                   for v in values)
+
+
+class Combination(Expression):
+    operator = None
+    atomic = False
+
+    def __init__(self, *expressions):
+        self.expressions = []
+
+        # Flatten nested combinations of the same kind
+        for expression in expressions:
+            if type(expression) is type(self):
+                self.expressions.extend(expression.expressions)
+            else:
+                self.expressions.append(expression)
+
+    def render(self, variables=None):
+        return ' {} '.format(self.operator).join(
+            expression.render(variables) if expression.atomic
+            else '({})'.format(expression.render(variables))
+            for expression in self.expressions
+        )
+
+
+class And(Combination):
+    operator = '&&'
+
+    def evaluate(self, scope):
+        return all(e.evaluate(scope) for e in self.expressions)
+
+
+class Or(Combination):
+    operator = '||'
+
+    def evaluate(self, scope):
+        return any(e.evaluate(scope) for e in self.expressions)
+
+
+class Not(Expression):
+    def __init__(self, expression):
+        self.expression = expression
+
+    def render(self, variables=None):
+        return '!({})'.format(self.expression.render(variables))
+
+    def evaluate(self, scope):
+        return not self.expression.evaluate(scope)
+
+
+class Attribute:
+    """
+    An object attribute, such as ``host.name``, from which comparisons are
+    built.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+    def resolve(self, scope):
+        """
+        Look the attribute up in a scope (see :py:meth:`Expression.evaluate`).
+        Like icinga2, missing keys within a dictionary attribute such as
+        ``host.vars`` resolve to ``None``, but the attribute itself must be
+        present.
+        """
+
+        parts = self.name.split('.')
+        value = scope[parts[0]][parts[1]]
+
+        for part in parts[2:]:
+            value = value.get(part) if isinstance(value, dict) else None
+
+        return value
+
+    def equals(self, value):
+        return Comparison(self, '==', value)
+
+    def not_equals(self, value):
+        return Comparison(self, '!=', value)
+
+    def less_than(self, value):
+        return Comparison(self, '<', value)
+
+    def greater_than(self, value):
+        return Comparison(self, '>', value)
+
+    def in_(self, values):
+        return Membership(self, values)
+
+    def contains(self, value):
+        return Contains(self, value)
+
+    def matches(self, pattern):
+        return Match(self, pattern)
+
+
+def attr(name):
+    return Attribute(name)
+
+
+def as_expression(value):
+    return value if isinstance(value, Expression) else Raw(value)
+
+
+def all_of(*expressions):
+    return And(*[as_expression(e) for e in expressions])
+
+
+def any_of(*expressions):
+    return Or(*[as_expression(e) for e in expressions])
+
+
 def host(hostname):
-    return 'host.name == "{}"'.format(hostname)
+    return attr('host.name').equals(hostname)
 
 
 def service(hostname, service):
-    return 'host.name == "{}" && service.name == "{}"'\
-        .format(hostname, service)
+    return host(hostname) & attr('service.name').equals(service)
 
 
 def hostgroup(group):
-    return '"{}" in host.groups'.format(group)
+    return attr('host.groups').contains(group)
 
 
 def servicegroup(group):
-    return '"{}" in service.groups'.format(group)
+    return attr('service.groups').contains(group)
+
+
+def host_in(hostnames):
+    return attr('host.name').in_(hostnames)
+
+
+def service_in(names):
+    """
+    :param list names: Full service names, in the form ``host!service``.
+    """
+    return attr('service.__name').in_(names)
+
+
+def parameters(object_filter, filter_vars=None):
+    """
+    Build the ``filter`` and ``filter_vars`` request parameters for a filter
+    given either as DSL text or as an :class:`Expression`.
+
+    :param dict filter_vars: Variables used by :class:`Raw` parts of the
+        filter.
+    :raises ValueError: If ``filter_vars`` uses a name which compiling the
+        expression generated (``v0``, ``v1``, etc.).
+    """
+
+    if isinstance(object_filter, Expression):
+        object_filter, compiled = object_filter.compile()
+        collisions = set(compiled).intersection(filter_vars or {})
+
+        if collisions:
+            raise ValueError('filter_vars {} clash with the variables of '
+                             'the compiled filter'.format(
+                                 ', '.join(sorted(collisions))))
+
+        compiled.update(filter_vars or {})
+        filter_vars = compiled
+
+    return {'filter': object_filter, 'filter_vars': filter_vars or None}
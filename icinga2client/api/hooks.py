@@ -0,0 +1,132 @@
+import contextlib
+import threading
+import time
+
+_local = threading.local()
+
+
+def origin():
+    """
+    The thread on whose behalf the current thread makes requests: itself,
+    unless it is working for another, such as a worker of a
+    :class:`~icinga2client.api.executor.ParallelExecutor`.
+    """
+
+    return getattr(_local, 'origin', None) or threading.current_thread()
+
+
+@contextlib.contextmanager
+def working_for(thread):
+    """
+    Attribute requests made by the current thread to ``thread``.
+    """
+
+    previous = getattr(_local, 'origin', None)
+    _local.origin = thread
+
+    try:
+        yield
+    finally:
+        _local.origin = previous
+
+
+def endpoint(command):
+    """
+    The endpoint a command is made against, for grouping statistics: the
+    first two segments of its path, such as ``objects/hosts`` for
+    ``objects/hosts/web01``.
+    """
+
+    return '/'.join(command.strip('/').split('?')[0].split('/')[:2])
+
+
+class RequestEvent:
+    """
+    Describes one attempt at an API request. The same event is passed to
+    the ``before`` and ``after`` hooks of the attempt, and may be used to
+    carry state between them.
+
+    ``timings`` records how long each phase of the attempt took, in seconds:
+    ``throttle`` (waiting for rate and concurrency limits), ``response``
+    (from sending the request until the response headers arrived) and
+    ``total``. If the attempt opened a new connection, rather than reusing
+    one, ``dns`` (resolving the host name), ``connect`` and ``tls`` (the
+    handshake) are recorded too, and left out of ``response``.
+    :py:meth:`ApiClient.request` adds ``decode`` once the body has been
+    decoded.
+
+    ``thread`` is the thread the request was made for (see :func:`origin`).
+    """
+
+    def __init__(self, method, command, attempt=0, bytes_sent=0):
+        self.method = method
+        self.command = command
+        self.endpoint = endpoint(command)
+        self.thread = origin()
+        self.attempt = attempt
+        self.bytes_sent = bytes_sent
+        self.bytes_received = 0
+        self.started = time.time()
+        self.timings = {}
+        self.response = None
+        self.error = None
+
+    @property
+    def status(self):
+        return self.response.status_code if self.response is not None \
+            else None
+
+    @property
+    def retry(self):
+        return self.attempt > 0
+
+
+class Hooks:
+    """
+    Callbacks run around every request a client makes::
+
+        client.hooks.after(lambda event: print(event.command, event.status))
+    """
+
+    def __init__(self):
+        self.before_request = []
+        self.after_request = []
+        self.after_decode = []
+
+    def before(self, fn):
+        """
+        Call ``fn(event)`` before each attempt at a request is sent.
+        """
+
+        self.before_request.append(fn)
+        return fn
+
+    def after(self, fn):
+        """
+        Call ``fn(event)`` after each attempt completes or fails.
+        """
+
+        self.after_request.append(fn)
+        return fn
+
+    def decoded(self, fn):
+        """
+        Call ``fn(event)`` once a response body has been decoded.
+        """
+
+        self.after_decode.append(fn)
+        return fn
+
+    def remove(self, fn):
+        """
+        Stop calling ``fn``, wherever it was registered.
+        """
+
+        for hooks in (self.before_request, self.after_request,
+                      self.after_decode):
+            while fn in hooks:
+                hooks.remove(fn)
+
+    def run(self, hooks, event):
+        for fn in hooks:
+            fn(event)
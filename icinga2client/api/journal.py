@@ -0,0 +1,279 @@
+"""
+An append-only journal of bulk actions, so that an interrupted run can be
+resumed, or everything it did undone.
+
+A journal is a directory holding a file of records for each run, and an
+index of the runs, so that finding the last run of an action or replaying one
+reads only the index and that run's records. Only the most recent ``keep``
+runs are kept; older runs are pruned as new ones start.
+
+Each run records what it is about to do before doing it, then the result for
+each target, including the names of any downtimes created. Records are JSON
+lines::
+
+    {"event": "run", "run": "...", "action": "schedule_downtime", ...}
+    {"event": "planned", "run": "...", "targets": ["web01", ...], ...}
+    {"event": "result", "run": "...", "target": "web01", "code": 200, ...}
+    {"event": "removed", "run": "...", "name": "web01!..."}
+
+``planned`` records are synced to disk before the request is sent. Result
+records are synced in batches, every ``sync_every`` records or
+``sync_interval`` seconds, so a crash loses at most that many results; the
+targets concerned are retried by a resumed run.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from ..helpers.data import dict_no_nones
+
+
+class Replay(namedtuple('Replay', ['results', 'created', 'removed'])):
+    """
+    A summary of a run: the last result for each target, the names of
+    objects created and not since removed, and the names removed.
+    """
+
+    __slots__ = ()
+
+    @property
+    def succeeded(self):
+        """
+        :returns: The results of targets which succeeded, by target.
+        """
+
+        return dict((target, result)
+                    for target, result in self.results.items()
+                    if 200 <= result['code'] < 300)
+
+
+def read_lines(path):
+    """
+    Read JSON lines, skipping any which don't parse, such as a final line
+    left incomplete by a crash.
+    """
+
+    if not os.path.exists(path):
+        return
+
+    with open(path) as fh:
+        for line in fh:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class Journal:
+    index_name = 'index.jsonl'
+
+    def __init__(self, path, keep=100, sync_every=100, sync_interval=1.0):
+        """
+        :param str path: The journal directory, created if necessary.
+        :param int keep: How many runs to keep.
+        :param int sync_every: Sync after this many unsynced records.
+        :param float sync_interval: Sync if the last sync was longer ago than
+            this, in seconds.
+        """
+
+        self.path = os.path.expanduser(path)
+        self.keep = keep
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.synced = time.time()
+        self._fh = None
+        self._fh_run = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.path, self.index_name)
+
+    def run_path(self, run):
+        """
+        :returns: The path of the file holding a run's records.
+        """
+
+        return os.path.join(self.path, run + '.jsonl')
+
+    def makedirs(self):
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path, 0o700)
+
+    def fh(self, run):
+        """
+        The file a run's records are appended to. One is kept open at a
+        time, normally that of the run in progress.
+        """
+
+        if self._fh_run != run:
+            self._close()
+            self.makedirs()
+
+            self._fh = open(self.run_path(run), 'a')
+            self._fh_run = run
+
+        return self._fh
+
+    def append(self, record, sync=False):
+        line = json.dumps(dict_no_nones(record), sort_keys=True)
+
+        with self.lock:
+            self.fh(record['run']).write(line + '\n')
+            self.pending += 1
+
+            if sync or self.pending >= self.sync_every or \
+                    time.time() - self.synced >= self.sync_interval:
+                self._sync()
+
+    def sync(self):
+        with self.lock:
+            self._sync()
+
+    def _sync(self):
+        if self._fh is None or not self.pending:
+            return
+
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+        self.pending = 0
+        self.synced = time.time()
+
+    def _close(self):
+        self._sync()
+
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+            self._fh_run = None
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+    def start(self, action, options):
+        """
+        Record the start of a run, pruning the oldest runs if there are more
+        than :py:attr:`keep`.
+
+        :returns: The new run's ID.
+        """
+
+        run = '{}-{}'.format(time.strftime('%Y%m%dT%H%M%S'),
+                             uuid.uuid4().hex[:8])
+        started = time.time()
+
+        self.append({'event': 'run', 'run': run, 'action': action,
+                     'options': options, 'time': started}, sync=True)
+
+        with self.lock:
+            with open(self.index_path, 'a') as fh:
+                fh.write(json.dumps({'run': run, 'action': action,
+                                     'time': started}, sort_keys=True) + '\n')
+                fh.flush()
+                os.fsync(fh.fileno())
+
+            self.prune()
+
+        return run
+
+    def runs(self):
+        """
+        :returns: The index entries of the runs, oldest first.
+        """
+
+        return list(read_lines(self.index_path))
+
+    def prune(self):
+        runs = self.runs()
+        if len(runs) <= self.keep:
+            return
+
+        stale, runs = runs[:-self.keep], runs[-self.keep:]
+
+        # Replace the index before deleting anything, so it never lists a
+        # run which is gone
+        temporary = self.index_path + '.tmp'
+        with open(temporary, 'w') as fh:
+            for entry in runs:
+                fh.write(json.dumps(entry, sort_keys=True) + '\n')
+            fh.flush()
+            os.fsync(fh.fileno())
+
+        os.rename(temporary, self.index_path)
+
+        for entry in stale:
+            try:
+                os.remove(self.run_path(entry['run']))
+            except OSError:
+                pass
+
+    def planned(self, run, targets, options=None):
+        """
+        Record the targets about to be acted on, and the options for the
+        request. Synced before returning, so nothing is sent unrecorded.
+        """
+
+        self.append({'event': 'planned', 'run': run, 'targets': targets,
+                     'options': options}, sync=True)
+
+    def result(self, run, target, code, status=None, name=None):
+        self.append({'event': 'result', 'run': run, 'target': target,
+                     'code': code, 'status': status, 'name': name})
+
+    def removed(self, run, name):
+        self.append({'event': 'removed', 'run': run, 'name': name})
+
+    def records(self, run):
+        """
+        Read back the records of a run. A final line left incomplete by a
+        crash is ignored.
+        """
+
+        if self._fh_run == run:
+            self.sync()
+
+        return read_lines(self.run_path(run))
+
+    def latest(self, action):
+        """
+        :returns: The ID of the most recent run of an action, or ``None``.
+        """
+
+        for entry in reversed(self.runs()):
+            if entry.get('action') == action:
+                return entry['run']
+
+        return None
+
+    def replay(self, run):
+        """
+        :rtype: Replay
+        """
+
+        results, created, removed = {}, [], set()
+
+        for record in self.records(run):
+            if record['event'] == 'result':
+                results[record['target']] = record
+
+                if record.get('name') and 200 <= record['code'] < 300:
+                    created.append(record['name'])
+
+            elif record['event'] == 'removed':
+                removed.add(record['name'])
+
+        return Replay(results, [name for name in created
+                                if name not in removed], removed)
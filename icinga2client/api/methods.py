@@ -6,14 +6,20 @@
 .. _remove-acknowledgement: http://docs.icinga.org/icinga2/latest/doc/module/icinga2/chapter/icinga2-api#icinga2-api-actions-remove-acknowledgement
 .. _filter: http://docs.icinga.org/icinga2/latest/doc/module/icinga2/chapter/icinga2-api#icinga2-api-filters
 .. _parsedatetime: https://pypi.python.org/pypi/parsedatetime
+.. _objects: http://docs.icinga.org/icinga2/latest/doc/module/icinga2/chapter/icinga2-api#icinga2-api-config-objects-query
+.. _joins: http://docs.icinga.org/icinga2/latest/doc/module/icinga2/chapter/icinga2-api#icinga2-api-config-objects-query-joins
 """  # nopep8
 
+from . import filters as f
 from ..helpers.data import to_timestamp, to_timedelta
+from ..helpers.stream import iter_results
+from .models import record_type
 
 
 class APIMethodsMixin:
     def schedule_downtime(self, object_type, object_filter, start, end,
-                          comment, duration=False, trigger_name=None):
+                          comment, duration=False, trigger_name=None,
+                          filter_vars=None):
         """
         Schedule downtime for hosts and services.
 
@@ -22,8 +28,9 @@ class APIMethodsMixin:
 
         :param str object_type: The object type to perform the action on.
             Either ``Host`` or ``Service``.
-        :param str object_filter: A `filter`_ to apply when scheduling
-            the downtime.
+        :param object_filter: A `filter`_ to apply when scheduling
+            the downtime, either as a string or a
+            :class:`~icinga2client.api.filters.Expression`.
         :param str start: A timespec marking the beginning of the downtime,
             in a valid `parsedatetime`_ format.
         :param str end: A timespec marking the end of the downtime,
@@ -32,6 +39,8 @@ class APIMethodsMixin:
         :param str duration: A timespec indicating the maximum duration of the
             downtime. This implies a ``flexible`` downtime.
         :param str trigger_name: Sets the trigger for a triggered downtime.
+        :param dict filter_vars: Values of any variables referenced by
+            a filter given as a string.
         """
 
         if duration:
@@ -39,9 +48,9 @@ class APIMethodsMixin:
         else:
             duration = False
 
-        return self.request('post', 'actions/schedule-downtime', {
+        data = f.parameters(object_filter, filter_vars)
+        data.update({
             'type': object_type.title(),
-            'filter': object_filter,
             'author': comment.author,
             'comment': comment.text,
             'start_time': to_timestamp(start),
@@ -51,6 +60,8 @@ class APIMethodsMixin:
             'trigger_name': trigger_name,
         })
 
+        return self.request('post', 'actions/schedule-downtime', data)
+
     def remove_downtime(self, downtime):
         """
         Remove a named downtime. See also :py:meth:`remove_downtime_filter`.
@@ -63,23 +74,27 @@ class APIMethodsMixin:
             'downtime': downtime
         })
 
-    def remove_downtime_filter(self, object_type, object_filter):
+    def remove_downtime_filter(self, object_type, object_filter,
+                               filter_vars=None):
         """
         Remove downtimes matching the specified filter.
         See also :py:meth:`remove_downtime`.
 
         :param str object_type: The object type to perform the action on.
             Either ``Host`` or ``Service``.
-        :param str object_filter: A `filter`_ to apply.
+        :param object_filter: A `filter`_ to apply.
+        :param dict filter_vars: Values of any variables referenced by
+            a filter given as a string.
         """
 
-        return self.request('post', 'actions/remove-downtime', {
-            'type': object_type.title(),
-            'filter': object_filter,
-        })
+        data = f.parameters(object_filter, filter_vars)
+        data['type'] = object_type.title()
+
+        return self.request('post', 'actions/remove-downtime', data)
 
     def acknowledge_problem(self, object_type, object_filter, comment,
-                            expiry=None, sticky=True, notify=True):
+                            expiry=None, sticky=True, notify=True,
+                            filter_vars=None):
         """
         Acknowledge a host or service problem.
 
@@ -87,7 +102,7 @@ class APIMethodsMixin:
 
         :param str object_type: The object type to acknowledge.
             Either ``Host`` or ``Service``.
-        :param str object_filter: A `filter`_ to apply when acknowledging
+        :param object_filter: A `filter`_ to apply when acknowledging
             the problem.
         :param Comment comment: Comment associated with the acknowledgement.
         :param str expiry: A timespec marking the expiry time of the
@@ -97,14 +112,16 @@ class APIMethodsMixin:
             state, otherwise the ack will be cleared on any state change.
         :param bool notify: Whether to generate any configured notifications
             associated with the host or service.
+        :param dict filter_vars: Values of any variables referenced by
+            a filter given as a string.
         """
 
         if expiry:
             expiry = to_timestamp(expiry)
 
-        return self.request('post', 'actions/acknowledge-problem', {
+        data = f.parameters(object_filter, filter_vars)
+        data.update({
             'type': object_type.title(),
-            'filter': object_filter,
             'author': comment.author,
             'comment': comment.text,
             'expiry': expiry,
@@ -112,7 +129,10 @@ class APIMethodsMixin:
             'notify': notify,
         })
 
-    def remove_acknowledgement(self, object_type, object_filter):
+        return self.request('post', 'actions/acknowledge-problem', data)
+
+    def remove_acknowledgement(self, object_type, object_filter,
+                               filter_vars=None):
         """
         Remove acknowledgements on a host or service.
 
@@ -120,10 +140,137 @@ class APIMethodsMixin:
 
         :param str object_type: The object type to remove acknowledgements
             for. Either ``Host`` or ``Service``.
-        :param str object_filter: A `filter`_ to apply when removing
+        :param object_filter: A `filter`_ to apply when removing
             the problem acknowledgement.
+        :param dict filter_vars: Values of any variables referenced by
+            a filter given as a string.
         """
-        return self.request('post', 'actions/remove-acknowledgement', {
-            'type': object_type.title(),
-            'filter': object_filter
-        })
+
+        data = f.parameters(object_filter, filter_vars)
+        data['type'] = object_type.title()
+
+        return self.request('post', 'actions/remove-acknowledgement', data)
+
+
+class ObjectQueryMixin:
+    """
+    Methods to query config objects. The response is parsed as it arrives,
+    so only one object is held in memory at a time, however large the
+    result set. Compressed responses are decompressed as they arrive too.
+    Requires a client which implements ``stream``.
+
+    If the client has a :py:attr:`query_cache`, identical queries are
+    answered from it instead. See :class:`~.cache.QueryCache`.
+    """
+
+    chunk_size = 64 * 1024
+    query_cache = None
+
+    def query_objects(self, object_type, object_filter=None, attrs=None,
+                      joins=None, filter_vars=None):
+        """
+        Query `objects`_ of any type.
+
+        :param str object_type: The object type to query, such as ``Host``,
+            ``Service`` or ``Downtime``.
+        :param object_filter: A `filter`_ to select objects.
+        :param list attrs: Attributes to fetch. All attributes are fetched if
+            unset, so restricting them considerably reduces transfer size.
+        :param list joins: Attributes of related objects to fetch, such as
+            ``host.name`` or ``host.groups``. See `joins`_.
+        :param dict filter_vars: Values of any variables referenced by
+            a filter given as a string.
+        :returns: An iterator of :class:`ApiObject`, or the more specific
+            record type for hosts, services, downtimes and comments. Records
+            are only decoded when their attributes are first accessed.
+        """
+
+        data = f.parameters(object_filter, filter_vars)
+        data.update({'attrs': attrs, 'joins': joins})
+
+        command = 'objects/{}s'.format(object_type.lower())
+        headers = {'X-HTTP-Method-Override': 'GET'}
+        record = record_type(object_type)
+
+        cache = self.query_cache
+        if cache is not None:
+            key = cache.key(command, self.build_body(data))
+            cached, etag = cache.lookup(key)
+
+            if cached is not None:
+                for result in cached:
+                    yield record(result)
+                return
+
+            if etag:
+                headers['If-None-Match'] = etag
+
+        response = self.stream('post', command, data, headers=headers)
+
+        try:
+            if response.status_code == 304:
+                cached = cache.revalidated(key)
+
+                if cached is not None:
+                    for result in cached:
+                        yield record(result)
+                    return
+
+                # Dropped in the meantime, so ask again unconditionally
+                response.close()
+                del headers['If-None-Match']
+                response = self.stream('post', command, data,
+                                       headers=headers)
+
+            # Compressed responses are decompressed chunk by chunk
+            chunks = response.iter_content(self.chunk_size)
+            results = [] if cache is not None else None
+            size = 0
+
+            for result in iter_results(chunks, raw=True):
+                if results is not None:
+                    size += len(result)
+
+                    if size > cache.max_bytes:
+                        # Too large to keep, but still streamed
+                        cache.stats['too_large'] += 1
+                        results = None
+                    else:
+                        results.append(result)
+
+                yield record(result)
+
+            # Only complete results are worth keeping
+            if results is not None:
+                cache.store(key, results, response.headers.get('ETag'))
+
+        finally:
+            response.close()
+
+    def hosts(self, object_filter=None, attrs=None, joins=None):
+        """
+        Query hosts. See :py:meth:`query_objects`.
+        """
+
+        return self.query_objects('Host', object_filter, attrs, joins)
+
+    def services(self, object_filter=None, attrs=None, joins=None):
+        """
+        Query services. See :py:meth:`query_objects`.
+        """
+
+        return self.query_objects('Service', object_filter, attrs, joins)
+
+    def downtimes(self, object_filter=None, attrs=None, joins=None):
+        """
+        Query downtimes. See :py:meth:`query_objects`.
+        """
+
+        return self.query_objects('Downtime', object_filter, attrs, joins)
+
+    def comments(self, object_filter=None, attrs=None, joins=None):
+        """
+        Query comments. See :py:meth:`query_objects`.
+        """
+
+        return self.query_objects('Comment', object_filter, attrs, joins)
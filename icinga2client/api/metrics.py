@@ -0,0 +1,286 @@
+"""
+Request timings and counters for :class:`ApiClient`, collected through its
+:class:`~icinga2client.api.hooks.Hooks`::
+
+    metrics = Metrics().install(client)
+    ...
+    metrics.write(sys.stdout, format='prometheus')
+
+Timings are kept as histograms per endpoint and phase (see
+:class:`~icinga2client.api.hooks.RequestEvent`), and can be exported in the
+Prometheus text format, as JSON lines, or as a table for humans.
+
+Timespec and TLS counters are kept by the whole process. They are reported
+as the change since the :class:`Metrics` were created, so that metrics
+collected for one command in a long-lived process, such as i2d, only count
+that command (and anything else the process did meanwhile).
+"""
+
+import bisect
+import json
+import threading
+
+from . import tls
+from ..helpers.timespec import timespecs
+
+DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0]
+
+PHASES = ['throttle', 'dns', 'connect', 'tls', 'response', 'decode',
+          'total']
+PREFIX = 'i2_'
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def cumulative(self):
+        """
+        :returns: A list of ``(upper bound, count)``, as Prometheus expects,
+            ending with the ``+Inf`` bucket.
+        """
+
+        total, result = 0, []
+
+        for bound, count in zip(self.buckets + ['+Inf'], self.counts):
+            total += count
+            result.append((bound, total))
+
+        return result
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': self.sum, 'max': self.max,
+                'buckets': [[bound, count]
+                            for bound, count in self.cumulative()]}
+
+
+def labels(**values):
+    return '{' + ','.join('{}="{}"'.format(key, str(value).replace('"', "'"))
+                          for key, value in sorted(values.items())) + '}'
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS, thread=None):
+        """
+        :param list buckets: Upper bounds of the histogram buckets, in
+            seconds.
+        :param threading.Thread thread: Only record requests made by, or on
+            behalf of, this thread (see
+            :func:`~icinga2client.api.hooks.origin`), rather than every
+            request the client makes.
+        """
+
+        self.buckets = buckets
+        self.thread = thread
+        self.histograms = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.baseline = dict(self.process_counters())
+
+    def install(self, client):
+        """
+        Start collecting metrics for a client's requests.
+
+        :returns: The metrics, so that calls can be chained.
+        """
+
+        client.hooks.after(self.record_request)
+        client.hooks.decoded(self.record_decode)
+
+        return self
+
+    def uninstall(self, client):
+        """
+        Stop collecting metrics for a client's requests.
+        """
+
+        client.hooks.remove(self.record_request)
+        client.hooks.remove(self.record_decode)
+
+    def observe(self, name, value, **label_values):
+        key = (name, tuple(sorted(label_values.items())))
+
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(self.buckets)
+
+            self.histograms[key].observe(value)
+
+    def increment(self, name, amount=1, **label_values):
+        key = (name, tuple(sorted(label_values.items())))
+
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def recording(self, event):
+        return self.thread is None or event.thread is self.thread
+
+    def record_request(self, event):
+        if not self.recording(event):
+            return
+
+        for phase in PHASES:
+            # Decoding is recorded by record_decode, once it has happened
+            if phase != 'decode' and phase in event.timings:
+                self.observe('request_seconds', event.timings[phase],
+                             endpoint=event.endpoint, phase=phase)
+
+        status = str(event.status) if event.error is None \
+            else type(event.error).__name__
+
+        self.increment('requests_total', endpoint=event.endpoint,
+                       status=status)
+        self.increment('bytes_sent_total', event.bytes_sent,
+                       endpoint=event.endpoint)
+        self.increment('bytes_received_total', event.bytes_received,
+                       endpoint=event.endpoint)
+
+        if event.retry:
+            self.increment('retries_total', endpoint=event.endpoint)
+
+        if event.error is not None or event.status >= 400:
+            self.increment('errors_total', endpoint=event.endpoint)
+
+    def record_decode(self, event):
+        if not self.recording(event):
+            return
+
+        self.observe('request_seconds', event.timings['decode'],
+                     endpoint=event.endpoint, phase='decode')
+
+    @staticmethod
+    def process_counters():
+        """
+        :returns: The current values of the timespec and TLS counters kept
+            by the whole process.
+        """
+
+        timespec, handshakes = timespecs.stats, tls.stats()
+
+        return [
+            (('timespec_cache_hits_total', ()), timespec['hits']),
+            (('timespec_cache_misses_total', ()), timespec['misses']),
+            (('timespec_parses_total', ()), timespec['parses']),
+            (('timespec_parse_seconds_total', ()), timespec['parse_seconds']),
+            (('tls_handshakes_total', ()), handshakes['handshakes']),
+            (('tls_sessions_resumed_total', ()), handshakes['resumed']),
+        ]
+
+    def snapshot(self):
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+
+        return histograms, counters + [
+            (key, value - self.baseline.get(key, 0))
+            for key, value in self.process_counters()]
+
+    def prometheus(self):
+        """
+        :returns: All metrics in the Prometheus text exposition format.
+        """
+
+        histograms, counters = self.snapshot()
+        lines, typed = [], set()
+
+        for (name, label_items), histogram in histograms:
+            name = PREFIX + name
+
+            if name not in typed:
+                lines.append('# TYPE {} histogram'.format(name))
+                typed.add(name)
+
+            for bound, count in histogram.cumulative():
+                lines.append('{}_bucket{} {}'.format(
+                    name, labels(le=bound, **dict(label_items)), count))
+
+            lines.append('{}_sum{} {}'.format(
+                name, labels(**dict(label_items)), histogram.sum))
+            lines.append('{}_count{} {}'.format(
+                name, labels(**dict(label_items)), histogram.count))
+
+        for (name, label_items), value in counters:
+            name = PREFIX + name
+
+            if name not in typed:
+                lines.append('# TYPE {} counter'.format(name))
+                typed.add(name)
+
+            lines.append('{}{} {}'.format(
+                name, labels(**dict(label_items)) if label_items else '',
+                value))
+
+        return '\n'.join(lines) + '\n'
+
+    def json_lines(self):
+        """
+        Yield each metric as a line of JSON.
+        """
+
+        histograms, counters = self.snapshot()
+
+        for (name, label_items), histogram in histograms:
+            record = {'metric': PREFIX + name, 'type': 'histogram',
+                      'labels': dict(label_items)}
+            record.update(histogram.to_dict())
+            yield json.dumps(record, sort_keys=True)
+
+        for (name, label_items), value in counters:
+            yield json.dumps({'metric': PREFIX + name, 'type': 'counter',
+                              'labels': dict(label_items), 'value': value},
+                             sort_keys=True)
+
+    def write(self, fh, format='prometheus'):
+        """
+        :param fh: A writable text file.
+        :param str format: Either ``prometheus`` or ``json``.
+        """
+
+        if format == 'prometheus':
+            fh.write(self.prometheus())
+        elif format == 'json':
+            for line in self.json_lines():
+                fh.write(line + '\n')
+        else:
+            raise ValueError('Unknown metrics format: {}'.format(format))
+
+    def summary(self):
+        """
+        :returns: A table of request timings per endpoint, in milliseconds,
+            followed by request, timespec and TLS counters.
+        """
+
+        histograms, counters = self.snapshot()
+        rows = ['{:<36}{:<10}{:>7}{:>10}{:>10}'.format(
+            'endpoint', 'phase', 'count', 'mean ms', 'max ms')]
+
+        for (name, label_items), histogram in histograms:
+            label_values = dict(label_items)
+            rows.append('{:<36}{:<10}{:>7}{:>10.1f}{:>10.1f}'.format(
+                label_values.get('endpoint', ''), label_values.get('phase'),
+                histogram.count, histogram.mean * 1000, histogram.max * 1000))
+
+        rows.append('')
+
+        for (name, label_items), value in counters:
+            label = ' '.join('{}={}'.format(key, value)
+                             for key, value in label_items)
+            rows.append('{:<36}{:<28}{:>10}'.format(
+                name, label, round(value, 4)))
+
+        return '\n'.join(rows)
@@ -1,3 +1,185 @@
 from collections import namedtuple
 
+from ..helpers import serializer
+
 Comment = namedtuple('Comment', ['author', 'text'])
+
+Target = namedtuple('Target', ['type', 'host', 'service'])
+Target.__new__.__defaults__ = (None,)
+Target.name = property(
+    lambda self: self.host if self.service is None
+    else '{}!{}'.format(self.host, self.service)
+)
+
+TargetResult = namedtuple('TargetResult', ['target', 'code', 'status', 'name'])
+
+_missing = object()
+
+
+class Record:
+    """
+    A compact, read-only view of one API result.
+
+    Records hold the undecoded JSON text of the result, and only decode it
+    the first time one of their :py:attr:`fields` is accessed. Decoded
+    values are kept in slots rather than a per-instance ``__dict__``, and
+    fields which aren't declared are never kept at all.
+
+    ``fields`` maps each attribute name to its path within the result, for
+    example ``('state', ('attrs', 'state'))``.
+    """
+
+    __slots__ = ('_raw',)
+    fields = ()
+
+    def __init__(self, raw):
+        """
+        :param raw: The result, as JSON text or an already decoded dict.
+        """
+
+        self._raw = raw
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        :returns: A list of records, one for each element of the ``results``
+            of a decoded API response.
+        """
+
+        return [cls(result) for result in response.get('results', [])]
+
+    def _data(self):
+        raw = self._raw
+
+        return serializer.loads(raw) if isinstance(raw, (bytes, str)) \
+            else raw
+
+    def _decode(self):
+        data = self._data()
+
+        for name, path in self.fields:
+            value = data
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+
+            object.__setattr__(self, name, value)
+
+    def __getattr__(self, name):
+        # Only called when a slot hasn't been filled yet
+        if any(name == field for field, _ in self.fields):
+            self._decode()
+            return object.__getattribute__(self, name)
+
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        if name != '_raw':
+            raise AttributeError('{} is read-only'.format(type(self).__name__))
+
+        object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._data() == other._data()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        values = ', '.join('{}={!r}'.format(name, getattr(self, name))
+                           for name, _ in self.fields[:2])
+        return '<{} {}>'.format(type(self).__name__, values)
+
+    def to_dict(self):
+        """
+        :returns: The complete, decoded result.
+        """
+
+        return self._data()
+
+
+class ActionResult(Record):
+    """
+    The result of an action for one object.
+    """
+
+    __slots__ = ('code', 'status', 'name', 'legacy_id')
+    fields = (
+        ('code', ('code',)),
+        ('status', ('status',)),
+        ('name', ('name',)),
+        ('legacy_id', ('legacy_id',)),
+    )
+
+
+class ApiObject(Record):
+    """
+    A config object returned by an object query. :py:attr:`attrs` and
+    :py:attr:`joins` decode the full attribute sets on every access;
+    subclasses declare the attributes worth keeping as fields.
+    """
+
+    __slots__ = ('type', 'name')
+    fields = (
+        ('type', ('type',)),
+        ('name', ('name',)),
+    )
+
+    @property
+    def attrs(self):
+        return self._data().get('attrs') or {}
+
+    @property
+    def joins(self):
+        return self._data().get('joins') or {}
+
+
+class HostRecord(ApiObject):
+    __slots__ = ('display_name', 'address', 'state', 'state_type', 'groups',
+                 'acknowledgement', 'downtime_depth', 'last_state_change')
+    fields = ApiObject.fields + tuple(
+        (name, ('attrs', name)) for name in __slots__
+    )
+
+
+class ServiceRecord(ApiObject):
+    __slots__ = ('host_name', 'display_name', 'state', 'state_type',
+                 'groups', 'acknowledgement', 'downtime_depth',
+                 'last_state_change')
+    fields = ApiObject.fields + tuple(
+        (name, ('attrs', name)) for name in __slots__
+    )
+
+
+class DowntimeRecord(ApiObject):
+    __slots__ = ('host_name', 'service_name', 'author', 'comment',
+                 'start_time', 'end_time', 'duration', 'fixed',
+                 'triggered_by')
+    fields = ApiObject.fields + tuple(
+        (name, ('attrs', name)) for name in __slots__
+    )
+
+
+class CommentRecord(ApiObject):
+    __slots__ = ('host_name', 'service_name', 'author', 'text', 'entry_type',
+                 'entry_time', 'expire_time')
+    fields = ApiObject.fields + tuple(
+        (name, ('attrs', name)) for name in __slots__
+    )
+
+
+RECORD_TYPES = {
+    'Host': HostRecord,
+    'Service': ServiceRecord,
+    'Downtime': DowntimeRecord,
+    'Comment': CommentRecord,
+}
+
+
+def record_type(object_type):
+    """
+    :returns: The :class:`ApiObject` subclass for an object type.
+    """
+
+    return RECORD_TYPES.get(object_type.title(), ApiObject)
@@ -0,0 +1,190 @@
+"""
+A client for an icinga2 HA zone, spreading requests over several API
+endpoints and failing over between them.
+
+Queries are spread round-robin across healthy endpoints. Actions go to the
+healthy endpoint which has been responding fastest. An endpoint is marked
+unhealthy as soon as a request to it fails to connect, and optionally
+checked in the background until it recovers::
+
+    client = MultiEndpointClient(['https://master1:5665',
+                                  'https://master2:5665'])
+    client.start_health_checks(interval=10)
+"""
+
+import itertools
+import logging
+import threading
+import time
+
+import requests as requests_lib
+
+from .base import ApiClient
+from .policy import not_sent
+
+log = logging.getLogger(__name__)
+
+
+class Endpoint:
+    def __init__(self, uri, smoothing=0.3):
+        self.uri = uri
+        self.healthy = True
+        self.latency = None
+        self.failures = 0
+        self.smoothing = smoothing
+
+    def succeeded(self, latency):
+        self.healthy = True
+        self.failures = 0
+
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+
+    def failed(self):
+        self.healthy = False
+        self.failures += 1
+
+    def __repr__(self):
+        return '<Endpoint {} {}>'.format(
+            self.uri, 'healthy' if self.healthy else 'unhealthy')
+
+
+class MultiEndpointClient(ApiClient):
+    health_check_command = ''
+
+    def __init__(self, base_uris, verify=True, pool_size=None, policy=None,
+                 query_cache=None):
+        """
+        :param list base_uris: URIs of the icinga2 api on each endpoint.
+            Typically https://some-address:5665
+
+        See :class:`ApiClient` for the remaining parameters.
+        """
+
+        if not base_uris:
+            raise ValueError('at least one endpoint is required')
+
+        super(MultiEndpointClient, self).__init__(
+            base_uris[0], verify=verify, pool_size=pool_size, policy=policy,
+            query_cache=query_cache)
+
+        self.endpoints = [Endpoint(uri) for uri in base_uris]
+        self.pool_connections = len(self.endpoints)
+        self._round_robin = itertools.count()
+        self._checker = None
+        self._stopping = threading.Event()
+
+    def candidates(self, method, command, headers=None):
+        """
+        :returns: The endpoints to try for a request, in order of preference.
+            Unhealthy endpoints are only tried as a last resort.
+        """
+
+        healthy = [e for e in self.endpoints if e.healthy]
+        unhealthy = [e for e in self.endpoints if not e.healthy]
+
+        if self.policy.idempotent(method, command, headers) and healthy:
+            offset = next(self._round_robin) % len(healthy)
+            healthy = healthy[offset:] + healthy[:offset]
+        else:
+            healthy.sort(key=lambda e: e.latency if e.latency is not None
+                         else 0)
+
+        unhealthy.sort(key=lambda e: e.failures)
+
+        return healthy + unhealthy
+
+    def send(self, method, command, data=None, headers={}, stream=False,
+             **kwargs):
+        """
+        Send a request to the preferred endpoint, failing over to the others
+        if it can't be reached. Requests which aren't idempotent only fail
+        over when they cannot have reached the failed endpoint.
+
+        Failing over happens at the first connection error or timeout; the
+        policy's retries, and their backoff, only apply to the last endpoint
+        tried.
+        """
+
+        idempotent = self.policy.idempotent(method, command, headers)
+        candidates = self.candidates(method, command, headers)
+        error = None
+
+        for position, endpoint in enumerate(candidates, 1):
+            kwargs['base_uri'] = endpoint.uri
+            kwargs['failover'] = position < len(candidates)
+            started = time.time()
+
+            try:
+                response = super(MultiEndpointClient, self).send(
+                    method, command, data, headers, stream=stream, **kwargs)
+
+            except (requests_lib.ConnectionError,
+                    requests_lib.Timeout) as e:
+                log.warning('Endpoint %s failed: %s', endpoint.uri, e)
+                endpoint.failed()
+
+                if not (idempotent or not_sent(e)):
+                    raise
+
+                error = e
+                continue
+
+            endpoint.succeeded(time.time() - started)
+            return response
+
+        raise error
+
+    def check(self, endpoint, timeout=5):
+        """
+        Check whether an endpoint is responding, updating its health.
+        """
+
+        params = dict(self.request_parameters)
+        params['timeout'] = timeout
+        started = time.time()
+
+        try:
+            response = self.session.get(
+                self.url(self.health_check_command, endpoint.uri), **params)
+            response.close()
+
+        except requests_lib.RequestException as e:
+            log.debug('Health check of %s failed: %s', endpoint.uri, e)
+            endpoint.failed()
+            return False
+
+        if response.status_code >= 500:
+            endpoint.failed()
+            return False
+
+        endpoint.succeeded(time.time() - started)
+        return True
+
+    def start_health_checks(self, interval=10.0, timeout=5):
+        """
+        Check every endpoint every ``interval`` seconds, in a background
+        thread, until the client is closed.
+        """
+
+        if self._checker is not None:
+            return
+
+        def run():
+            while not self._stopping.wait(interval):
+                for endpoint in self.endpoints:
+                    self.check(endpoint, timeout)
+
+        self._stopping.clear()
+        self._checker = threading.Thread(target=run)
+        self._checker.daemon = True
+        self._checker.start()
+
+    def close(self):
+        if self._checker is not None:
+            self._stopping.set()
+            self._checker = None
+
+        super(MultiEndpointClient, self).close()
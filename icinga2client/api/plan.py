@@ -0,0 +1,100 @@
+"""
+Preview how many objects an action would affect, without performing it.
+
+Filters are evaluated locally against the :class:`~.cache.ObjectIndex` of an
+:class:`~.cache.ObjectCache` while it is fresh, which takes milliseconds and
+costs the API nothing. Otherwise the API is asked for just the names of the
+matching objects::
+
+    planner = Planner(ObjectCache(client, snapshot_path='~/.cache/i2.json'))
+    plan = planner.plan('Service', f.hostgroup('webservers'))
+
+    print(plan.count, plan.sample)
+"""
+
+import time
+from collections import namedtuple
+
+from . import filters as f
+
+SAMPLE_SIZE = 5
+
+
+class Plan(namedtuple('Plan', ['object_type', 'filter', 'count', 'sample',
+                               'source', 'age', 'seconds'])):
+    """
+    The objects of one type matched by one filter.
+
+    ``source`` is ``index`` if the filter was evaluated locally, in which
+    case ``age`` is the age of the index in seconds, or ``query`` if the API
+    was asked.
+    """
+
+    __slots__ = ()
+
+    def to_dict(self):
+        result = self._asdict()
+        result['filter'] = str(self.filter)
+        return result
+
+
+class Planner:
+    def __init__(self, cache, build_index=False, sample_size=SAMPLE_SIZE):
+        """
+        :param ObjectCache cache: The cache holding the object index.
+        :param bool build_index: Whether to (re)build the index when it is
+            missing or stale. Fetching every host and service only pays off
+            if the cache outlives the command, such as in the daemon or with
+            a snapshot file.
+        :param int sample_size: Number of object names to include.
+        """
+
+        self.cache = cache
+        self.build_index = build_index
+        self.sample_size = sample_size
+
+    def plan(self, object_type, object_filter):
+        """
+        :param str object_type: ``Host``, ``Service``, ``Downtime``, etc.
+        :param object_filter: The filter the action would be performed with.
+        :rtype: Plan
+        """
+
+        object_type = object_type.title()
+        started = time.time()
+        index = self.cache.index(refresh=self.build_index) \
+            if object_type in ('Host', 'Service') else None
+
+        if index is not None:
+            try:
+                matched = index.select(object_type, object_filter)
+
+            except (LookupError, ValueError):
+                pass
+
+            else:
+                names = sorted(attrs['__name'] for attrs in matched)
+
+                return Plan(object_type, object_filter, len(names),
+                            names[:self.sample_size], 'index',
+                            max(started - index.fetched, 0),
+                            time.time() - started)
+
+        count, sample = 0, []
+        for record in self.cache.client.query_objects(
+                object_type, object_filter, attrs=['name']):
+            count += 1
+            if len(sample) < self.sample_size:
+                sample.append(record.name)
+
+        return Plan(object_type, object_filter, count, sorted(sample),
+                    'query', None, time.time() - started)
+
+    def plan_all(self, requests):
+        """
+        :param requests: ``(object_type, object_filter)`` tuples.
+        :returns: A list of :class:`Plan`.
+        """
+
+        return [self.plan(object_type, f.as_expression(object_filter))
+                for object_type, object_filter in requests]
@@ -0,0 +1,184 @@
+"""
+Controls how hard a client may push the API: rate limits, retries, timeouts
+and adaptive concurrency.
+
+A policy is usually built from the user's configuration file, where any of
+the following keys may be set::
+
+    {
+        "rate_limit": 20,
+        "rate_limits": {"actions/schedule-downtime": 5},
+        "retries": 3,
+        "retry_backoff": 0.5,
+        "retry_max_backoff": 30,
+        "timeout": 30,
+        "max_concurrency": 16,
+        "target_latency": 1.0
+    }
+
+``rate_limit`` applies to all requests, whereas ``rate_limits`` apply to
+individual endpoints, matched by prefix. ``max_concurrency`` enables the
+adaptive concurrency limit, which backs off while latency exceeds
+``target_latency`` seconds.
+"""
+
+import contextlib
+
+import requests as requests_lib
+
+from ..helpers.throttle import AdaptiveLimiter, TokenBucket, backoff
+
+# Actions which have the same effect however many times they are applied.
+# Other actions (such as scheduling a downtime) could be applied twice if a
+# request is retried after the server received it.
+IDEMPOTENT_ACTIONS = [
+    'actions/remove-downtime',
+    'actions/remove-acknowledgement',
+    'actions/remove-comment',
+]
+
+# Status codes which indicate that the server did not act on the request
+RETRY_ALWAYS = [429, 503]
+
+
+class RequestPolicy:
+    def __init__(self, rate_limit=None, rate_limits=None, burst=None,
+                 retries=2, retry_backoff=0.5, retry_max_backoff=30.0,
+                 timeout=None, max_concurrency=None, target_latency=1.0):
+        """
+        :param float rate_limit: Requests per second across all endpoints.
+        :param dict rate_limits: Requests per second for individual endpoints,
+            keyed by command prefix, such as ``actions/schedule-downtime``.
+        :param int burst: Requests which may be made at once before rate
+            limits apply.
+        :param int retries: Maximum number of retries per request.
+        :param float retry_backoff: Initial delay between retries, in
+            seconds. Delays double (with jitter) after each retry.
+        :param float retry_max_backoff: Maximum delay between retries.
+        :param float timeout: Seconds to wait for the server to respond.
+        :param int max_concurrency: Enables an adaptive limit on requests in
+            flight, which never exceeds this number.
+        :param float target_latency: Latency, in seconds, above which the
+            adaptive concurrency limit shrinks.
+        """
+
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.retry_max_backoff = retry_max_backoff
+        self.timeout = timeout
+
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.buckets = sorted(
+            ((prefix.strip('/'), TokenBucket(rate, burst))
+             for prefix, rate in (rate_limits or {}).items()),
+            key=lambda item: -len(item[0])
+        )
+        self.limiter = AdaptiveLimiter(max_concurrency,
+                                       target_latency=target_latency) \
+            if max_concurrency else None
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build a policy from the keys of a :class:`Config`. Unset keys take
+        their default values.
+        """
+
+        keys = ['rate_limit', 'rate_limits', 'burst', 'retries',
+                'retry_backoff', 'retry_max_backoff', 'timeout',
+                'max_concurrency', 'target_latency']
+
+        return cls(**dict((key, config.get(key)) for key in keys
+                          if config.get(key) is not None))
+
+    def throttle(self, command):
+        """
+        Block until the rate limits allow a request to ``command``.
+        """
+
+        command = command.strip('/')
+
+        for prefix, bucket in self.buckets:
+            if command.startswith(prefix):
+                bucket.acquire()
+                break
+
+        if self.bucket:
+            self.bucket.acquire()
+
+    @contextlib.contextmanager
+    def slot(self):
+        """
+        Hold one slot of the adaptive concurrency limit for the duration of
+        a request.
+        """
+
+        if self.limiter is None:
+            yield
+            return
+
+        started = self.limiter.acquire()
+
+        try:
+            yield
+        finally:
+            self.limiter.release(started)
+
+    def delays(self):
+        return backoff(self.retry_backoff, self.retry_max_backoff)
+
+    @staticmethod
+    def idempotent(method, command, headers=None):
+        override = (headers or {}).get('X-HTTP-Method-Override', '')
+
+        return method.lower() == 'get' or override.lower() == 'get' or \
+            command.strip('/') in IDEMPOTENT_ACTIONS
+
+    def should_retry(self, attempt, method, command, headers=None,
+                     status=None, error=None):
+        """
+        Decide whether a failed request should be retried.
+
+        Requests are retried at most :py:attr:`retries` times. Idempotent
+        requests are retried after any connection error or 5xx response.
+        Other requests are only retried when the server cannot have acted on
+        them: the connection couldn't be established, or it responded with
+        429 or 503. TLS errors, such as a certificate which fails to verify,
+        are never retried, as retrying won't change the outcome.
+        """
+
+        if attempt >= self.retries:
+            return False
+
+        # A subclass of ConnectionError, so checked first
+        if isinstance(error, requests_lib.exceptions.SSLError):
+            return False
+
+        if status in RETRY_ALWAYS:
+            return True
+
+        if error is not None and not_sent(error):
+            return True
+
+        if not self.idempotent(method, command, headers):
+            return False
+
+        return error is not None or (status is not None and status >= 500)
+
+
+def not_sent(error):
+    """
+    Whether a :mod:`requests` exception shows that the request never
+    reached the server.
+    """
+
+    if isinstance(error, requests_lib.ConnectTimeout):
+        return True
+
+    if isinstance(error, requests_lib.ConnectionError):
+        reason = getattr(error.args[0], 'reason', None) if error.args \
+            else None
+        return type(reason).__name__ in ('NewConnectionError',
+                                         'ConnectTimeoutError')
+
+    return False
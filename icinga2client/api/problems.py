@@ -0,0 +1,303 @@
+"""
+A local index of service problems, to answer questions like "which critical
+services in this hostgroup are unacknowledged?" in milliseconds rather than
+with a scan of every service::
+
+    index = ProblemIndex.build(client)
+    problems = index.select(states=[2], hostgroup='webservers',
+                            acknowledged=False)
+
+The index is built from a single streamed ``objects/services`` query for
+services not in an OK state, joined with the state and groups of their hosts.
+Problems are indexed by state, host, hostgroup, servicegroup and whether they
+are acknowledged. :py:meth:`ProblemIndex.apply_event` keeps the index current
+from the event stream; :py:meth:`ObjectCache.follow` does so in the
+background for the index returned by :py:meth:`ObjectCache.problems`.
+"""
+
+import threading
+import time
+
+from . import filters as f
+
+STATES = {'ok': 0, 'warning': 1, 'critical': 2, 'unknown': 3}
+STATE_NAMES = dict((value, name) for name, value in STATES.items())
+
+SERVICE_ATTRS = ['__name', 'name', 'host_name', 'groups', 'state',
+                 'acknowledgement', 'downtime_depth', 'last_state_change']
+HOST_JOINS = ['host.state', 'host.groups', 'host.downtime_depth']
+
+PROBLEM_FILTER = f.attr('service.state').not_equals(0)
+
+
+def fetch(client, object_filter=None):
+    """
+    Query the service problems matching a filter.
+
+    :returns: An iterator of problem dicts, as held by :class:`ProblemIndex`.
+    """
+
+    if object_filter is not None:
+        object_filter = f.as_expression(object_filter) & PROBLEM_FILTER
+    else:
+        object_filter = PROBLEM_FILTER
+
+    for record in client.query_objects('Service', object_filter,
+                                       attrs=SERVICE_ATTRS, joins=HOST_JOINS):
+        attrs = record.attrs
+        host = record.joins.get('host') or {}
+
+        yield {
+            'name': attrs['__name'],
+            'host': attrs['host_name'],
+            'service': attrs['name'],
+            'state': int(attrs['state']),
+            'acknowledged': bool(attrs.get('acknowledgement')),
+            'downtime': bool(attrs.get('downtime_depth') or
+                             host.get('downtime_depth')),
+            'since': attrs.get('last_state_change'),
+            'groups': attrs.get('groups') or [],
+            'host_state': int(host.get('state') or 0),
+            'hostgroups': host.get('groups') or [],
+        }
+
+
+def event_state(event):
+    """
+    The state an event reports, or ``None`` if it doesn't report one.
+    """
+
+    if event.get('state') is not None:
+        return int(event['state'])
+
+    check_result = event.get('check_result') or {}
+    if check_result.get('state') is not None:
+        return int(check_result['state'])
+
+    return None
+
+
+def downtime_targets(event):
+    """
+    The ``(host, service)`` pairs a downtime event affects.
+    """
+
+    from .cleanup import downtime_target
+
+    downtime = event.get('downtime')
+    if downtime and downtime.get('host_name'):
+        yield downtime['host_name'], downtime.get('service_name') or None
+
+    for name in event.get('names') or []:
+        target = downtime_target(name)
+        yield target.host, target.service
+
+
+class ProblemIndex:
+    def __init__(self, client, problems, fetched):
+        """
+        :param ApiClient client: Used to fetch problems the event stream
+            doesn't describe fully.
+        :param problems: Problem dicts, as returned by :func:`fetch`.
+        :param float fetched: When the problems were fetched.
+        """
+
+        self.client = client
+        self.fetched = fetched
+        self.lock = threading.RLock()
+
+        self.problems = {}
+        self.by_state = {}
+        self.by_host = {}
+        self.by_hostgroup = {}
+        self.by_servicegroup = {}
+        self.by_acknowledged = {}
+
+        for problem in problems:
+            self.add(problem)
+
+    def __len__(self):
+        return len(self.problems)
+
+    @classmethod
+    def build(cls, client):
+        """
+        Fetch every service problem and index it.
+        """
+
+        fetched = time.time()
+        return cls(client, fetch(client), fetched)
+
+    @classmethod
+    def from_data(cls, client, data):
+        """
+        Restore an index saved with :py:meth:`to_data`.
+        """
+
+        return cls(client, data['problems'], data['fetched'])
+
+    def to_data(self):
+        with self.lock:
+            return {'fetched': self.fetched,
+                    'problems': [dict(problem)
+                                 for problem in self.problems.values()]}
+
+    def indexes(self, problem):
+        """
+        The index entries of a problem, as ``(index, key)`` pairs.
+        """
+
+        yield self.by_state, problem['state']
+        yield self.by_host, problem['host']
+        yield self.by_acknowledged, problem['acknowledged']
+
+        for group in problem['hostgroups']:
+            yield self.by_hostgroup, group
+
+        for group in problem['groups']:
+            yield self.by_servicegroup, group
+
+    def add(self, problem):
+        with self.lock:
+            self.remove(problem['name'])
+            self.problems[problem['name']] = problem
+
+            for index, key in self.indexes(problem):
+                index.setdefault(key, set()).add(problem['name'])
+
+    def remove(self, name):
+        with self.lock:
+            problem = self.problems.pop(name, None)
+            if problem is None:
+                return
+
+            for index, key in self.indexes(problem):
+                names = index.get(key)
+                names.discard(name)
+
+                if not names:
+                    del index[key]
+
+    def update(self, name, **changes):
+        """
+        Change the attributes of a known problem, reindexing it.
+        """
+
+        with self.lock:
+            problem = self.problems.get(name)
+
+            if problem is not None:
+                problem = dict(problem, **changes)
+                self.add(problem)
+
+    def refresh(self, host, service=None):
+        """
+        Fetch the problems of a host, or one service, replacing those held.
+        """
+
+        object_filter = f.service(host, service) if service \
+            else f.host(host)
+        problems = list(fetch(self.client, object_filter))
+
+        with self.lock:
+            if service:
+                self.remove('{}!{}'.format(host, service))
+            else:
+                for name in list(self.by_host.get(host, ())):
+                    self.remove(name)
+
+            for problem in problems:
+                self.add(problem)
+
+    def apply_event(self, event):
+        """
+        Update the index from an event stream event. State changes,
+        acknowledgements and host state are applied directly; problems the
+        index doesn't hold yet and downtime changes are fetched.
+        """
+
+        event_type = event.get('type') or ''
+
+        if event_type.startswith('Downtime'):
+            for host, service in set(downtime_targets(event)):
+                self.refresh(host, service)
+            return
+
+        host, service = event.get('host'), event.get('service')
+        if not host:
+            return
+
+        if not service:
+            # Check results of hosts don't report the host state directly
+            state = event_state(event)
+            if event_type == 'StateChange' and state is not None:
+                with self.lock:
+                    for name in list(self.by_host.get(host, ())):
+                        self.update(name, host_state=state)
+            return
+
+        name = '{}!{}'.format(host, service)
+
+        if event_type in ('CheckResult', 'StateChange'):
+            state = event_state(event)
+
+            if state is None:
+                return
+            elif state == 0:
+                self.remove(name)
+            elif name in self.problems:
+                self.update(name, state=state)
+            else:
+                self.refresh(host, service)
+
+        elif event_type == 'AcknowledgementSet':
+            self.update(name, acknowledged=True)
+
+        elif event_type == 'AcknowledgementCleared':
+            self.update(name, acknowledged=False)
+
+    def select(self, states=None, host=None, hostgroup=None,
+               servicegroup=None, acknowledged=None, unhandled=False):
+        """
+        :param list states: Only problems in one of these states (``1``
+            warning, ``2`` critical, ``3`` unknown).
+        :param str host: Only problems on this host.
+        :param str hostgroup: Only problems on hosts in this group.
+        :param str servicegroup: Only problems of services in this group.
+        :param bool acknowledged: Only acknowledged, or unacknowledged,
+            problems.
+        :param bool unhandled: Leave out problems which are acknowledged, in
+            downtime (or on a host in downtime), or on a host which is
+            down.
+        :returns: Copies of the matching problem dicts, ordered by name.
+        """
+
+        with self.lock:
+            candidates = []
+
+            if states:
+                candidates.append(set().union(*[
+                    self.by_state.get(state, ()) for state in states]))
+
+            for index, key in ((self.by_host, host),
+                               (self.by_hostgroup, hostgroup),
+                               (self.by_servicegroup, servicegroup),
+                               (self.by_acknowledged, acknowledged)):
+                if key is not None:
+                    candidates.append(index.get(key, set()))
+
+            if candidates:
+                candidates.sort(key=len)
+                names = candidates[0].intersection(*candidates[1:])
+            else:
+                names = self.problems
+
+            problems = [dict(self.problems[name]) for name in sorted(names)]
+
+        if unhandled:
+            problems = [problem for problem in problems
+                        if not (problem['acknowledged'] or
+                                problem['downtime'] or
+                                problem['host_state'])]
+
+        return problems
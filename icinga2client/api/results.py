@@ -0,0 +1,76 @@
+import itertools
+from collections import Counter
+
+from .models import ActionResult
+
+
+class ResultAggregator:
+    """
+    Collects the results of several API responses, such as the Host and
+    Service halves of a downtime with ``--all-services``.
+
+    Adding a response stores a reference to its ``results`` list rather than
+    copying or merging it, so the cost of combining responses doesn't grow
+    with the number already collected::
+
+        results = ResultAggregator()
+        results.add(client.schedule_downtime('Host', ...))
+        results.add(client.schedule_downtime('Service', ...))
+
+        for result in results.records():
+            print(result.name)
+    """
+
+    def __init__(self, responses=()):
+        self.chunks = []
+        self.counts = Counter()
+        self.total = 0
+
+        for response in responses:
+            self.add(response)
+
+    def add(self, response):
+        """
+        :param dict response: A decoded API response.
+        :returns: The aggregator, so that calls can be chained.
+        """
+
+        results = response.get('results') or []
+
+        self.chunks.append(results)
+        self.total += len(results)
+        self.counts.update(int(result.get('code', 0)) for result in results)
+
+        return self
+
+    def __len__(self):
+        return self.total
+
+    def __iter__(self):
+        """
+        Iterate over the raw result dicts, in the order they were added.
+        """
+
+        return itertools.chain.from_iterable(self.chunks)
+
+    def records(self):
+        """
+        Iterate over the results as :class:`ActionResult` records.
+        """
+
+        return (ActionResult(result) for result in self)
+
+    @property
+    def ok(self):
+        """
+        Whether every result has a successful (2xx) status code.
+        """
+
+        return all(200 <= code < 300 for code in self.counts)
+
+    def as_response(self):
+        """
+        :returns: The combined results, in the shape of a single response.
+        """
+
+        return {'results': list(self)}
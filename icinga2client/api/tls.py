@@ -0,0 +1,289 @@
+"""
+TLS contexts shared by every client in the process.
+
+Building an :class:`ssl.SSLContext` means reading and parsing the trusted CA
+certificates, and the client certificate and key if any, so it is done once
+per distinct configuration and the context reused by every connection. The
+context also remembers the TLS session negotiated with each server, so
+reconnecting to the same endpoint resumes the session instead of repeating
+the full handshake (and, for client certificates, the signature it
+involves).
+
+Connections opened by :class:`TLSAdapter` time how long resolving the host
+name, connecting and the TLS handshake take. The timings are added to the
+``timings`` of the request which opened the connection (see
+:func:`recording`).
+"""
+
+import socket
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+try:
+    from urllib3.util.connection import allowed_gai_family
+except ImportError:
+    def allowed_gai_family():
+        return socket.AF_UNSPEC
+
+# The phases of opening a connection, in the order they happen
+CONNECTION_PHASES = ['dns', 'connect', 'tls']
+
+_contexts = {}
+_lock = threading.Lock()
+_recording = threading.local()
+
+
+class ResumingContext(ssl.SSLContext):
+    """
+    An :class:`ssl.SSLContext` which offers the last session negotiated with
+    a server when connecting to it again.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.sessions = {}
+        self.stats = {'handshakes': 0, 'resumed': 0}
+
+    def wrap_socket(self, sock, server_side=False, server_hostname=None,
+                    session=None, **kwargs):
+        if session is None and not server_side:
+            session = self.sessions.get(server_hostname)
+
+        wrapped = super(ResumingContext, self).wrap_socket(
+            sock, server_side=server_side, server_hostname=server_hostname,
+            session=session, **kwargs)
+
+        # Approximate counters, updated without locking
+        self.stats['handshakes'] += 1
+        if wrapped.session_reused:
+            self.stats['resumed'] += 1
+
+        return wrapped
+
+    def remember(self, sock):
+        """
+        Keep a connection's session to offer when next connecting to its
+        server. With TLS 1.3 the session ticket arrives after the handshake,
+        so this is called once a response has been read.
+        """
+
+        try:
+            session = sock.session
+        except (AttributeError, ValueError, ssl.SSLError):
+            return
+
+        if session is not None and sock.server_hostname:
+            self.sessions[sock.server_hostname] = session
+
+
+def tls_context(verify=True, cert=None):
+    """
+    :param verify: Whether to verify the server's certificate, or the path of
+        a CA bundle to verify it against. The system trust store is used
+        if ``True``.
+    :param cert: A client certificate, as the path of a file holding both
+        the certificate and its key, or a ``(cert, key)`` tuple.
+    :returns: The shared :class:`ResumingContext` for these options.
+    """
+
+    if isinstance(cert, list):
+        cert = tuple(cert)
+
+    key = (verify, cert)
+
+    with _lock:
+        context = _contexts.get(key)
+
+        if context is None:
+            context = _contexts[key] = build_context(verify, cert)
+
+    return context
+
+
+def build_context(verify, cert):
+    context = ResumingContext(ssl.PROTOCOL_TLS_CLIENT)
+
+    if verify is False:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    elif verify is True:
+        context.load_default_certs()
+    else:
+        context.load_verify_locations(verify)
+
+    if isinstance(cert, tuple):
+        context.load_cert_chain(*cert)
+    elif cert:
+        context.load_cert_chain(cert)
+
+    return context
+
+
+def stats():
+    """
+    :returns: Handshakes and resumed sessions, across every shared context.
+    """
+
+    totals = {'handshakes': 0, 'resumed': 0}
+
+    with _lock:
+        for context in _contexts.values():
+            for name, value in context.stats.items():
+                totals[name] += value
+
+    return totals
+
+
+@contextmanager
+def recording(timings):
+    """
+    Add the timings of any connection opened by this thread to ``timings``
+    until the block exits. Requests are sent on the thread which makes them,
+    so this attributes connection phases to the request which needed them.
+
+    :param dict timings: Phase durations in seconds, by phase name.
+    """
+
+    _recording.timings = timings
+
+    try:
+        yield timings
+    finally:
+        _recording.timings = None
+
+
+def record(phase, seconds):
+    timings = getattr(_recording, 'timings', None)
+
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+class TimedConnection:
+    """
+    Resolves the host name itself, so that resolution and connecting are
+    timed apart, then connects to each address in turn as urllib3 would.
+
+    This overrides ``_new_conn``, which is private to urllib3 (1.26 and 2.x
+    alike). Connections from a urllib3 without it work as usual, untimed.
+    """
+
+    opened = 0.0
+
+    def _new_conn(self):
+        host = getattr(self, '_dns_host', None)
+        if host is None:
+            return super(TimedConnection, self)._new_conn()
+
+        started = time.time()
+
+        try:
+            addresses = socket.getaddrinfo(host, self.port,
+                                           allowed_gai_family(),
+                                           socket.SOCK_STREAM)
+        except socket.gaierror:
+            # Let urllib3 report the failure
+            return super(TimedConnection, self)._new_conn()
+
+        resolved = time.time()
+        record('dns', resolved - started)
+
+        error = None
+
+        try:
+            for address in addresses:
+                self._dns_host = address[4][0]
+
+                try:
+                    sock = super(TimedConnection, self)._new_conn()
+                    break
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    error = e
+            else:
+                raise error
+
+        finally:
+            self._dns_host = host
+            record('connect', time.time() - resolved)
+            self.opened = time.time() - started
+
+        return sock
+
+
+class TimedHTTPConnection(TimedConnection, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnection, HTTPSConnection):
+    def connect(self):
+        started = time.time()
+        self.opened = 0.0
+
+        try:
+            super(TimedHTTPSConnection, self).connect()
+        finally:
+            record('tls', time.time() - started - self.opened)
+
+    def getresponse(self, *args, **kwargs):
+        response = super(TimedHTTPSConnection, self).getresponse(
+            *args, **kwargs)
+
+        # Any session ticket was read along with the response
+        context = getattr(self.sock, 'context', None)
+        if isinstance(context, ResumingContext):
+            context.remember(self.sock)
+
+        return response
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TLSAdapter(HTTPAdapter):
+    """
+    An :class:`~requests.adapters.HTTPAdapter` whose connections use a
+    shared TLS context. requests would otherwise load the CA bundle and
+    client certificate into the context again for every new connection.
+    Connections are opened by :class:`TimedConnection`.
+    """
+
+    def __init__(self, context, **kwargs):
+        self.context = context
+        super(TLSAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['ssl_context'] = self.context
+        super(TLSAdapter, self).init_poolmanager(*args, **kwargs)
+
+        # Otherwise connections are opened as usual, and untimed
+        if hasattr(self.poolmanager, 'pool_classes_by_scheme'):
+            self.poolmanager.pool_classes_by_scheme = {
+                'http': TimedHTTPConnectionPool,
+                'https': TimedHTTPSConnectionPool,
+            }
+
+    def build_connection_pool_key_attributes(self, request, verify,
+                                             cert=None):
+        # Only called by requests 2.32 and later, where it replaces the
+        # trust store and client certificate the context already holds.
+        # Earlier versions rely on cert_verify alone.
+        return super(TLSAdapter, self).build_connection_pool_key_attributes(
+            request, verify is not False, None)
+
+    def cert_verify(self, conn, url, verify, cert):
+        if url.lower().startswith('https'):
+            conn.cert_reqs = 'CERT_NONE' if verify is False \
+                else 'CERT_REQUIRED'
+            conn.ca_certs = None
+            conn.ca_cert_dir = None
@@ -4,21 +4,25 @@ icinga2 command-line interface
 ::
 
   Usage:
-    i2 [--version] [--help] [--porcelain] <command> [<arguments>...]
+    i2 [--version] [--help] [--porcelain] [--stats] <command> [<arguments>...]
 
   Options:
     --porcelain -p      Produce machine-readable output
+    --stats             Print request timings to stderr after the command
 
   Commands:
     configure           Interactively prompt for configuration options
     acknowledge         Acknowledge/unacknowledge host and service problems
     downtime            Schedule and remove downtime for various config objects
+    events              Follow the API event stream
+    problems            List service problems, for piping into other commands
 """
 
 from docopt import docopt, DocoptExit
 import importlib
+import os
+import sys
 
-from ..api import ApiClient, Comment
 from ..version import project, version
 from ..config import Config
 from ..helpers.data import parse_docstring
@@ -27,28 +31,197 @@ doc = parse_docstring(__doc__)
 
 version_string = ' '.join([project, version])
 
-COMMANDS = ['configure', 'downtime', 'acknowledge']
+COMMANDS = ['configure', 'downtime', 'acknowledge', 'events', 'problems']
 COMMANDS_NO_CONFIG = ['configure']
+COMMANDS_FORWARDABLE = ['downtime', 'acknowledge', 'problems']
 
 
-def main():
-    arguments = docopt(doc, version=version_string, options_first=True)
+class DeferredClient:
+    """
+    Stands in for an :class:`ApiClient`, which is only constructed and
+    authenticated (and the HTTP stack imported) once a command first uses
+    it.
+    """
 
+    # Set when the client outlives a single command, as in the daemon
+    long_lived = False
+
+    def __init__(self, config):
+        self.config = config
+        self.metrics = []
+        self._client = None
+        self._object_cache = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from ..api.policy import RequestPolicy
+
+            config = self.config
+            policy = RequestPolicy.from_config(config)
+            verify = config.get('ca') or config.get('verify', True)
+
+            if isinstance(config.url, list):
+                from ..api.multi import MultiEndpointClient
+                self._client = MultiEndpointClient(config.url, verify=verify,
+                                                   policy=policy)
+            else:
+                from ..api import ApiClient
+                self._client = ApiClient(config.url, verify=verify,
+                                         policy=policy)
+
+            if config.cert:
+                self._client.authenticate(method='certificate',
+                                          cert=config.cert, key=config.key)
+            else:
+                self._client.authenticate(username=config.username,
+                                          password=config.password)
+
+            for metrics in self.metrics:
+                metrics.install(self._client)
+
+        return self._client
+
+    @property
+    def object_cache(self):
+        """
+        An :class:`~icinga2client.api.cache.ObjectCache` for the client,
+        snapshotted to the ``cache_path`` configuration option if set.
+        """
+
+        if self._object_cache is None:
+            from ..api.cache import ObjectCache
+
+            self._object_cache = ObjectCache(
+                self.client, ttl=self.config.get('cache_ttl', 300),
+                snapshot_path=self.config.get('cache_path'))
+
+        return self._object_cache
+
+    def add_metrics(self, metrics):
+        self.metrics.append(metrics)
+
+        if self._client is not None:
+            metrics.install(self._client)
+
+    def remove_metrics(self, metrics):
+        self.metrics.remove(metrics)
+
+        if self._client is not None:
+            metrics.uninstall(self._client)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+
+def parse(argv=None):
+    arguments = docopt(doc, argv=argv, version=version_string,
+                       options_first=True)
+
+    if arguments['<command>'] not in COMMANDS:
+        raise DocoptExit('Unknown command: ' + arguments['<command>'])
+
+    return arguments
+
+
+def main(argv=None):
+    arguments = parse(argv)
     command = arguments['<command>']
-    command_arguments = [command] + arguments['<arguments>']
 
-    config = Config()
+    if command in COMMANDS_FORWARDABLE and can_forward(arguments):
+        from .. import daemon
+
+        status = daemon.forward(sys.argv[1:] if argv is None else argv)
+        if status is not None:
+            sys.exit(status)
 
-    if command not in COMMANDS:
-        raise DocoptExit('Unknown command: ' + command)
+    config = Config()
 
     if command not in COMMANDS_NO_CONFIG and len(config.keys()) == 0:
         raise DocoptExit('Not configured, try running: i2 configure')
 
-    client = ApiClient(config.url, verify=False)  # TODO: Verify option
-    client.authenticate(username=config.username, password=config.password)
+    with DeferredClient(config) as client:
+        execute(client, arguments)
+
+
+def can_forward(arguments):
+    """
+    Whether a command may be run by the daemon, if one is running. Commands
+    reading standard input must run locally.
+    """
+
+    return not os.environ.get('I2_NO_DAEMON') and \
+        '--stdin' not in arguments['<arguments>']
+
+
+def execute(client, arguments):
+    """
+    Run a parsed command against a :class:`DeferredClient`.
+    """
+
+    command = arguments['<command>']
+    command_arguments = [command] + arguments['<arguments>']
+
+    metrics = None
+    if arguments['--stats']:
+        import threading
+        from ..api.metrics import Metrics
+
+        # Not the requests of other threads sharing the client, such as
+        # i2d following the event stream
+        metrics = Metrics(thread=threading.current_thread())
+        client.add_metrics(metrics)
 
     module = 'icinga2client.cli.{}'.format(command)
     invoke = importlib.import_module(module).invoke
 
-    invoke(client, command_arguments, porcelain=arguments['--porcelain'])
+    try:
+        invoke(client, command_arguments,
+               porcelain=arguments['--porcelain'])
+
+    except Exception as e:
+        from requests.exceptions import SSLError
+        from ..api import ApiError
+
+        if isinstance(e, SSLError):
+            sys.exit(tls_error_message(e))
+
+        if not isinstance(e, ApiError):
+            raise
+
+        sys.exit(str(e))
+
+    finally:
+        if metrics is not None:
+            client.remove_metrics(metrics)
+            print_stats(metrics, arguments['--porcelain'])
+
+
+def tls_error_message(error):
+    """
+    Explain a failure to verify the API's certificate. The certificates
+    icinga2 issues are signed by its own CA, which the system trust store
+    doesn't include.
+    """
+
+    return ('Could not verify the API\'s TLS certificate: {}\n'
+            'If icinga2 issued the certificate, set "ca" in ~/.i2rc (or run '
+            'i2 configure) to the path of its CA certificate, such as '
+            '/var/lib/icinga2/certs/ca.crt.'.format(error))
+
+
+def print_stats(metrics, porcelain=False):
+    if porcelain:
+        metrics.write(sys.stderr, format='json')
+    else:
+        sys.stderr.write(metrics.summary() + '\n')
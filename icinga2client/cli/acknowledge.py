@@ -2,8 +2,12 @@
 ::
 
   Usage:
-    i2 acknowledge [remove] host <name> [options]
-    i2 acknowledge [remove] service <hostname> <name> [options]
+    i2 acknowledge [remove] host <name> [--plan] [options]
+    i2 acknowledge [remove] service <hostname> <name> [--plan] [options]
+    i2 acknowledge [remove] (--stdin | --from-file=<path>) [--plan] [options]
+    i2 acknowledge remove [--author=<name>] [--comment-match=<pattern>]
+                          [--older-than=<timespec>] [--plan]
+    i2 acknowledge --rollback [options]
 
   Acknowledge Options:
     --expiry=<timespec>         Optional expiry time
@@ -11,9 +15,37 @@
     --suppress-notifications    Do not generate any configured notifications
     --operator=<name>           Name of the operator scheduling the downtime
     --comment=<comment>         Comment describing the reason for the downtime
+
+  Cleanup Options:
+    --author=<name>             Remove acknowledgements set by this author
+    --comment-match=<pattern>   Remove acknowledgements whose comment matches
+                                this pattern, in which * matches anything
+    --older-than=<timespec>     Remove acknowledgements set longer ago than
+                                this, such as "2 days"
+
+  Batch Options:
+    --stdin                     Read targets from standard input
+    --from-file=<path>          Read targets from a file
+    --journal=<path>            Record the run in this journal directory
+                                [default: ~/.i2/journal]
+    --resume                    Continue the last run recorded in the journal,
+                                skipping targets which succeeded
+    --rollback                  Undo the last run recorded in the journal
+
+  Plan Options:
+    --plan                      Show how many objects would be affected,
+                                without changing anything
+
+  Targets are read one per line, as CSV (host[,service]) or JSON objects
+  with host, service and optionally author, comment and expiry.
+
+  Options named in a usage pattern, such as --plan and the cleanup options,
+  are only accepted where they are named.
 """
 
-from docopt import docopt
+import sys
+
+from docopt import docopt, DocoptExit
 from ..helpers.data import FriendlyArguments, parse_docstring
 
 from ..helpers.interactive import prompt_for_comment
@@ -26,6 +58,21 @@ def invoke(client, arguments, **kwargs):
     canonical = docopt(doc, argv=arguments, options_first=False)
     args = FriendlyArguments(canonical)
 
+    if args.stdin or args['from-file']:
+        return invoke_batch(client, args, kwargs.get('porcelain'))
+
+    if args.rollback:
+        return invoke_rollback(client, args, kwargs.get('porcelain'))
+
+    criteria = cleanup_criteria(args)
+    if criteria is not None:
+        return invoke_cleanup(client, args, criteria, kwargs.get('porcelain'))
+
+    if args.plan:
+        from . import plan
+        return plan.show(client, [acknowledge_request(args)],
+                         kwargs.get('porcelain'))
+
     if args.remove:
         response = unacknowledge(client, args)
 
@@ -36,18 +83,103 @@ def invoke(client, arguments, **kwargs):
     print(response)
 
 
-def unacknowledge(client, args):
-    fn = client.remove_acknowledgement
+def invoke_rollback(client, args, porcelain=False):
+    from . import batch
+
+    with batch.open_journal(args) as journal:
+        results = batch.rollback(client, journal, 'acknowledge_problem')
+
+        # Already removed is as good as removed
+        if not batch.print_results(results, porcelain, ok_codes=[404]):
+            sys.exit(1)
+
+
+def cleanup_criteria(args):
+    """
+    :returns: The :class:`Criteria` selecting acknowledgements to remove, or
+        ``None`` if the command isn't a cleanup.
+    """
+
+    if not args.remove or args.host or args.service:
+        return None
+
+    from ..api.cleanup import Criteria
+
+    criteria = Criteria(args.author, args['comment-match'],
+                        args['older-than'])
+
+    if not criteria:
+        raise DocoptExit('Give a host, a service or at least one of '
+                         '--author, --comment-match and --older-than')
+
+    return criteria
+
+
+def invoke_cleanup(client, args, criteria, porcelain=False):
+    from . import batch
+    from ..api.cleanup import Cleanup
+
+    if args.plan:
+        from . import plan
+        return plan.show(client,
+                         [('Comment', criteria.acknowledgement_filter())],
+                         porcelain)
+
+    results = Cleanup(client).remove_acknowledgements(criteria)
+
+    if not batch.print_results(map(batch.target_report, results), porcelain):
+        sys.exit(1)
+
+
+def invoke_batch(client, args, porcelain=False):
+    from . import batch
+
+    if args.plan:
+        from . import plan
+
+        with batch.open_input(args) as lines:
+            targets = [item.target for item in batch.read_items(lines)]
+
+        return plan.show_batch(client, targets, porcelain)
+
+    if args.remove:
+        action, options = 'remove_acknowledgement', {}
+
+    else:
+        comment = batch.comment_for(args)
+        action = 'acknowledge_problem'
+        options = {
+            'expiry': args.expiry, 'sticky': args.sticky,
+            'notify': not bool(args['suppress-notifications']),
+            'author': comment.author, 'comment': comment.text,
+        }
+
+    with batch.open_input(args) as lines, batch.open_journal(args) as journal:
+        runner = batch.BatchRunner(client, action, options, journal=journal,
+                                   resume=args.resume)
+        results = runner.run(batch.read_items(lines))
+
+        if not batch.print_results(results, porcelain):
+            sys.exit(1)
+
+
+def acknowledge_request(args):
+    """
+    :returns: The ``(object_type, object_filter)`` the command acts on.
+    """
 
     if args.host:
-        return fn('Host', f.host(args.name))
+        return 'Host', f.host(args.name)
 
     elif args.service:
-        return fn('Service', f.service(args.hostname, args.name))
+        return 'Service', f.service(args.hostname, args.name)
+
+
+def unacknowledge(client, args):
+    return client.remove_acknowledgement(*acknowledge_request(args))
 
 
 def acknowledge(client, args, comment):
-    fn = client.acknowledge_problem
     notify = not bool(args['suppress-notifications'])
 
     common_args = {
@@ -55,9 +187,5 @@ def acknowledge(client, args, comment):
         'sticky': args.sticky, 'notify': notify
     }
 
-    if args.host:
-        return fn('Host', f.host(args.name), **common_args)
-
-    elif args.service:
-        return fn('Service', f.service(args.hostname, args.name),
-                  **common_args)
+    return client.acknowledge_problem(*acknowledge_request(args),
+                                      **common_args)
@@ -0,0 +1,444 @@
+"""
+Batch input for commands which act on many targets at once.
+
+Targets are read one line at a time, either as CSV (``host`` or
+``host,service``) or as JSON objects::
+
+    web01
+    web02,http
+    {"host": "db01", "service": "mysql", "comment": "Upgrading MySQL"}
+
+JSON lines may override the ``author``, ``comment``, ``start``, ``end``,
+``duration`` and ``expiry`` given on the command line. Lines which don't are
+coalesced into as few requests as possible (see
+:mod:`~icinga2client.api.bulk`); the rest are run concurrently (see
+:mod:`~icinga2client.api.executor`). Results are reported line by line as
+each batch completes.
+
+Runs are recorded in a :class:`~icinga2client.api.journal.Journal`, so that
+``--resume`` can skip the targets an interrupted run already dealt with, and
+``--rollback`` can undo a run.
+"""
+
+import contextlib
+import csv
+import json
+import sys
+
+from docopt import DocoptExit
+
+from ..api.bulk import BulkActions
+from ..api.cleanup import downtime_target
+from ..api.executor import Call, ParallelExecutor
+from ..api.journal import Journal
+from ..api.models import Comment, Target
+from ..api import filters as f
+from ..helpers.interactive import prompt_for_comment
+
+OVERRIDES = ['author', 'comment', 'start', 'end', 'duration', 'expiry']
+
+BATCH_SIZE = 1000
+
+# The action undoing each action, for --rollback
+ROLLBACK = {
+    'schedule_downtime': 'remove_downtime',
+    'acknowledge_problem': 'remove_acknowledgement',
+}
+
+
+class Item:
+    """
+    One line of batch input.
+    """
+
+    __slots__ = ('line', 'target', 'overrides')
+
+    def __init__(self, line, target, overrides):
+        self.line = line
+        self.target = target
+        self.overrides = overrides
+
+
+def parse_line(text):
+    text = text.strip()
+
+    if not text or text.startswith('#'):
+        return None, None
+
+    if text.startswith('{'):
+        record = json.loads(text)
+        overrides = dict((key, record[key]) for key in OVERRIDES
+                         if record.get(key) is not None)
+        return (record['host'], record.get('service')), overrides
+
+    fields = next(csv.reader([text]))
+    return (fields[0].strip(), (fields[1:] or [''])[0].strip() or None), {}
+
+
+def read_items(lines):
+    """
+    Parse batch input lazily, yielding an :class:`Item` per target.
+
+    :param lines: An iterator of lines, such as an open file.
+    :raises ValueError: If a line can't be parsed.
+    """
+
+    for number, text in enumerate(lines, 1):
+        try:
+            names, overrides = parse_line(text)
+        except (ValueError, KeyError, StopIteration) as e:
+            raise ValueError('Invalid input on line {}: {}'.format(number, e))
+
+        if names is None:
+            continue
+
+        host, service = names
+        object_type = 'Service' if service else 'Host'
+
+        yield Item(number, Target(object_type, host, service), overrides)
+
+
+def open_input(args):
+    """
+    The batch input, to use in a ``with`` statement. Only a file opened here
+    is closed afterwards, not standard input.
+    """
+
+    if args.stdin:
+        return contextlib.nullcontext(sys.stdin)
+
+    path = args['from-file']
+
+    try:
+        return open(path)
+    except OSError as e:
+        sys.exit('Could not read {}: {}'.format(path, e.strerror))
+
+
+def comment_for(args):
+    """
+    The comment shared by every target. Standard input holds the targets,
+    so it can't also be used to prompt for the comment.
+    """
+
+    if args.stdin and not (args.operator and args.comment):
+        raise DocoptExit('--operator and --comment are required with --stdin')
+
+    return prompt_for_comment(args.operator, args.comment)
+
+
+def batches(items, size=BATCH_SIZE):
+    """
+    Group items into lists of uniform items (without overrides) and lists of
+    items with overrides, of at most ``size`` items each.
+    """
+
+    uniform, custom = [], []
+
+    for item in items:
+        if item.overrides:
+            custom.append(item)
+        else:
+            uniform.append(item)
+
+        if len(uniform) >= size:
+            yield uniform
+            uniform = []
+
+        if len(custom) >= size:
+            yield custom
+            custom = []
+
+    for group in (uniform, custom):
+        if group:
+            yield group
+
+
+class BatchRunner:
+    """
+    Runs one action over batch input.
+
+    :param action: The name of an :class:`APIMethodsMixin` method, such as
+        ``schedule_downtime``.
+    :param dict options: Arguments for the action shared by every target,
+        using the names of :py:data:`OVERRIDES` for times and comments.
+    :param Journal journal: Records the run, if given.
+    :param bool resume: Continue the last run of the action recorded in the
+        journal, skipping targets which succeeded.
+    """
+
+    def __init__(self, client, action, options, workers=8, journal=None,
+                 resume=False):
+        self.client = client
+        self.action = action
+        self.options = options
+        self.bulk = BulkActions(client)
+        self.executor = ParallelExecutor(max_workers=workers)
+        self.journal = journal
+        self.resume = resume
+        self.run_id = None
+        self.succeeded = {}
+        self.skipped = []
+
+    def arguments(self, overrides=None):
+        """
+        Build keyword arguments for the action, from the shared options and
+        any per-item overrides.
+        """
+
+        options = dict(self.options)
+        options.update((key, value) for key, value in (overrides or {}).items()
+                       if key in options)
+
+        arguments = dict((key, value) for key, value in options.items()
+                         if key not in ('author', 'comment'))
+
+        if self.action in ('schedule_downtime', 'acknowledge_problem'):
+            arguments['comment'] = Comment(options.get('author'),
+                                           options.get('comment'))
+
+        return arguments
+
+    def start(self):
+        journal = self.journal
+
+        if self.resume:
+            self.run_id = journal.latest(self.action)
+
+        if self.run_id is not None:
+            self.succeeded = journal.replay(self.run_id).succeeded
+        else:
+            self.run_id = journal.start(self.action, self.options)
+
+    def run(self, items):
+        """
+        :returns: An iterator of result dicts, one per item.
+        """
+
+        if self.journal is not None:
+            self.start()
+
+        for group in batches(self.skip(self.applicable(items))):
+            for result in self.flush_skipped():
+                yield result
+
+            if self.journal is not None:
+                self.journal.planned(
+                    self.run_id, [item.target.name for item in group],
+                    group[0].overrides and
+                    [item.overrides for item in group])
+
+            if group[0].overrides:
+                results = self.run_custom(group)
+            else:
+                results = self.run_uniform(group)
+
+            for result in results:
+                if self.journal is not None:
+                    self.journal.result(self.run_id, target_name(result),
+                                        result['code'], result['status'],
+                                        result['name'])
+                yield result
+
+        for result in self.flush_skipped():
+            yield result
+
+    def flush_skipped(self):
+        skipped, self.skipped = self.skipped, []
+        return skipped
+
+    def applicable(self, items):
+        """
+        Drop overrides of options the action doesn't take, such as the
+        comment on a line to remove, so that those items are coalesced with
+        the rest rather than sent one at a time.
+        """
+
+        for item in items:
+            if item.overrides:
+                item.overrides = dict(
+                    (key, value) for key, value in item.overrides.items()
+                    if key in self.options)
+
+            yield item
+
+    def skip(self, items):
+        """
+        Report items which succeeded in the run being resumed, rather than
+        passing them on.
+        """
+
+        for item in items:
+            done = self.succeeded.get(item.target.name)
+
+            if done is None:
+                yield item
+                continue
+
+            self.skipped.append(report(
+                item, done['code'],
+                'Skipped, succeeded in run {}'.format(self.run_id),
+                done.get('name')))
+
+    def run_uniform(self, items):
+        fn = getattr(self.bulk, self.action)
+        targets = [item.target for item in items]
+        by_name = {}
+
+        for result in fn(targets, **self.arguments()):
+            by_name[result.target.name] = result
+
+        for item in items:
+            result = by_name[item.target.name]
+            yield report(item, result.code, result.status, result.name)
+
+    def run_custom(self, items):
+        fn = getattr(self.client, self.action)
+        calls = []
+
+        for item in items:
+            target = item.target
+            object_filter = f.service(target.host, target.service) \
+                if target.service else f.host(target.host)
+
+            calls.append(Call(fn, target.type, object_filter,
+                              **self.arguments(item.overrides)))
+
+        for item, result in zip(items, self.executor.iter_results(calls)):
+            if not result.ok:
+                yield report(item, getattr(result.error, 'status_code', 0),
+                             str(result.error))
+                continue
+
+            results = result.response.get('results') or [{}]
+            yield report(item, int(results[0].get('code', 0)),
+                         results[0].get('status'), results[0].get('name'))
+
+
+def target_name(result):
+    if result['service']:
+        return '{}!{}'.format(result['host'], result['service'])
+
+    return result['host']
+
+
+def open_journal(args):
+    return Journal(args.journal)
+
+
+def rollback(client, journal, action, workers=8):
+    """
+    Undo the most recent run of an action recorded in the journal: remove
+    the downtimes it scheduled, or the acknowledgements it set, in parallel.
+
+    :returns: An iterator of result dicts, one per object.
+    """
+
+    run = journal.latest(action)
+    if run is None:
+        raise DocoptExit('No {} run to roll back in {}'.format(
+            action.replace('_', ' '), journal.path))
+
+    replay = journal.replay(run)
+    fn = getattr(client, ROLLBACK[action])
+    undo = []
+
+    if action == 'schedule_downtime':
+        for name in replay.created:
+            target = downtime_target(name)
+            undo.append((name, target.host, target.service, Call(fn, name)))
+
+    else:
+        for name in sorted(replay.succeeded):
+            if name in replay.removed:
+                continue
+
+            host, _, service = name.partition('!')
+            object_filter = f.service(host, service) if service \
+                else f.host(host)
+            undo.append((name, host, service or None,
+                         Call(fn, 'Service' if service else 'Host',
+                              object_filter)))
+
+    executor = ParallelExecutor(max_workers=workers)
+    results = executor.iter_results([call for _, _, _, call in undo])
+
+    for (name, host, service, call), result in zip(undo, results):
+        code = 200 if result.ok else \
+            getattr(result.error, 'status_code', 0)
+
+        # Already gone is as good as removed
+        if code in (200, 404):
+            journal.removed(run, name)
+
+        if result.ok:
+            status = 'Removed'
+        elif code == 404:
+            status = 'Already removed'
+        else:
+            status = str(result.error)
+
+        yield {
+            'line': None,
+            'host': host,
+            'service': service,
+            'code': code,
+            'status': status,
+            'name': name if action == 'schedule_downtime' else None,
+        }
+
+
+def target_report(result):
+    """
+    Report a :class:`TargetResult` which didn't come from batch input.
+    """
+
+    return {
+        'line': None,
+        'host': result.target.host,
+        'service': result.target.service,
+        'code': result.code,
+        'status': result.status,
+        'name': result.name,
+    }
+
+
+def report(item, code, status, name=None):
+    return {
+        'line': item.line,
+        'host': item.target.host,
+        'service': item.target.service,
+        'code': code,
+        'status': status,
+        'name': name,
+    }
+
+
+def print_results(results, porcelain=False, ok_codes=()):
+    """
+    Print each result as it becomes available.
+
+    :param ok_codes: Codes besides 2xx which count as success, such as 404
+        when rolling back.
+    :returns: ``True`` if every result was successful.
+    """
+
+    ok = True
+
+    for result in results:
+        code = result['code'] or 0
+        ok = ok and (200 <= code < 300 or code in ok_codes)
+
+        if porcelain:
+            print(json.dumps(result, sort_keys=True))
+        else:
+            name = result['host']
+            if result['service']:
+                name += '!' + result['service']
+
+            print('{:<5} {} {}'.format(result['code'], name,
+                                       result['name'] or result['status']))
+
+        sys.stdout.flush()
+
+    return ok
@@ -25,6 +25,20 @@ def invoke(client, arguments, **kwargs):
           "of the endpoint, such as `v1`.")
     config['url'] = prompt('URL', default=config.get('url', None))
 
+    print("Enter the path of the CA certificate the API's certificate is "
+          "signed by, such as /var/lib/icinga2/certs/ca.crt, or leave blank "
+          "to use the system trust store. The certificate is verified, so "
+          "this is needed if icinga2 issued it with its own CA.")
+    config['ca'] = prompt('CA certificate', default=config.get('ca')) or None
+
+    print("Enter the paths of a client certificate and key to authenticate "
+          "with, or leave blank to use a username and password.")
+    config['cert'] = prompt('Certificate', default=config.get('cert')) or None
+
+    if config['cert']:
+        config['key'] = prompt('Key', default=config.get('key')) or None
+        return
+
     print("Enter the icinga2 ApiUser username")
     config['username'] = prompt('Username', default=config.get('username'))
 
@@ -2,11 +2,16 @@
 ::
 
   Usage:
-    i2 downtime [remove] host <name> [--all-services] [options]
-    i2 downtime [remove] service <hostname> <name> [options]
-    i2 downtime [remove] hostgroup <name> [--all-services] [options]
-    i2 downtime [remove] servicegroup <name> [options]
-    i2 downtime remove <name>
+    i2 downtime [remove] host <name> [--all-services] [--plan] [options]
+    i2 downtime [remove] service <hostname> <name> [--plan] [options]
+    i2 downtime [remove] hostgroup <name> [--all-services] [--plan] [options]
+    i2 downtime [remove] servicegroup <name> [--plan] [options]
+    i2 downtime remove <name> [--plan]
+    i2 downtime remove [--author=<name>] [--comment-match=<pattern>]
+                       [--older-than=<timespec>] [--ending-before=<timespec>]
+                       [--plan]
+    i2 downtime [remove] (--stdin | --from-file=<path>) [--plan] [options]
+    i2 downtime --rollback [options]
 
   Create Options:
     --all-services              Include all services when scheduling downtime
@@ -17,13 +22,43 @@
     --operator=<name>           Name of the operator scheduling the downtime
     --comment=<comment>         Comment describing the reason for the downtime
     --trigger-name=<name>       Trigger (if triggered downtime)
+
+  Cleanup Options:
+    --author=<name>             Remove downtimes scheduled by this author
+    --comment-match=<pattern>   Remove downtimes whose comment matches this
+                                pattern, in which * matches anything
+    --older-than=<timespec>     Remove downtimes scheduled longer ago than
+                                this, such as "2 days"
+    --ending-before=<timespec>  Remove downtimes ending before this time
+
+  Batch Options:
+    --stdin                     Read targets from standard input
+    --from-file=<path>          Read targets from a file
+    --journal=<path>            Record the run in this journal directory
+                                [default: ~/.i2/journal]
+    --resume                    Continue the last run recorded in the journal,
+                                skipping targets which succeeded
+    --rollback                  Undo the last run recorded in the journal
+
+  Plan Options:
+    --plan                      Show how many objects would be affected,
+                                without changing anything
+
+  Targets are read one per line, as CSV (host[,service]) or JSON objects
+  with host, service and optionally author, comment, start, end and duration.
+
+  Options named in a usage pattern, such as --plan and the cleanup options,
+  are only accepted where they are named.
 """
 
-from docopt import docopt
-from ..helpers.data import FriendlyArguments, deep_merge, parse_docstring
+import sys
+
+from docopt import docopt, DocoptExit
+from ..helpers.data import FriendlyArguments, parse_docstring
 
 from ..helpers.interactive import prompt_for_comment
 from ..api import filters as f
+from ..api.results import ResultAggregator
 
 doc = parse_docstring(__doc__)
 
@@ -32,19 +67,112 @@ def invoke(client, arguments, **kwargs):
     canonical = docopt(doc, argv=arguments, options_first=False)
     args = FriendlyArguments(canonical)
 
+    if args.stdin or args['from-file']:
+        return invoke_batch(client, args, kwargs.get('porcelain'))
+
+    if args.rollback:
+        return invoke_rollback(client, args, kwargs.get('porcelain'))
+
+    criteria = cleanup_criteria(args)
+    if criteria is not None:
+        return invoke_cleanup(client, args, criteria, kwargs.get('porcelain'))
+
     downtime_type = get_downtime_type(args)
     filter_fn = getattr(f, downtime_type) if downtime_type else None
+    requests = downtime_requests(args, filter_fn)
+
+    if args.plan:
+        from . import plan
+        return plan.show(client, requests, kwargs.get('porcelain'))
 
     if args.remove:
-        response = remove_downtime(client, args, filter_fn)
+        remove_downtime(client, args, requests)
 
     else:
         comment = prompt_for_comment(args.operator, args.comment)
-        response = schedule_downtime(client, args, filter_fn, comment)
+        results = schedule_downtime(client, args, requests, comment)
+
+        for result in results.records():
+            print(result.name)
+
+
+def invoke_rollback(client, args, porcelain=False):
+    from . import batch
+
+    with batch.open_journal(args) as journal:
+        results = batch.rollback(client, journal, 'schedule_downtime')
+
+        # Already removed is as good as removed
+        if not batch.print_results(results, porcelain, ok_codes=[404]):
+            sys.exit(1)
+
+
+def cleanup_criteria(args):
+    """
+    :returns: The :class:`Criteria` selecting downtimes to remove, or
+        ``None`` if the command isn't a cleanup.
+    """
+
+    if not args.remove or args.name or get_downtime_type(args):
+        return None
+
+    from ..api.cleanup import Criteria
+
+    criteria = Criteria(args.author, args['comment-match'],
+                        args['older-than'], args['ending-before'])
+
+    if not criteria:
+        raise DocoptExit('Give a downtime name or at least one of --author, '
+                         '--comment-match, --older-than and --ending-before')
+
+    return criteria
+
+
+def invoke_cleanup(client, args, criteria, porcelain=False):
+    from . import batch
+    from ..api.cleanup import Cleanup
+
+    if args.plan:
+        from . import plan
+        return plan.show(client, [('Downtime', criteria.downtime_filter())],
+                         porcelain)
+
+    results = Cleanup(client).remove_downtimes(criteria)
+
+    if not batch.print_results(map(batch.target_report, results), porcelain):
+        sys.exit(1)
 
-        # TODO: This is hardly ideal
-        for result in response['results']:
-            print(result['name'])
+
+def invoke_batch(client, args, porcelain=False):
+    from . import batch
+
+    if args.plan:
+        from . import plan
+
+        with batch.open_input(args) as lines:
+            targets = [item.target for item in batch.read_items(lines)]
+
+        return plan.show_batch(client, targets, porcelain)
+
+    if args.remove:
+        action, options = 'remove_downtime', {}
+
+    else:
+        comment = batch.comment_for(args)
+        action = 'schedule_downtime'
+        options = {
+            'start': args.start, 'end': args.end, 'duration': args.duration,
+            'author': comment.author, 'comment': comment.text,
+            'trigger_name': args['trigger-name'],
+        }
+
+    with batch.open_input(args) as lines, batch.open_journal(args) as journal:
+        runner = batch.BatchRunner(client, action, options, journal=journal,
+                                   resume=args.resume)
+        results = runner.run(batch.read_items(lines))
+
+        if not batch.print_results(results, porcelain):
+            sys.exit(1)
 
 
 def get_downtime_type(args):
@@ -53,44 +181,54 @@ def get_downtime_type(args):
             return candidate
 
 
-def remove_downtime(client, args, filter_fn):
-    fn = client.remove_downtime_filter
+def downtime_requests(args, filter_fn):
+    """
+    :returns: An ``(object_type, object_filter)`` tuple for each request the
+        command makes.
+    """
 
     if args.host or args.hostgroup:
-        response = fn('Host', filter_fn(args.name))
-        if not args['all-services']:
-            return response
+        requests = [('Host', filter_fn(args.name))]
+        if args['all-services']:
+            requests.append(('Service', filter_fn(args.name)))
 
-        return dict(deep_merge(response, fn('Service', filter_fn(args.name))))
+    elif args.service:
+        requests = [('Service', filter_fn(args.hostname, args.name))]
 
     elif args.servicegroup:
-        return fn('Service', filter_fn(args.name))
-
-    elif args.service:
-        return fn('Service', filter_fn(args.hostname, args.name))
+        requests = [('Service', filter_fn(args.name))]
 
     else:
-        return client.remove_downtime(args.name)
+        requests = [('Downtime',
+                     f.attr('downtime.__name').equals(args.name))]
+
+    return requests
+
+
+def remove_downtime(client, args, requests):
+    results = ResultAggregator()
+
+    if not get_downtime_type(args):
+        results.add(client.remove_downtime(args.name))
+
+    for object_type, object_filter in requests:
+        if object_type != 'Downtime':
+            results.add(client.remove_downtime_filter(object_type,
+                                                      object_filter))
 
+    return results
 
-def schedule_downtime(client, args, filter_fn, comment):
-    fn = client.schedule_downtime
+
+def schedule_downtime(client, args, requests, comment):
     common_args = {
         'start': args.start, 'end': args.end, 'duration': args.duration,
         'comment': comment, 'trigger_name': args['trigger-name']
     }
 
-    if args.host or args.hostgroup:
-        response = fn('Host', filter_fn(args.name), **common_args)
-        if not args['all-services']:
-            return response
+    results = ResultAggregator()
 
-        return dict(deep_merge(response, fn('Service', filter_fn(args.name),
-                               **common_args)))
+    for object_type, object_filter in requests:
+        results.add(client.schedule_downtime(object_type, object_filter,
+                                             **common_args))
 
-    elif args.service:
-        return fn('Service', filter_fn(args.hostname, args.name),
-                  **common_args)
-
-    elif args.servicegroup:
-        return fn('Service', filter_fn(args.name), **common_args)
+    return results
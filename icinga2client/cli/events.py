@@ -0,0 +1,61 @@
+"""
+::
+
+  Usage:
+    i2 events <type>... [options]
+
+  Event Options:
+    --filter=<filter>           Only show events matching an API filter
+    --queue=<name>              Name of the event queue to subscribe with
+
+  Event Types:
+    CheckResult, StateChange, Notification, AcknowledgementSet,
+    AcknowledgementCleared, CommentAdded, CommentRemoved, DowntimeAdded,
+    DowntimeRemoved, DowntimeStarted, DowntimeTriggered
+"""
+
+import datetime
+import json
+import sys
+
+from docopt import docopt
+from ..helpers.data import FriendlyArguments, parse_docstring
+
+doc = parse_docstring(__doc__)
+
+
+def invoke(client, arguments, **kwargs):
+    canonical = docopt(doc, argv=arguments, options_first=False)
+    args = FriendlyArguments(canonical)
+
+    stream = client.events(args.type, queue=args.queue,
+                           object_filter=args.filter)
+    show = show_porcelain if kwargs.get('porcelain') else show_event
+
+    try:
+        for event in stream:
+            show(event)
+            sys.stdout.flush()
+
+    except KeyboardInterrupt:
+        pass
+
+
+def show_porcelain(event):
+    print(json.dumps(event, sort_keys=True))
+
+
+def show_event(event):
+    name = event.get('host', '')
+    if event.get('service'):
+        name += '!' + event['service']
+
+    timestamp = datetime.datetime.fromtimestamp(event.get('timestamp', 0))
+    detail = event.get('author') or ''
+
+    if 'check_result' in event:
+        detail = (event['check_result'].get('output') or '').splitlines()
+        detail = detail[0] if detail else ''
+
+    print('{} {:<22} {} {}'.format(timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                                   event.get('type'), name, detail).rstrip())
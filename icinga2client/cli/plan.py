@@ -0,0 +1,61 @@
+"""
+Shared ``--plan`` support: show what a command would affect instead of
+running it.
+"""
+
+import json
+
+from ..api.plan import Planner
+
+
+def show(client, requests, porcelain=False):
+    """
+    Print a :class:`~icinga2client.api.plan.Plan` for each request.
+
+    :param DeferredClient client: The client the command would have used.
+    :param requests: ``(object_type, object_filter)`` tuples, one per API
+        request the command would make.
+    """
+
+    cache = client.object_cache
+    build_index = client.long_lived or bool(cache.snapshot_path)
+    stale = cache.index() is None
+
+    plans = Planner(cache, build_index=build_index).plan_all(requests)
+
+    if stale and build_index and cache.snapshot_path:
+        cache.save()
+
+    for plan in plans:
+        if porcelain:
+            print(json.dumps(plan.to_dict(), sort_keys=True))
+            continue
+
+        if plan.source == 'index':
+            source = 'index, {:.0f}s old'.format(plan.age)
+        else:
+            source = 'query'
+
+        print('{:<8} {:>7} {}'.format(plan.object_type, plan.count,
+                                      plan.filter))
+        print('{:<8} {:>7} ({}, {:.1f} ms)'.format(
+            '', '', source, plan.seconds * 1000))
+
+        for name in plan.sample:
+            print('{:<16} {}'.format('', name))
+
+        if plan.count > len(plan.sample):
+            print('{:<16} ... and {} more'.format(
+                '', plan.count - len(plan.sample)))
+
+
+def show_batch(client, targets, porcelain=False):
+    """
+    Plan the requests a batch of targets would be coalesced into.
+    """
+
+    from ..api.bulk import BulkActions
+
+    bulk = BulkActions(client.client)
+    show(client, [(object_type, object_filter) for object_type, object_filter,
+                  chunk in bulk.plan(targets)], porcelain)
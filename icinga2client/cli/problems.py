@@ -0,0 +1,96 @@
+"""
+::
+
+  Usage:
+    i2 problems [--state=<state>]... [--host=<name>] [--hostgroup=<name>]
+                [--servicegroup=<name>] [--acknowledged | --unacknowledged]
+                [--unhandled] [--refresh]
+
+  Problem Options:
+    --state=<state>             Only problems in this state: warning,
+                                critical or unknown. May be repeated
+    --host=<name>               Only problems on this host
+    --hostgroup=<name>          Only problems on hosts in this group
+    --servicegroup=<name>       Only problems of services in this group
+    --acknowledged              Only acknowledged problems
+    --unacknowledged            Only unacknowledged problems
+    --unhandled                 Leave out problems which are acknowledged, in
+                                downtime, or on hosts which are down
+    --refresh                   Rebuild the problem index from the API
+
+  Service problems are printed one per line as host,service, ready to pipe
+  into i2 acknowledge --stdin or i2 downtime --stdin. The problem index is
+  kept in the cache (and its snapshot, if cache_path is configured), and kept
+  current by i2d --follow-events.
+"""
+
+import csv
+import json
+import sys
+
+from docopt import docopt, DocoptExit
+from ..helpers.data import FriendlyArguments, parse_docstring
+
+doc = parse_docstring(__doc__)
+
+
+def invoke(client, arguments, **kwargs):
+    canonical = docopt(doc, argv=arguments, options_first=False)
+    args = FriendlyArguments(canonical)
+
+    states = [parse_state(state) for state in args.state]
+
+    acknowledged = None
+    if args.acknowledged or args.unacknowledged:
+        acknowledged = bool(args.acknowledged)
+
+    cache = client.object_cache
+    stale = args.refresh or cache.problems() is None
+    index = cache.problems(refresh=True, rebuild=args.refresh)
+
+    if stale and cache.snapshot_path:
+        cache.save()
+
+    problems = index.select(states=states, host=args.host,
+                            hostgroup=args.hostgroup,
+                            servicegroup=args.servicegroup,
+                            acknowledged=acknowledged,
+                            unhandled=args.unhandled)
+
+    if kwargs.get('porcelain'):
+        for problem in problems:
+            print(json.dumps(report(problem), sort_keys=True))
+        return
+
+    writer = csv.writer(sys.stdout, lineterminator='\n')
+    for problem in problems:
+        writer.writerow([problem['host'], problem['service']])
+
+
+def parse_state(name):
+    from ..api.problems import STATES
+
+    state = STATES.get(name.lower())
+
+    if not state:
+        raise DocoptExit('Unknown state: {}'.format(name))
+
+    return state
+
+
+def report(problem):
+    """
+    A problem as a JSON line, which batch input also accepts.
+    """
+
+    from ..api.problems import STATE_NAMES
+
+    return {
+        'host': problem['host'],
+        'service': problem['service'],
+        'state': STATE_NAMES.get(problem['state'], problem['state']),
+        'acknowledged': problem['acknowledged'],
+        'downtime': problem['downtime'],
+        'host_state': problem['host_state'],
+        'since': problem['since'],
+    }
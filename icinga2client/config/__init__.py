@@ -27,7 +27,7 @@ class Config:
                 self.dirty = False
 
     def _write_changes_back(self):
-        with open(self.config_path, 'wb+') as f:
+        with open(self.config_path, 'w+') as f:
             f.write(json.dumps(self.config))
             self.dirty = True
 
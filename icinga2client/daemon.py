@@ -0,0 +1,325 @@
+"""
+i2d keeps an authenticated client, its connection pool and caches warm
+between invocations of i2, which forwards commands to it over a Unix socket.
+
+::
+
+  Usage:
+    i2d [--socket=<path>] [--follow-events]
+    i2d stop [--socket=<path>]
+
+  Options:
+    --socket=<path>     Listen on this socket, rather than $I2D_SOCKET or
+                        i2d.sock in $XDG_RUNTIME_DIR
+    --follow-events     Keep the object cache up to date from the event stream
+"""
+
+import errno
+import json
+import os
+import socket
+import struct
+import sys
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+
+# Replies are small, but a forwarded command may take as long as the API does
+CONNECT_TIMEOUT = 0.5
+
+
+def socket_path():
+    """
+    Work out where the daemon's socket lives. Only the current user may
+    reach it: the fallback directory under ``~`` is created ``0700``.
+    """
+
+    if os.environ.get('I2D_SOCKET'):
+        return os.environ['I2D_SOCKET']
+
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'i2d.sock')
+
+    return os.path.expanduser('~/.i2d/i2d.sock')
+
+
+def send(path, request, timeout=None):
+    """
+    Send one request to the daemon and return its reply, or ``None`` if no
+    daemon is listening.
+    """
+
+    if not os.path.exists(path):
+        return None
+
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(CONNECT_TIMEOUT)
+
+    try:
+        conn.connect(path)
+        conn.settimeout(timeout)
+        conn.sendall(json.dumps(request).encode('utf-8'))
+        conn.shutdown(socket.SHUT_WR)
+
+        chunks = []
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    except socket.error as e:
+        # A stale socket from a daemon which didn't exit cleanly, or a
+        # daemon run by another user, which hangs up
+        if e.errno in (errno.ECONNREFUSED, errno.ENOENT, errno.ECONNRESET,
+                       errno.EPIPE):
+            return None
+        raise
+
+    finally:
+        conn.close()
+
+    if not chunks:
+        return None
+
+    return json.loads(b''.join(chunks).decode('utf-8'))
+
+
+def forward(argv):
+    """
+    Run an i2 command in the daemon, echoing its output. Returns the exit
+    status, or ``None`` if the command has to run locally instead.
+    """
+
+    reply = send(socket_path(), {'argv': argv, 'cwd': os.getcwd()})
+
+    if reply is None or reply.get('fallback'):
+        return None
+
+    sys.stdout.write(reply['stdout'])
+    sys.stdout.flush()
+    sys.stderr.write(reply['stderr'])
+
+    return reply['status']
+
+
+def peer_uid(conn):
+    """
+    The uid of the process at the other end of a Unix socket, where the
+    platform can tell us.
+    """
+
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                            struct.calcsize('3i'))
+    pid, uid, gid = struct.unpack('3i', creds)
+
+    return uid
+
+
+class Capture:
+    """
+    Swap out the standard streams while a command runs in the daemon. There's
+    no terminal to prompt on, so prompts are disabled too.
+    """
+
+    def __init__(self):
+        from io import StringIO
+
+        self.stdin = StringIO()
+        self.stdout = StringIO()
+        self.stderr = StringIO()
+
+    def __enter__(self):
+        from .helpers import interactive
+
+        self.saved = sys.stdin, sys.stdout, sys.stderr
+        sys.stdin, sys.stdout, sys.stderr = \
+            self.stdin, self.stdout, self.stderr
+        interactive.enabled = False
+
+        return self
+
+    def __exit__(self, *exc_info):
+        from .helpers import interactive
+
+        sys.stdin, sys.stdout, sys.stderr = self.saved
+        interactive.enabled = True
+
+
+class Daemon:
+    """
+    Runs forwarded commands one at a time against a shared
+    :class:`~icinga2client.cli.DeferredClient`, rebuilt whenever the
+    configuration file changes.
+
+    :param str path: Socket to listen on
+    :param bool follow_events: Keep the object cache up to date from the
+                               event stream
+    """
+
+    def __init__(self, path, follow_events=False):
+        import threading
+
+        self.path = path
+        self.follow_events = follow_events
+        self.lock = threading.Lock()
+        self.client = None
+        self.config_mtime = None
+        self.server = None
+
+    def get_client(self):
+        from .cli import DeferredClient
+        from .config import Config
+
+        config = Config()
+
+        try:
+            mtime = os.stat(config.config_path).st_mtime
+        except OSError:
+            mtime = None
+
+        if self.client is None or mtime != self.config_mtime:
+            if self.client is not None:
+                self.client.close()
+
+            # Config caches its contents on the class
+            config.dirty = True
+            config._reload_if_required()
+
+            self.client = DeferredClient(config)
+            self.client.long_lived = True
+            self.config_mtime = mtime
+
+            if self.follow_events:
+                self.client.object_cache.follow()
+
+        return self.client
+
+    def handle(self, request):
+        """
+        Run one forwarded command, returning the reply to send back.
+        """
+
+        from docopt import DocoptExit
+        from .cli import execute, parse
+        from .helpers.interactive import InteractionRequired
+
+        if request.get('stop'):
+            self.stop()
+            return {'stopped': True}
+
+        status = 0
+
+        with self.lock:
+            try:
+                os.chdir(request.get('cwd') or '/')
+                client = self.get_client()
+            except Exception:
+                return {'fallback': True}
+
+            with Capture() as capture:
+                try:
+                    execute(client, parse(request['argv']))
+
+                except InteractionRequired:
+                    return {'fallback': True}
+
+                except (SystemExit, DocoptExit) as e:
+                    status = exit_status(e.code, capture.stderr)
+
+                except Exception:
+                    import traceback
+                    traceback.print_exc(file=capture.stderr)
+                    status = 1
+
+        return {
+            'stdout': capture.stdout.getvalue(),
+            'stderr': capture.stderr.getvalue(),
+            'status': status,
+        }
+
+    def serve(self):
+        directory = os.path.dirname(self.path)
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+
+        if os.path.exists(self.path):
+            if send(self.path, {'ping': True}) is not None:
+                sys.exit('i2d is already listening on ' + self.path)
+            os.unlink(self.path)
+
+        umask = os.umask(0o177)
+        try:
+            self.server = Server(self.path, Handler)
+        finally:
+            os.umask(umask)
+
+        self.server.daemon = self
+
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            os.unlink(self.path)
+
+            if self.client is not None:
+                self.client.close()
+
+    def stop(self):
+        import threading
+
+        # shutdown() waits for serve_forever(), so can't run on its thread
+        threading.Thread(target=self.server.shutdown).start()
+
+
+def exit_status(code, stderr):
+    if code is None:
+        return 0
+
+    if isinstance(code, int):
+        return code
+
+    stderr.write(str(code) + '\n')
+    return 1
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        uid = peer_uid(self.connection)
+        if uid is not None and uid != os.getuid():
+            return
+
+        request = json.loads(self.rfile.read().decode('utf-8'))
+
+        if request.get('ping'):
+            reply = {'pong': True}
+        else:
+            reply = self.server.daemon.handle(request)
+
+        self.wfile.write(json.dumps(reply).encode('utf-8'))
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def main(argv=None):
+    from docopt import docopt
+    from .helpers.data import parse_docstring
+
+    arguments = docopt(parse_docstring(__doc__), argv=argv)
+    path = arguments['--socket'] or socket_path()
+
+    if arguments['stop']:
+        if send(path, {'stop': True}) is None:
+            sys.exit('i2d is not running')
+        return
+
+    Daemon(path, follow_events=arguments['--follow-events']).serve()
@@ -2,14 +2,21 @@ from getpass import getpass
 from ..api import Comment
 
 
-try:
-    input = raw_input
-except NameError:
-    pass
+# Cleared when there's no terminal to prompt on, such as in the daemon
+enabled = True
+
+
+class InteractionRequired(Exception):
+    """
+    Raised when a prompt is needed but prompting is disabled.
+    """
 
 
 def prompt(question, default=None, hidden=False):
     # TODO: Retry prompt if no default and no value
+    if not enabled:
+        raise InteractionRequired(question)
+
     if default:
         question += ' [%s]: ' % default
     else:
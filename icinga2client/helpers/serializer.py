@@ -0,0 +1,142 @@
+"""
+JSON encoding and decoding for API requests and responses.
+
+`orjson`_ or `ujson`_ are used if installed, as they encode and decode large
+``objects`` responses and event streams several times faster than the
+standard library, which is the fallback. ``pip install icinga2client[fast]``
+installs orjson. Set ``I2_JSON`` to ``orjson``, ``ujson`` or ``json`` to
+choose one explicitly.
+
+Every serializer encodes to ``bytes`` and decodes from ``bytes`` or text,
+so response bodies never need converting to text first.
+
+.. _orjson: https://pypi.org/project/orjson/
+.. _ujson: https://pypi.org/project/ujson/
+"""
+
+import json
+import os
+
+PREFERENCE = ['orjson', 'ujson', 'json']
+
+_serializer = None
+
+
+class StdlibSerializer:
+    name = 'json'
+
+    def dumps(self, value):
+        return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    """
+    orjson refuses some values the standard library accepts, such as
+    dictionaries with non-string keys. Those are handed to the standard
+    library instead.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self.orjson = orjson
+        self.fallback = StdlibSerializer()
+
+    def dumps(self, value):
+        try:
+            return self.orjson.dumps(value)
+        except TypeError:
+            return self.fallback.dumps(value)
+
+    def loads(self, data):
+        try:
+            return self.orjson.loads(data)
+        except ValueError:
+            return self.fallback.loads(data)
+
+
+class UjsonSerializer:
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self.ujson = ujson
+        self.fallback = StdlibSerializer()
+
+    def dumps(self, value):
+        try:
+            return self.ujson.dumps(value, ensure_ascii=False) \
+                .encode('utf-8')
+        except (TypeError, OverflowError):
+            return self.fallback.dumps(value)
+
+    def loads(self, data):
+        try:
+            return self.ujson.loads(data)
+        except ValueError:
+            return self.fallback.loads(data)
+
+
+SERIALIZERS = {
+    'orjson': OrjsonSerializer,
+    'ujson': UjsonSerializer,
+    'json': StdlibSerializer,
+}
+
+
+def get_serializer(name=None):
+    """
+    :param str name: ``orjson``, ``ujson`` or ``json``. If unset, the first
+        of these which is installed is used, unless ``I2_JSON`` says
+        otherwise.
+    :raises ImportError: If the serializer asked for isn't installed.
+    """
+
+    name = name or os.environ.get('I2_JSON')
+
+    if name:
+        if name not in SERIALIZERS:
+            raise ValueError('Unknown JSON serializer: {}'.format(name))
+        return SERIALIZERS[name]()
+
+    for name in PREFERENCE:
+        try:
+            return SERIALIZERS[name]()
+        except ImportError:
+            pass
+
+
+def serializer():
+    """
+    :returns: The serializer shared by the whole process, chosen the first
+        time it's needed.
+    """
+
+    global _serializer
+
+    if _serializer is None:
+        _serializer = get_serializer()
+
+    return _serializer
+
+
+def dumps(value):
+    """
+    Encode a value as JSON.
+
+    :rtype: bytes
+    """
+
+    return serializer().dumps(value)
+
+
+def loads(data):
+    """
+    Decode JSON from ``bytes`` or text.
+    """
+
+    return serializer().loads(data)
@@ -0,0 +1,212 @@
+import codecs
+import json
+import re
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+STRUCTURE = re.compile(r'["{}\[\]]')
+STRING_END = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+
+decoder = json.JSONDecoder()
+
+
+class JSONStream:
+    """
+    Incrementally parse a JSON document from an iterator of byte chunks.
+
+    Only as much of the document as is needed to produce the next value is
+    held in memory at once.
+    """
+
+    def __init__(self, chunks, encoding='utf-8'):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder(encoding)('replace')
+        self.buffer = ''
+        self.pos = 0
+        self.exhausted = False
+
+    def _fill(self):
+        """
+        Read another chunk into the buffer, discarding what has already been
+        consumed.
+
+        :returns: ``False`` if there are no more chunks.
+        """
+
+        if self.exhausted:
+            return False
+
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self.exhausted = True
+            chunk = b''
+
+        self.buffer = self.buffer[self.pos:] + \
+            self.decoder.decode(chunk, final=self.exhausted)
+        self.pos = 0
+
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def peek(self):
+        """
+        :returns: The next non-whitespace character, or ``''`` at the end
+            of the document.
+        """
+
+        self._skip_whitespace()
+        return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, characters):
+        character = self.peek()
+
+        if not character or character not in characters:
+            raise ValueError('Expected one of {!r} at offset {}, found {!r}'
+                             .format(characters, self.pos, character))
+
+        self.pos += 1
+        return character
+
+    def value(self, raw=False):
+        """
+        Decode the next complete JSON value.
+
+        :param bool raw: Return the text of the value rather than the
+            decoded value.
+        """
+
+        self._skip_whitespace()
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+
+                # A number at the end of the buffer may be incomplete
+                if end < len(self.buffer) or self.exhausted:
+                    if raw:
+                        value = self.buffer[self.pos:end]
+
+                    self.pos = end
+                    return value
+
+            except ValueError:
+                if self.exhausted:
+                    raise
+
+            self._fill()
+
+    def raw_value(self):
+        """
+        Return the text of the next complete JSON value, without decoding it.
+        """
+
+        if self.peek() not in ('{', '['):
+            return self.value(raw=True)
+
+        # Scan ahead from the opening bracket, skipping over strings, until
+        # the matching closing bracket is found. Refilling the buffer moves
+        # the value to its start, so offsets are kept relative to self.pos.
+        offset, depth = 0, 0
+
+        while True:
+            match = STRUCTURE.search(self.buffer, self.pos + offset)
+
+            if match is None:
+                offset = len(self.buffer) - self.pos
+                if not self._fill():
+                    raise ValueError('Unexpected end of JSON document')
+                continue
+
+            character = match.group()
+
+            if character == '"':
+                end = STRING_END.match(self.buffer, match.end())
+
+                if end is None:
+                    offset = match.start() - self.pos
+                    if not self._fill():
+                        raise ValueError('Unterminated string')
+                    continue
+
+                offset = end.end() - self.pos
+
+            elif character in '{[':
+                depth += 1
+                offset = match.end() - self.pos
+
+            else:
+                depth -= 1
+                offset = match.end() - self.pos
+
+                if depth == 0:
+                    value = self.buffer[self.pos:match.end()]
+                    self.pos = match.end()
+                    return value
+
+    def items(self, raw=False):
+        """
+        Yield each value of the array starting at the current position.
+
+        :param bool raw: Yield the undecoded text of each value instead.
+        """
+
+        self.expect('[')
+
+        if self.peek() == ']':
+            self.pos += 1
+            return
+
+        while True:
+            yield self.raw_value() if raw else self.value()
+
+            if self.expect(',]') == ']':
+                return
+
+    def members(self, key):
+        """
+        Find ``key`` in the object starting at the current position. The
+        values of preceding members are decoded and discarded.
+
+        :returns: ``True`` if the key was found, in which case the stream is
+            positioned at its value.
+        """
+
+        self.expect('{')
+
+        if self.peek() == '}':
+            return False
+
+        while True:
+            name = self.value()
+            self.expect(':')
+
+            if name == key:
+                return True
+
+            self.value()
+
+            if self.expect(',}') == '}':
+                return False
+
+
+def iter_results(chunks, key='results', raw=False):
+    """
+    Yield each element of the ``results`` array in an API response body,
+    without decoding the whole body at once.
+
+    :param chunks: An iterator of byte strings, such as
+        :meth:`requests.Response.iter_content`.
+    :param bool raw: Yield the undecoded JSON text of each element.
+    """
+
+    stream = JSONStream(chunks)
+
+    if stream.members(key):
+        for item in stream.items(raw=raw):
+            yield item
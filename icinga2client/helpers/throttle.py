@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket, allowing ``rate`` operations per second on
+    average with bursts of up to ``burst`` operations.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.time, sleep=time.sleep):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1, rate))
+        self.tokens = self.burst
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1):
+        """
+        Take ``tokens`` from the bucket, blocking until they are available.
+
+        :returns: The number of seconds spent waiting.
+        """
+
+        waited = 0.0
+
+        while True:
+            with self.lock:
+                self._refill()
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+
+                delay = (tokens - self.tokens) / self.rate
+
+            self.sleep(delay)
+            waited += delay
+
+
+def backoff(initial=0.5, maximum=60.0, factor=2.0, jitter=random.random):
+    """
+    Yield an endless series of exponentially increasing delays, in seconds,
+    each scaled by a random factor between 0.5 and 1 so that many clients
+    backing off at once don't retry in lockstep.
+    """
+
+    delay = initial
+
+    while True:
+        yield delay * (0.5 + jitter() / 2)
+        delay = min(maximum, delay * factor)
+
+
+class AdaptiveLimiter:
+    """
+    Limits the number of operations in flight, adjusting the limit to the
+    observed latency: it grows by one slot per round of operations while
+    latency stays under ``target_latency``, and shrinks by ``decrease`` as
+    soon as latency exceeds it (additive increase, multiplicative decrease).
+    """
+
+    def __init__(self, maximum=32, minimum=1, target_latency=1.0,
+                 decrease=0.7, smoothing=0.2, clock=time.time):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.target_latency = target_latency
+        self.decrease = decrease
+        self.smoothing = smoothing
+        self.clock = clock
+
+        self.limit = float(maximum)
+        self.latency = None
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Wait for a free slot.
+
+        :returns: The time the operation started, to pass to
+            :py:meth:`release`.
+        """
+
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+
+            self.in_flight += 1
+
+        return self.clock()
+
+    def release(self, started):
+        latency = self.clock() - started
+
+        with self.condition:
+            self.in_flight -= 1
+
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.smoothing * (latency - self.latency)
+
+            if self.latency > self.target_latency:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+            self.condition.notify_all()
@@ -0,0 +1,254 @@
+"""
+Parsing of timespecs, such as ``now``, ``+2 hours`` or ``2016-05-01 09:00``,
+into timestamps.
+
+`parsedatetime`_ is flexible but slow, and bulk operations parse the same
+few timespecs for every target. :class:`TimespecCompiler` parses each
+distinct timespec once and caches the result:
+
+* Absolute timespecs (ISO-8601 dates with a time, epoch timestamps) are
+  cached outright.
+* Fixed offsets (``now``, ``+2 hours``) are cached as an offset from the
+  current time.
+* Anything else relative to the calendar (``tomorrow 9am``) is cached
+  against an anchor time. This includes dates without a time, such as
+  ``2016-05-01``, which parsedatetime gives the current time of day.
+
+Within :py:meth:`TimespecCompiler.anchored`, the current time is pinned, so
+every item in a batch gets identical start and end times.
+
+.. _parsedatetime: https://pypi.python.org/pypi/parsedatetime
+"""
+
+import calendar as calendar_lib
+import contextlib
+import datetime
+import re
+import threading
+import time
+
+ISO_8601 = re.compile(
+    r'^(\d{4})-(\d{2})-(\d{2})'
+    r'(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d+))?)?)?'
+    r'(Z|[+-]\d{2}:?\d{2})?$'
+)
+EPOCH = re.compile(r'^@?(\d{9,}(?:\.\d+)?)$')
+
+# A second anchor, far enough from the first (and at a different time of
+# day) that any calendar-relative timespec resolves differently against it.
+PROBE_OFFSET = 400 * 86400 + 3 * 3600 + 17 * 60 + 11
+
+ABSOLUTE = 'absolute'
+OFFSET = 'offset'
+CALENDAR = 'calendar'
+
+_calendar = None
+
+
+def get_calendar():
+    """
+    :returns: A shared :class:`parsedatetime.Calendar`, created (and
+        parsedatetime imported) on first use.
+    """
+
+    global _calendar
+
+    if _calendar is None:
+        import parsedatetime
+        _calendar = parsedatetime.Calendar()
+
+    return _calendar
+
+
+def parse_iso8601(string):
+    """
+    :returns: The timestamp of an ISO-8601 date and time, or ``None`` if
+        ``string`` isn't one. A date alone is left to parsedatetime, which
+        gives it the current time of day rather than midnight.
+    """
+
+    match = ISO_8601.match(string)
+    if not match:
+        return None
+
+    year, month, day, hour, minute, second, fraction, zone = match.groups()
+    if hour is None:
+        return None
+
+    moment = datetime.datetime(int(year), int(month), int(day),
+                               int(hour), int(minute),
+                               int(second or 0))
+    fraction = float('0.' + fraction) if fraction else 0.0
+
+    if zone is None:
+        return time.mktime(moment.timetuple()) + fraction
+
+    offset = 0
+    if zone != 'Z':
+        sign = -1 if zone[0] == '-' else 1
+        zone = zone[1:].replace(':', '')
+        offset = sign * (int(zone[:2]) * 3600 + int(zone[2:]) * 60)
+
+    return calendar_lib.timegm(moment.timetuple()) - offset + fraction
+
+
+def parse_epoch(string):
+    match = EPOCH.match(string)
+    return float(match.group(1)) if match else None
+
+
+class TimespecCompiler:
+    def __init__(self, max_entries=1024, clock=time.time):
+        """
+        :param int max_entries: Maximum number of cached timespecs. The cache
+            is cleared once it is exceeded.
+        :param clock: Function returning the current time.
+        """
+
+        self.max_entries = max_entries
+        self.clock = clock
+        self.cache = {}
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+        # Approximate counters, updated without locking
+        self.stats = {'hits': 0, 'misses': 0, 'parses': 0,
+                      'parse_seconds': 0.0}
+
+    @property
+    def anchor(self):
+        return getattr(self.local, 'anchor', None)
+
+    def now(self):
+        """
+        :returns: The anchor time if one is pinned, otherwise the current
+            time, to the second.
+        """
+
+        anchor = self.anchor
+        return anchor if anchor is not None else float(int(self.clock()))
+
+    @contextlib.contextmanager
+    def anchored(self, when=None):
+        """
+        Pin the current time, so that relative timespecs resolve identically
+        for the duration of the block. Nested blocks keep the outer anchor.
+
+        Anchors apply to the current thread. Pass ``when`` explicitly to share
+        one with worker threads.
+        """
+
+        previous = self.anchor
+
+        if when is None:
+            when = previous if previous is not None else self.now()
+
+        self.local.anchor = float(when)
+
+        try:
+            yield self.local.anchor
+        finally:
+            self.local.anchor = previous
+
+    def _parse(self, string, source):
+        started = time.time()
+        result = get_calendar().parse(string, time.localtime(source))[0]
+
+        self.stats['parses'] += 1
+        self.stats['parse_seconds'] += time.time() - started
+
+        return time.mktime(result)
+
+    def compile(self, string):
+        """
+        Classify a timespec.
+
+        :returns: A tuple of ``(kind, value)``. For ``absolute`` timespecs,
+            value is a timestamp; for ``offset`` timespecs, a number of
+            seconds from the current time; for ``calendar`` timespecs, it is
+            ``None`` and the timespec must be resolved against an anchor.
+        """
+
+        string = string.strip()
+
+        with self.lock:
+            compiled = self.cache.get(string)
+
+        if compiled is not None:
+            self.stats['hits'] += 1
+            return compiled
+
+        self.stats['misses'] += 1
+
+        value = parse_epoch(string)
+        if value is None:
+            value = parse_iso8601(string)
+
+        if value is not None:
+            compiled = (ABSOLUTE, value)
+
+        else:
+            first = self.now()
+            second = first + PROBE_OFFSET
+            a, b = self._parse(string, first), self._parse(string, second)
+
+            if a == b:
+                compiled = (ABSOLUTE, a)
+            elif a - first == b - second:
+                compiled = (OFFSET, a - first)
+            else:
+                compiled = (CALENDAR, None)
+
+        self._store(string, compiled)
+
+        return compiled
+
+    def _store(self, key, value):
+        with self.lock:
+            if len(self.cache) >= self.max_entries:
+                self.cache.clear()
+
+            self.cache[key] = value
+
+    def timestamp(self, string, now=None):
+        """
+        :param float now: Resolve relative timespecs against this time,
+            rather than :py:meth:`now`.
+        :returns: The timestamp a timespec refers to.
+        """
+
+        kind, value = self.compile(string)
+
+        if kind == ABSOLUTE:
+            return value
+
+        if now is None:
+            now = self.now()
+
+        if kind == OFFSET:
+            return now + value
+
+        key = (string.strip(), now)
+
+        with self.lock:
+            value = self.cache.get(key)
+
+        if value is None:
+            value = self._parse(string, now)
+            self._store(key, value)
+
+        return value
+
+    def timedelta(self, string):
+        """
+        :returns: The time between now and the time a timespec refers to.
+        :rtype: datetime.timedelta
+        """
+
+        # Read once, as the second may tick over between two reads
+        now = self.now()
+
+        return datetime.timedelta(seconds=self.timestamp(string, now) - now)
+
+
+timespecs = TimespecCompiler()
@@ -1,8 +1,11 @@
 from setuptools import setup, find_packages
 from icinga2client.version import version
 
+# The TLS adapter and connection timings build on urllib3's connection
+# classes, which change between major versions
 requirements = [
-    'requests',
+    'requests>=2.25,<3',
+    'urllib3>=1.26,<3',
     'docopt',
     'parsedatetime',
 ]
@@ -22,15 +25,28 @@ setup(
         'Intended Audience :: System Administrators',
         'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
         'Natural Language :: English',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12',
         'Topic :: System :: Monitoring',
     ],
     entry_points='''
     [console_scripts]
     i2=icinga2client.cli:main
+    i2d=icinga2client.daemon:main
     ''',
     packages=find_packages(),
+    # Lazy imports in icinga2client.api rely on module __getattr__ (PEP 562)
+    python_requires='>=3.7',
     # include_package_data=True,
-    install_requires=requirements
+    install_requires=requirements,
+    extras_require={
+        'async': ['aiohttp'],
+        'fast': ['orjson'],
+    }
 )
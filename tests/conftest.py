@@ -0,0 +1,30 @@
+"""
+Fixtures for the test suite, which runs against the fake API in
+:mod:`benchmarks.fake`. Run it with ``make test``, or::
+
+    python -m pytest tests
+"""
+
+import pytest
+
+from icinga2client.api import ApiClient
+
+from benchmarks.fake import FakeIcinga
+
+
+@pytest.fixture
+def fake():
+    """
+    A fresh fake API for each test, as tests change its state. Plain HTTP
+    keeps starting one cheap.
+    """
+
+    with FakeIcinga(tls=False, hosts=20, services=3, event_interval=0.05,
+                    seed=1) as server:
+        yield server
+
+
+@pytest.fixture
+def client(fake):
+    with ApiClient(fake.url) as client:
+        yield client
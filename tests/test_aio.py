@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from icinga2client.api import ApiError, filters as f
+from icinga2client.api.models import Comment
+
+pytest.importorskip('aiohttp')
+
+from icinga2client.api.aio import AsyncApiClient  # noqa: E402
+
+COMMENT = Comment('test', 'testing')
+
+
+def run(fake, fn, **options):
+    async def main():
+        async with AsyncApiClient(fake.url, **options) as client:
+            return await fn(client)
+
+    return asyncio.run(main())
+
+
+def test_concurrent_actions(fake):
+    names = ['host-{:05d}'.format(i) for i in range(10)]
+
+    async def schedule(client):
+        return await asyncio.gather(*[
+            client.schedule_downtime('Host', f.host(name), 'now',
+                                     '+2 hours', COMMENT)
+            for name in names])
+
+    responses = run(fake, schedule, concurrency=3)
+
+    assert [r['results'][0]['code'] for r in responses] == [200] * 10
+    assert sorted(d['host_name'] for d in
+                  fake.inventory.objects['Downtime'].values()) == names
+
+
+def test_error_status_raises(fake):
+    async def acknowledge(client):
+        return await client.acknowledge_problem(
+            'Host', f.host('missing'), COMMENT)
+
+    with pytest.raises(ApiError) as raised:
+        run(fake, acknowledge)
+
+    assert raised.value.status_code == 404
@@ -0,0 +1,67 @@
+import io
+import sys
+
+import pytest
+
+from icinga2client.cli.batch import BatchRunner, open_input, read_items
+from icinga2client.helpers.data import FriendlyArguments
+
+OPTIONS = {'author': 'test', 'comment': 'testing', 'start': 'now',
+           'end': '+2 hours', 'duration': None}
+
+
+def run(client, action, options, lines):
+    runner = BatchRunner(client, action, options)
+    return list(runner.run(read_items(lines)))
+
+
+def downtimes(fake):
+    return sorted(d['host_name'] for d in
+                  fake.inventory.objects['Downtime'].values())
+
+
+def test_removal_ignores_overrides(fake, client):
+    run(client, 'schedule_downtime', OPTIONS, ['host-00000', 'host-00001'])
+
+    results = run(client, 'remove_downtime', {}, [
+        '{"host": "host-00000", "comment": "Done"}',
+        'host-00001',
+    ])
+
+    assert [r['code'] for r in results] == [200, 200]
+    assert downtimes(fake) == []
+
+
+def test_overrides_apply_per_line(fake, client):
+    results = run(client, 'schedule_downtime', OPTIONS, [
+        '{"host": "host-00000", "comment": "Custom"}',
+        'host-00001',
+    ])
+
+    assert [r['code'] for r in results] == [200, 200]
+
+    comments = dict((d['host_name'], d['comment']) for d in
+                    fake.inventory.objects['Downtime'].values())
+    assert comments == {'host-00000': 'Custom', 'host-00001': 'testing'}
+
+
+def test_missing_input_file_exits(tmpdir):
+    path = str(tmpdir.join('missing.txt'))
+    args = FriendlyArguments({'--stdin': False, '--from-file': path})
+
+    with pytest.raises(SystemExit) as raised:
+        open_input(args)
+
+    assert str(raised.value).startswith('Could not read ' + path)
+
+
+def test_stdin_is_left_open(monkeypatch):
+    stdin = io.StringIO('host-00000\n')
+    monkeypatch.setattr(sys, 'stdin', stdin)
+    args = FriendlyArguments({'--stdin': True, '--from-file': None})
+
+    with open_input(args) as lines:
+        assert [item.target.host for item in read_items(lines)] == \
+            ['host-00000']
+
+    assert not stdin.closed
@@ -0,0 +1,75 @@
+import pytest
+
+from icinga2client.api import Comment
+from icinga2client.api.bulk import BulkActions, object_name
+from icinga2client.api.models import Target
+
+COMMENT = Comment('test', 'testing')
+
+
+def add_host(fake, name, state):
+    hosts = fake.inventory.objects['Host']
+    hosts[name] = dict(hosts['host-00000'], __name=name, name=name,
+                       state=float(state))
+
+
+@pytest.mark.parametrize('status, expected', [
+    ("Successfully acknowledged problem for object 'web1'.", 'web1'),
+    ("Successfully scheduled downtime 'web10!abc' for object 'web1'.",
+     'web1'),
+    ('Host web10 is UP.', 'web10'),
+    ('Host web1 is UP.', 'web1'),
+    ('Service web1!http is OK.', 'web1!http'),
+    ("Object 'web10' is already acknowledged.", 'web10'),
+    ('Something about web10 happened.', 'web10'),
+    ('Something about web1.', 'web1'),
+    ('Something about web100.', None),
+])
+def test_object_name(status, expected):
+    names = ['web1', 'web10', 'web1!http']
+
+    assert object_name(status, names) == expected
+
+
+def test_results_are_matched_by_whole_name(fake, client):
+    # web10 is answered first, and is OK, so can't be acknowledged
+    add_host(fake, 'web10', 0)
+    add_host(fake, 'web1', 1)
+
+    targets = [Target('Host', 'web1'), Target('Host', 'web10')]
+    results = BulkActions(client).acknowledge_problem(targets, COMMENT)
+
+    codes = dict((r.target.name, (r.code, r.status)) for r in results)
+    assert codes['web1'][0] == 200
+    assert codes['web10'] == (409, 'Host web10 is UP.')
+
+
+def test_every_target_gets_a_result(fake, client):
+    services = fake.inventory.objects['Service']
+    names = sorted(services)[:30]
+    targets = [Target('Service', *name.split('!')) for name in names]
+    targets.append(Target('Service', 'missing', 'svc-0'))
+
+    # Small enough to need several requests
+    bulk = BulkActions(client, max_body_size=256)
+    assert len(list(bulk.plan(targets))) > 1
+
+    results = dict((r.target.name, r) for r in
+                   bulk.acknowledge_problem(targets, COMMENT))
+
+    assert sorted(results) == sorted(names + ['missing!svc-0'])
+    assert results['missing!svc-0'].code == 404
+
+    for name in names:
+        expected = 200 if services[name]['state'] else 409
+        assert results[name].code == expected, name
+
+
+def test_failed_request_is_attributed_to_every_target(fake, client):
+    fake.failure_rate = 1
+    fake.failure_status = 500
+    targets = [Target('Host', 'host-00000'), Target('Host', 'host-00001')]
+
+    results = BulkActions(client).remove_downtime(targets)
+
+    assert [r.code for r in results] == [500, 500]
@@ -0,0 +1,144 @@
+import pytest
+
+from icinga2client.api import ApiClient, filters as f
+from icinga2client.api.cache import ObjectCache, QueryCache
+
+SERVICE = 'host-00001!svc-1'
+
+
+@pytest.fixture
+def cache(client):
+    cache = ObjectCache(client)
+
+    cache.get('Host', 'host-00001')
+    cache.get('Service', SERVICE)
+    cache.hosts_in_group('group-1')
+    cache.services_on_host('host-00001')
+
+    return cache
+
+
+def cached(cache):
+    return sorted(key[:2] if key[0] == 'query' else key
+                  for key, stored, value in cache.store.items())
+
+
+def event(event_type, host, service=None, **fields):
+    fields.update(type=event_type, host=host)
+    if service:
+        fields['service'] = service
+    return fields
+
+
+def test_check_results_invalidate_nothing(cache):
+    before = cached(cache)
+
+    cache.apply_event(event('CheckResult', 'host-00001', 'svc-1',
+                            check_result={'state': 2}))
+
+    assert cached(cache) == before
+
+
+def test_service_state_change(cache):
+    cache.apply_event(event('StateChange', 'host-00001', 'svc-1', state=2))
+    keys = cached(cache)
+
+    assert ('object', 'Service', SERVICE) not in keys
+    assert ('query', 'Service') not in keys
+    assert ('object', 'Service', 'host-00001!svc-2') in keys
+    assert ('object', 'Host', 'host-00001') in keys
+    assert ('query', 'Host') in keys
+
+
+def test_host_state_change(cache):
+    cache.apply_event(event('StateChange', 'host-00001', state=1))
+    keys = cached(cache)
+
+    assert ('object', 'Host', 'host-00001') not in keys
+    assert ('query', 'Host') not in keys
+    assert ('query', 'Service') not in keys
+    assert ('object', 'Service', SERVICE) in keys
+    assert ('object', 'Host', 'host-00011') in keys
+
+
+def test_acknowledgement(cache):
+    cache.apply_event(event('AcknowledgementSet', 'host-00002'))
+
+    assert ('object', 'Host', 'host-00001') in cached(cache)
+    assert ('query', 'Host') not in cached(cache)
+
+
+@pytest.mark.parametrize('downtime_event', [
+    {'type': 'DowntimeAdded',
+     'downtime': {'host_name': 'host-00001', 'service_name': 'svc-1'}},
+    {'type': 'DowntimeRemoved', 'names': [SERVICE + '!0123']},
+])
+def test_downtime(cache, downtime_event):
+    cache.apply_event(downtime_event)
+
+    assert ('object', 'Service', SERVICE) not in cached(cache)
+    assert ('object', 'Host', 'host-00001') in cached(cache)
+
+
+def test_queries_are_refetched(fake, cache):
+    fake.inventory.objects['Service'][SERVICE]['state'] = 2.0
+    object_filter = f.attr('service.state').not_equals(0)
+
+    stale = [attrs['__name'] for attrs in cache.query('Service',
+                                                      object_filter)]
+    assert SERVICE in stale
+
+    fake.inventory.objects['Service'][SERVICE]['state'] = 0.0
+    cache.apply_event(event('StateChange', 'host-00001', 'svc-1', state=0))
+
+    assert SERVICE not in [attrs['__name'] for attrs in
+                           cache.query('Service', object_filter)]
+
+
+def test_problem_index_applies_check_results(fake, cache):
+    services = fake.inventory.objects['Service']
+    index = cache.problems(refresh=True)
+    name = next(name for name in sorted(services)
+                if not services[name]['state'])
+    host, service = name.split('!')
+
+    services[name]['state'] = 2.0
+    cache.apply_event(event('CheckResult', host, service,
+                            check_result={'state': 2}))
+
+    assert name in index.problems
+
+
+def test_snapshot_keeps_queries_invalidatable(tmpdir, client, cache):
+    path = str(tmpdir.join('cache.json'))
+    cache.save(path)
+
+    restored = ObjectCache(client, snapshot_path=path)
+    restored.apply_event(event('StateChange', 'host-00001', 'svc-1'))
+
+    assert ('query', 'Service') not in cached(restored)
+    assert ('query', 'Host') in cached(restored)
+
+
+def query_twice(fake, query_cache):
+    sent = []
+
+    with ApiClient(fake.url, query_cache=query_cache) as client:
+        client.hooks.after(sent.append)
+        first = [host.name for host in client.hosts()]
+        second = [host.name for host in client.hosts()]
+
+    assert first == second
+    return len(sent)
+
+
+def test_query_results_are_reused(fake):
+    assert query_twice(fake, QueryCache()) == 1
+
+
+def test_results_too_large_are_not_kept(fake):
+    query_cache = QueryCache(max_bytes=1024)
+
+    assert query_twice(fake, query_cache) == 2
+    assert len(query_cache) == 0
+    assert query_cache.stats['too_large'] == 2
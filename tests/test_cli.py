@@ -0,0 +1,51 @@
+"""
+Commands run through :func:`icinga2client.cli.execute`, configured from an
+``.i2rc`` written for each test.
+"""
+
+import json
+import os
+
+import pytest
+
+from icinga2client.cli import DeferredClient, execute
+from icinga2client.config import Config
+
+from benchmarks.fake import FakeIcinga
+
+PROBLEMS = {'<command>': 'problems', '<arguments>': [],
+            '--porcelain': False, '--stats': False}
+
+
+@pytest.fixture(scope='module')
+def tls_fake():
+    with FakeIcinga(host='localhost', hosts=2, services=1) as server:
+        yield server
+
+
+def configure(tmp_path, **options):
+    path = tmp_path / 'i2rc'
+    path.write_text(json.dumps(options))
+    return Config(str(path))
+
+
+def test_unverified_certificate_points_to_ca(tls_fake, tmp_path):
+    config = configure(tmp_path, url=tls_fake.url, username='root',
+                       password='secret')
+
+    with DeferredClient(config) as client:
+        with pytest.raises(SystemExit) as raised:
+            execute(client, PROBLEMS)
+
+    assert 'Could not verify' in str(raised.value)
+    assert '"ca"' in str(raised.value)
+
+
+def test_ca_verifies_certificate(tls_fake, tmp_path):
+    config = configure(tmp_path, url=tls_fake.url, username='root',
+                       password='secret',
+                       ca=os.path.join(tls_fake.directory, 'cert.pem'))
+
+    with DeferredClient(config) as client:
+        execute(client, PROBLEMS)
+        assert client.object_cache.problems() is not None
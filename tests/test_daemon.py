@@ -0,0 +1,68 @@
+import os
+import socket
+import stat
+import threading
+import time
+
+import pytest
+
+from icinga2client import daemon
+
+
+def serve(path):
+    thread = threading.Thread(target=daemon.Daemon(path).serve)
+    thread.start()
+
+    deadline = time.time() + 5
+    while not os.path.exists(path) and time.time() < deadline:
+        time.sleep(0.01)
+
+    return thread
+
+
+@pytest.fixture
+def path(tmpdir):
+    path = str(tmpdir.join('i2d', 'i2d.sock'))
+    thread = serve(path)
+
+    yield path
+
+    daemon.send(path, {'stop': True})
+    thread.join(5)
+
+
+@pytest.mark.skipif(not hasattr(socket, 'SO_PEERCRED'),
+                    reason='SO_PEERCRED is not supported')
+def test_peer_uid():
+    left, right = socket.socketpair(socket.AF_UNIX)
+
+    with left, right:
+        assert daemon.peer_uid(left) == os.getuid()
+
+
+def test_socket_is_private(path):
+    mode = os.stat(path).st_mode
+
+    assert stat.S_ISSOCK(mode)
+    assert stat.S_IMODE(mode) == 0o600
+
+
+def test_ping(path):
+    assert daemon.send(path, {'ping': True}) == {'pong': True}
+
+
+def test_other_users_are_refused(path, monkeypatch):
+    monkeypatch.setattr(daemon, 'peer_uid', lambda conn: os.getuid() + 1)
+
+    assert daemon.send(path, {'ping': True}) is None
+
+
+def test_stop_removes_socket(tmpdir):
+    path = str(tmpdir.join('i2d.sock'))
+    thread = serve(path)
+
+    assert daemon.send(path, {'stop': True}) == {'stopped': True}
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert not os.path.exists(path)
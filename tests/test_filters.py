@@ -0,0 +1,133 @@
+import pytest
+
+from icinga2client.api import filters as f
+
+
+@pytest.mark.parametrize('value, rendered', [
+    ('web01', '"web01"'),
+    ('say "hi"', r'"say \"hi\""'),
+    ('C:\\temp', r'"C:\\temp"'),
+    ('two\nlines\ttab', r'"two\nlines\ttab"'),
+    (None, 'null'),
+    (True, 'true'),
+    (3, '3'),
+    (['a', 1], '["a", 1]'),
+])
+def test_literal(value, rendered):
+    assert f.literal(value) == rendered
+
+
+def test_compile_moves_values_into_filter_vars():
+    expression = f.host_in(['web01', 'web02']) & \
+        ~f.attr('service.name').equals('ping')
+
+    text, filter_vars = expression.compile()
+
+    assert text == 'host.name in v0 && !(service.name == v1)'
+    assert filter_vars == {'v0': ['web01', 'web02'], 'v1': 'ping'}
+
+
+def test_nested_combinations_are_parenthesized():
+    expression = f.host('a') & (f.host('b') | f.host('c'))
+
+    assert str(expression) == \
+        'host.name == "a" && (host.name == "b" || host.name == "c")'
+
+
+@pytest.mark.parametrize('expression, rendered', [
+    (f.all_of('a || b', f.host('c')), '(a || b) && host.name == "c"'),
+    (f.any_of('a && b', 'c'), '(a && b) || (c)'),
+    (f.all_of('a', ~f.as_expression('b || c')), '(a) && !(b || c)'),
+    (f.host('a') & f.attr('host.groups').matches('web*') |
+     f.attr('host.name').in_(['b']),
+     '(host.name == "a" && match("web*", host.groups)) || '
+     'host.name in ["b"]'),
+])
+def test_precedence(expression, rendered):
+    assert str(expression) == rendered
+
+
+def test_precedence_is_kept_by_the_api(fake, client):
+    # Without parentheses, this would match every host in group-1
+    expression = f.all_of('host.name == "host-00001" || '
+                          'host.name == "host-00002"',
+                          f.hostgroup('group-1'))
+
+    assert [r.name for r in client.query_objects('Host', expression)] == \
+        ['host-00001']
+
+
+def test_same_combinations_are_flattened():
+    expression = f.host('a') & f.host('b') & f.host('c')
+
+    assert len(expression.expressions) == 3
+
+
+def test_compile_sorts_sets():
+    text, filter_vars = f.host_in({'b', 'a', 'c'}).compile()
+
+    assert filter_vars == {'v0': ['a', 'b', 'c']}
+    assert str(f.host_in({'b', 'a'})) == 'host.name in ["a", "b"]'
+
+
+def test_parameters_merges_filter_vars():
+    expression = f.all_of('host.vars.os == os', f.host('web01'))
+
+    assert f.parameters(expression, {'os': 'linux'}) == {
+        'filter': '(host.vars.os == os) && host.name == v0',
+        'filter_vars': {'v0': 'web01', 'os': 'linux'},
+    }
+
+
+def test_parameters_refuses_clashing_filter_vars():
+    expression = f.all_of('host.vars.os == v0', f.host('web01'))
+
+    with pytest.raises(ValueError):
+        f.parameters(expression, {'v0': 'linux'})
+
+
+def test_parameters_of_text():
+    assert f.parameters('host.name == "a"') == \
+        {'filter': 'host.name == "a"', 'filter_vars': None}
+
+
+@pytest.mark.parametrize('expression, expected', [
+    (f.host('web01'), True),
+    (f.host('web02'), False),
+    (f.hostgroup('web'), True),
+    (f.attr('host.vars.os').equals('linux'), True),
+    (f.attr('host.vars.missing').equals(None), True),
+    (f.attr('host.name').matches('web*'), True),
+    (f.attr('host.groups').matches('d?'), True),
+    (f.attr('host.state').less_than(1), True),
+    (f.attr('host.state').less_than(None), False),
+    (~f.host('web01') | f.hostgroup('db'), True),
+])
+def test_evaluate(expression, expected):
+    scope = {'host': {'name': 'web01', 'groups': ['web', 'db'], 'state': 0,
+                      'vars': {'os': 'linux'}}}
+
+    assert expression.evaluate(scope) is expected
+
+
+def test_evaluate_missing_attribute():
+    with pytest.raises(LookupError):
+        f.attr('host.address').equals('::1').evaluate({'host': {}})
+
+
+def test_evaluate_raw():
+    with pytest.raises(ValueError):
+        f.as_expression('host.name == "a"').evaluate({'host': {}})
+
+
+@pytest.mark.parametrize('name', [
+    'quote"d', 'back\\slash', 'new\nline', 'tab\tbed', '$dollar{1}',
+])
+def test_quoted_names_match_exactly(fake, client, name):
+    hosts = fake.inventory.objects['Host']
+    hosts[name] = dict(hosts['host-00000'], __name=name, name=name)
+
+    inline = [r.name for r in client.query_objects('Host', str(f.host(name)))]
+    compiled = [r.name for r in client.query_objects('Host', f.host(name))]
+
+    assert inline == compiled == [name]
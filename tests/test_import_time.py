@@ -0,0 +1,20 @@
+"""
+``import icinga2client.cli`` stays under the threshold in
+:mod:`benchmarks.import_time`, without importing the modules it defers.
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_time_under_threshold():
+    process = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.import_time'], cwd=ROOT,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert 'threshold' in process.stdout
@@ -0,0 +1,142 @@
+import json
+import os
+
+import pytest
+
+from icinga2client.api.journal import Journal
+from icinga2client.cli.batch import (BatchRunner, print_results, read_items,
+                                     rollback)
+
+OPTIONS = {'author': 'test', 'comment': 'testing', 'start': 'now',
+           'end': '+2 hours', 'duration': None}
+
+
+@pytest.fixture
+def journal(tmpdir):
+    with Journal(str(tmpdir.join('i2', 'journal'))) as journal:
+        yield journal
+
+
+def schedule(client, journal, lines, resume=False):
+    runner = BatchRunner(client, 'schedule_downtime', OPTIONS,
+                         journal=journal, resume=resume)
+    return list(runner.run(read_items(lines)))
+
+
+def downtimes(fake):
+    return sorted(d['host_name'] for d in
+                  fake.inventory.objects['Downtime'].values())
+
+
+def test_records_survive_a_truncated_line(journal):
+    run = journal.start('schedule_downtime', OPTIONS)
+    journal.result(run, 'web01', 200)
+    journal.sync()
+
+    with open(journal.run_path(run), 'a') as fh:
+        fh.write('{"event": "res')
+
+    assert [r['event'] for r in journal.records(run)] == ['run', 'result']
+
+
+def test_resume_skips_succeeded_targets(fake, client, journal):
+    first = schedule(client, journal, ['host-00000', 'host-00001'])
+    assert [r['code'] for r in first] == [200, 200]
+
+    results = schedule(client, journal, ['host-00000', 'host-00001',
+                                         'host-00002'], resume=True)
+
+    codes = dict((r['host'], (r['code'], r['status'])) for r in results)
+    assert codes['host-00002'][0] == 200
+    assert codes['host-00000'][1].startswith('Skipped')
+    assert codes['host-00001'][1].startswith('Skipped')
+    assert downtimes(fake) == ['host-00000', 'host-00001', 'host-00002']
+
+
+def test_resume_retries_failed_targets(fake, client, journal):
+    schedule(client, journal, ['host-00000', 'missing'])
+    results = schedule(client, journal, ['host-00000', 'missing'],
+                       resume=True)
+
+    statuses = dict((r['host'], r['status']) for r in results)
+    assert statuses['host-00000'].startswith('Skipped')
+    assert not statuses['missing'].startswith('Skipped')
+
+
+def test_rollback_removes_created_downtimes(fake, client, journal):
+    schedule(client, journal, ['host-00000', 'host-00001,svc-1'])
+    assert downtimes(fake) == ['host-00000', 'host-00001']
+
+    results = list(rollback(client, journal, 'schedule_downtime'))
+
+    assert sorted(r['code'] for r in results) == [200, 200]
+    assert downtimes(fake) == []
+
+    # Rolling back twice has nothing left to do
+    assert list(rollback(client, journal, 'schedule_downtime')) == []
+
+
+def test_rollback_of_removed_downtimes_succeeds(fake, client, journal,
+                                                capsys):
+    schedule(client, journal, ['host-00000'])
+    fake.inventory.objects['Downtime'].clear()
+
+    results = list(rollback(client, journal, 'schedule_downtime'))
+
+    assert [(r['code'], r['status']) for r in results] == \
+        [(404, 'Already removed')]
+    assert print_results(results, ok_codes=[404])
+    assert not print_results(results)
+
+
+def test_rollback_removes_acknowledgements(fake, client, journal):
+    services = fake.inventory.objects['Service']
+    problem = next(name for name, attrs in sorted(services.items())
+                   if attrs['state'])
+    host, service = problem.split('!')
+
+    runner = BatchRunner(client, 'acknowledge_problem',
+                         {'author': 'test', 'comment': 'testing'},
+                         journal=journal)
+    results = list(runner.run(read_items(['{},{}'.format(host, service)])))
+    assert results[0]['code'] == 200
+    assert services[problem]['acknowledgement']
+
+    list(rollback(client, journal, 'acknowledge_problem'))
+
+    assert not services[problem]['acknowledgement']
+
+
+def test_journal_lines_are_json(fake, client, journal):
+    schedule(client, journal, ['host-00000'])
+    journal.close()
+
+    run = journal.latest('schedule_downtime')
+    with open(journal.run_path(run)) as fh:
+        events = [json.loads(line)['event'] for line in fh]
+
+    assert events == ['run', 'planned', 'result']
+
+
+def test_runs_are_kept_apart(journal):
+    first = journal.start('schedule_downtime', OPTIONS)
+    journal.result(first, 'web01', 200, name='web01!a')
+    second = journal.start('acknowledge_problem', OPTIONS)
+    journal.result(second, 'web02', 200)
+    journal.removed(first, 'web01!a')
+
+    assert journal.latest('schedule_downtime') == first
+    assert journal.latest('acknowledge_problem') == second
+    assert list(journal.replay(first).results) == ['web01']
+    assert journal.replay(first).created == []
+    assert list(journal.replay(second).results) == ['web02']
+
+
+def test_old_runs_are_pruned(tmpdir):
+    with Journal(str(tmpdir.join('journal')), keep=2) as journal:
+        runs = [journal.start('schedule_downtime', OPTIONS)
+                for _ in range(3)]
+
+        assert [entry['run'] for entry in journal.runs()] == runs[1:]
+        assert not os.path.exists(journal.run_path(runs[0]))
+        assert os.path.exists(journal.run_path(runs[2]))
@@ -0,0 +1,92 @@
+import os
+import threading
+
+from icinga2client.api import ApiClient, filters as f
+from icinga2client.api.executor import Call, ParallelExecutor
+from icinga2client.api.metrics import Metrics
+from icinga2client.helpers.timespec import timespecs
+
+from benchmarks.fake import FakeIcinga
+
+
+def counters(metrics):
+    return dict((name, value) for (name, labels), value
+                in metrics.snapshot()[1])
+
+
+def requests(metrics):
+    return sum(value for (name, labels), value in metrics.snapshot()[1]
+               if name == 'requests_total')
+
+
+def test_only_the_commands_requests_are_recorded(client):
+    metrics = Metrics(thread=threading.current_thread()).install(client)
+
+    # Another thread sharing the client, as i2d's event follower does
+    other = threading.Thread(target=lambda: list(client.hosts()))
+    other.start()
+    other.join()
+
+    assert requests(metrics) == 0
+
+    list(client.hosts())
+    assert requests(metrics) == 1
+
+    # Workers act on behalf of the thread which started them
+    ParallelExecutor(max_workers=2).run([
+        Call(client.remove_acknowledgement, 'Host', f.host(name))
+        for name in ['host-00001', 'host-00002', 'host-00003']])
+    assert requests(metrics) == 4
+
+
+def test_every_request_is_recorded_by_default(client):
+    metrics = Metrics().install(client)
+
+    other = threading.Thread(target=lambda: list(client.hosts()))
+    other.start()
+    other.join()
+
+    assert requests(metrics) == 1
+
+
+def test_process_counters_start_from_zero():
+    timespecs.timestamp('+17 minutes')
+    metrics = Metrics()
+
+    assert counters(metrics)['timespec_cache_misses_total'] == 0
+    assert counters(metrics)['timespec_cache_hits_total'] == 0
+
+    timespecs.timestamp('+17 minutes')
+    timespecs.timestamp('+18 minutes')
+
+    assert counters(metrics)['timespec_cache_misses_total'] == 1
+    assert counters(metrics)['timespec_cache_hits_total'] == 1
+
+
+def test_new_connections_are_timed(fake):
+    events = []
+
+    with ApiClient(fake.url) as client:
+        client.hooks.after(events.append)
+        list(client.hosts())
+        list(client.hosts())
+
+    opened, reused = [event.timings for event in events]
+
+    assert set(opened) >= {'dns', 'connect', 'response', 'total'}
+    assert 'tls' not in opened
+    assert not set(reused) & {'dns', 'connect', 'tls'}
+
+
+def test_tls_handshakes_are_timed():
+    events = []
+
+    with FakeIcinga(host='localhost', hosts=1, services=0) as server:
+        ca = os.path.join(server.directory, 'cert.pem')
+
+        with ApiClient(server.url, verify=ca) as client:
+            client.hooks.after(events.append)
+            list(client.hosts())
+
+    assert events[0].error is None
+    assert events[0].timings['tls'] > 0
@@ -0,0 +1,146 @@
+import time
+
+import pytest
+
+from icinga2client.api.multi import MultiEndpointClient
+from icinga2client.api.policy import RequestPolicy
+
+from benchmarks.fake import FakeIcinga
+
+
+@pytest.fixture
+def dead():
+    """
+    The URL of an endpoint which is down, and a way to bring it back up.
+    """
+
+    server = FakeIcinga(tls=False, hosts=20, services=3).start()
+    port = server.server.server_address[1]
+    server.stop()
+
+    revived = []
+
+    def revive():
+        revived.append(FakeIcinga(tls=False, port=port, hosts=20,
+                                  services=3).start())
+        return revived[-1]
+
+    revive.url = 'http://127.0.0.1:{}'.format(port)
+    yield revive
+
+    for server in revived:
+        server.stop()
+
+
+@pytest.fixture
+def client(fake, dead):
+    # Slow enough backoff that retrying the dead endpoint would show
+    policy = RequestPolicy(retries=2, retry_backoff=5)
+
+    with MultiEndpointClient([dead.url, fake.url], policy=policy) as client:
+        yield client
+
+
+def hosts(client):
+    return len(list(client.query_objects('Host', attrs=['name'])))
+
+
+def test_construct():
+    with MultiEndpointClient(['https://a:5665', 'https://b:5665'],
+                             verify='/etc/ssl/ca.pem') as client:
+        assert client.request_parameters['verify'] == '/etc/ssl/ca.pem'
+        assert [e.uri for e in client.endpoints] == ['https://a:5665',
+                                                     'https://b:5665']
+
+    with pytest.raises(ValueError):
+        MultiEndpointClient([])
+
+
+def test_fails_over_without_retrying(client):
+    started = time.time()
+
+    assert hosts(client) == 20
+    assert time.time() - started < 2
+
+    dead, alive = client.endpoints
+    assert (dead.healthy, dead.failures) == (False, 1)
+    assert alive.healthy
+
+
+def test_actions_fail_over_when_not_sent(client, fake):
+    # Host state 1 can be acknowledged, and isn't idempotent
+    from icinga2client.api import Comment, filters as f
+
+    name = next(name for name, attrs in
+                sorted(fake.inventory.objects['Host'].items())
+                if attrs['state'])
+
+    response = client.acknowledge_problem('Host', f.host(name),
+                                          Comment('test', 'testing'))
+
+    assert response['results'][0]['code'] == 200
+    assert not client.endpoints[0].healthy
+
+
+def test_unhealthy_endpoints_are_tried_last(client):
+    hosts(client)
+    dead, alive = client.endpoints
+
+    assert client.candidates('get', 'objects/hosts') == [alive, dead]
+
+
+def test_last_endpoint_is_retried(dead):
+    policy = RequestPolicy(retries=2, retry_backoff=0.01)
+
+    with MultiEndpointClient([dead.url], policy=policy) as client:
+        with pytest.raises(Exception):
+            hosts(client)
+
+        assert client.endpoints[0].failures == 1
+
+
+def test_recovers_on_health_check(client, dead):
+    hosts(client)
+    endpoint = client.endpoints[0]
+
+    assert not client.check(endpoint, timeout=1)
+
+    dead()
+
+    assert client.check(endpoint, timeout=1)
+    assert endpoint.healthy and endpoint.failures == 0
+
+
+def test_recovers_in_background(client, dead):
+    hosts(client)
+    client.start_health_checks(interval=0.05, timeout=1)
+    dead()
+
+    deadline = time.time() + 5
+    while not client.endpoints[0].healthy and time.time() < deadline:
+        time.sleep(0.05)
+
+    assert client.endpoints[0].healthy
+
+
+def test_recovers_when_tried_as_last_resort(client, dead, fake):
+    hosts(client)
+    dead()
+    fake.stop()
+    # Keep-alive connections outlive the server
+    client.close()
+
+    assert hosts(client) == 20
+    assert client.endpoints[0].healthy
+    assert not client.endpoints[1].healthy
+
+
+def test_health_checks_survive_changing_tls_options(client):
+    client.start_health_checks(interval=60)
+    checker = client._checker
+
+    client.set_request_option('verify', False)
+    client.authenticate(method='certificate', cert='/tmp/client.pem',
+                        key='/tmp/client.key')
+
+    assert client._checker is checker and checker.is_alive()
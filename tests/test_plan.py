@@ -0,0 +1,65 @@
+import pytest
+
+from icinga2client.api import filters as f
+from icinga2client.api.cache import ObjectCache
+from icinga2client.api.plan import Planner
+
+REQUESTS = [
+    ('Host', f.host('host-00003')),
+    ('Host', f.hostgroup('group-2')),
+    ('Service', f.hostgroup('group-2')),
+    ('Service', f.service('host-00001', 'svc-2')),
+    ('Service', f.attr('service.state').not_equals(0)),
+    ('Service', f.host_in(['host-00001', 'host-00002']) &
+     ~f.attr('service.name').equals('svc-0')),
+]
+
+
+@pytest.fixture
+def cache(client):
+    return ObjectCache(client)
+
+
+def expected(fake, object_type, expression):
+    return sorted(attrs['__name'] for attrs in
+                  fake.inventory.select(object_type, *expression.compile()))
+
+
+@pytest.mark.parametrize('object_type, expression', REQUESTS)
+def test_index_matches_api(fake, cache, object_type, expression):
+    plan = Planner(cache, build_index=True,
+                   sample_size=100).plan(object_type, expression)
+
+    assert plan.source == 'index'
+    assert plan.sample == expected(fake, object_type, expression)
+    assert plan.count == len(plan.sample)
+
+
+@pytest.mark.parametrize('object_type, expression', REQUESTS)
+def test_query_matches_api(fake, cache, object_type, expression):
+    plan = Planner(cache, sample_size=100).plan(object_type, expression)
+
+    assert plan.source == 'query'
+    assert plan.sample == expected(fake, object_type, expression)
+
+
+def test_unindexed_attributes_are_queried(cache):
+    plan = Planner(cache, build_index=True).plan(
+        'Host', f.attr('host.vars.os').equals('windows'))
+
+    assert plan.source == 'query'
+    assert plan.count == 7
+
+
+def test_text_filters_are_queried(cache):
+    plan = Planner(cache, build_index=True).plan_all(
+        [('Host', 'host.name == "host-00001"')])[0]
+
+    assert (plan.source, plan.count) == ('query', 1)
+
+
+def test_sample_is_limited(cache):
+    plan = Planner(cache, sample_size=2).plan('Service', None)
+
+    assert plan.count == 60
+    assert len(plan.sample) == 2
@@ -0,0 +1,55 @@
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from icinga2client.api.policy import RequestPolicy
+
+QUERY = ('post', 'objects/hosts', {'X-HTTP-Method-Override': 'GET'})
+SCHEDULE = ('post', 'actions/schedule-downtime', {})
+REMOVE = ('post', 'actions/remove-downtime', {})
+
+REFUSED = requests.exceptions.ConnectionError(
+    MaxRetryError(None, '/', NewConnectionError(None, 'refused')))
+RESET = requests.exceptions.ConnectionError('Connection reset by peer')
+UNVERIFIED = requests.exceptions.SSLError('CERTIFICATE_VERIFY_FAILED')
+
+
+@pytest.fixture
+def policy():
+    return RequestPolicy(retries=2)
+
+
+@pytest.mark.parametrize('request_args, idempotent', [
+    (QUERY, True),
+    (('get', 'status', None), True),
+    (SCHEDULE, False),
+    (REMOVE, True),
+    (('post', '/actions/remove-acknowledgement/', {}), True),
+])
+def test_idempotent(request_args, idempotent):
+    assert RequestPolicy.idempotent(*request_args) is idempotent
+
+
+@pytest.mark.parametrize('request_args, outcome, retried', [
+    (QUERY, {'status': 500}, True),
+    (QUERY, {'status': 404}, False),
+    (QUERY, {'error': RESET}, True),
+    (SCHEDULE, {'status': 500}, False),
+    (SCHEDULE, {'error': RESET}, False),
+    (SCHEDULE, {'error': REFUSED}, True),
+    (SCHEDULE, {'status': 503}, True),
+    (SCHEDULE, {'status': 429}, True),
+    (REMOVE, {'status': 502}, True),
+])
+def test_should_retry(policy, request_args, outcome, retried):
+    assert policy.should_retry(0, *request_args, **outcome) is retried
+
+
+def test_retries_are_limited(policy):
+    assert policy.should_retry(1, *QUERY, status=503)
+    assert not policy.should_retry(2, *QUERY, status=503)
+
+
+@pytest.mark.parametrize('request_args', [QUERY, SCHEDULE, REMOVE])
+def test_tls_errors_are_not_retried(policy, request_args):
+    assert not policy.should_retry(0, *request_args, error=UNVERIFIED)
@@ -0,0 +1,71 @@
+import pytest
+
+from icinga2client.api.problems import ProblemIndex
+
+
+def problems(fake, **conditions):
+    services = fake.inventory.objects['Service']
+
+    return sorted(name for name, attrs in services.items()
+                  if attrs['state'] and all(attrs[key] == value for
+                                            key, value in conditions.items()))
+
+
+@pytest.fixture
+def index(client):
+    return ProblemIndex.build(client)
+
+
+def test_build_holds_every_problem(fake, index):
+    assert [p['name'] for p in index.select()] == problems(fake)
+
+
+def test_select_by_state_and_group(fake, index):
+    services = fake.inventory.objects['Service']
+    name = problems(fake)[0]
+    attrs = services[name]
+
+    selected = index.select(states=[int(attrs['state'])],
+                            servicegroup=attrs['groups'][0])
+
+    assert name in [p['name'] for p in selected]
+    assert all(p['state'] == attrs['state'] for p in selected)
+    assert index.select(host='missing') == []
+
+
+def test_recovery_removes_problem(fake, index):
+    name = problems(fake)[0]
+    host, service = name.split('!')
+
+    index.apply_event({'type': 'CheckResult', 'host': host,
+                       'service': service, 'check_result': {'state': 0}})
+
+    assert name not in [p['name'] for p in index.select()]
+
+
+def test_acknowledgement_is_applied(fake, index):
+    name = problems(fake)[0]
+    host, service = name.split('!')
+
+    index.apply_event({'type': 'AcknowledgementSet', 'host': host,
+                       'service': service})
+
+    assert [p['name'] for p in index.select(acknowledged=True)] == [name]
+    assert name not in [p['name'] for p in index.select(unhandled=True)]
+
+
+def test_new_problem_is_fetched(fake, index):
+    name = 'host-00000!svc-0'
+    fake.inventory.objects['Service'][name]['state'] = 2.0
+
+    index.apply_event({'type': 'StateChange', 'host': 'host-00000',
+                       'service': 'svc-0', 'state': 2})
+
+    assert name in [p['name'] for p in index.select(states=[2])]
+
+
+def test_round_trips_through_data(client, index):
+    restored = ProblemIndex.from_data(client, index.to_data())
+
+    assert restored.select() == index.select()
+    assert restored.fetched == index.fetched
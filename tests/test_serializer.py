@@ -0,0 +1,42 @@
+import pytest
+
+from icinga2client.helpers.serializer import SERIALIZERS, get_serializer
+
+VALUE = {'name': 'café', 'state': 2.0, 'vars': {'os': 'linux'},
+         'groups': ['web', 'db'], 'acknowledgement': None, 'ok': True}
+
+
+@pytest.fixture(params=sorted(SERIALIZERS))
+def serializer(request):
+    try:
+        return get_serializer(request.param)
+    except ImportError:
+        pytest.skip('{} is not installed'.format(request.param))
+
+
+def test_round_trip(serializer):
+    encoded = serializer.dumps(VALUE)
+
+    assert isinstance(encoded, bytes)
+    assert serializer.loads(encoded) == VALUE
+    assert serializer.loads(encoded.decode('utf-8')) == VALUE
+
+
+def test_values_the_standard_library_accepts(serializer):
+    assert serializer.loads(serializer.dumps({1: 'a'})) == {'1': 'a'}
+
+
+def test_invalid_json(serializer):
+    with pytest.raises(ValueError):
+        serializer.loads(b'{"results": [')
+
+
+def test_chosen_by_environment(monkeypatch):
+    monkeypatch.setenv('I2_JSON', 'json')
+
+    assert get_serializer().name == 'json'
+
+
+def test_unknown_serializer():
+    with pytest.raises(ValueError):
+        get_serializer('yaml')
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from icinga2client.helpers.stream import JSONStream, iter_results
+
+RESULTS = [
+    {'name': 'web01', 'attrs': {'text': 'brackets ] } [ { and "quotes"'}},
+    {'name': 'caf\u00e9', 'attrs': {'text': 'escaped \\" quote \\\\'}},
+    {'name': 'numbers', 'attrs': {'state': 2.0, 'big': 12345678901234}},
+    {'name': 'empty', 'attrs': {}, 'joins': []},
+]
+
+BODY = json.dumps({'meta': {'results': 'not these'}, 'results': RESULTS},
+                  ensure_ascii=False).encode('utf-8')
+
+
+def split(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, len(BODY)])
+def test_iter_results(size):
+    assert list(iter_results(split(BODY, size))) == RESULTS
+
+
+@pytest.mark.parametrize('size', [1, 5, len(BODY)])
+def test_iter_results_raw(size):
+    raw = list(iter_results(split(BODY, size), raw=True))
+
+    assert [json.loads(text) for text in raw] == RESULTS
+
+
+@pytest.mark.parametrize('body', [b'{"results": []}', b'{}', b'{"x": 1}'])
+def test_iter_results_empty(body):
+    assert list(iter_results([body])) == []
+
+
+def test_iter_results_truncated():
+    with pytest.raises(ValueError):
+        list(iter_results([BODY[:len(BODY) // 2]]))
+
+
+def test_unterminated_string():
+    with pytest.raises(ValueError):
+        JSONStream([b'["abc']).raw_value()
+
+
+def test_number_split_across_chunks():
+    assert list(JSONStream([b'[12', b'34, 5', b'6]']).items()) == [1234, 56]
+
+
+def test_streamed_query(client):
+    names = [record.name for record in client.query_objects('Service')]
+
+    assert len(names) == 60
+    assert names[:3] == ['host-00000!svc-0', 'host-00000!svc-1',
+                         'host-00000!svc-2']
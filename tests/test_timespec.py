@@ -0,0 +1,71 @@
+import calendar
+import time
+
+import pytest
+
+from icinga2client.helpers.timespec import (ABSOLUTE, CALENDAR, OFFSET,
+                                            TimespecCompiler)
+
+# 2016-05-01 14:30:15 local time
+NOW = time.mktime((2016, 5, 1, 14, 30, 15, 0, 0, -1))
+
+
+@pytest.fixture
+def timespecs():
+    return TimespecCompiler(clock=lambda: NOW)
+
+
+def local(*fields):
+    return time.mktime(tuple(fields) + (0,) * (6 - len(fields)) +
+                       (0, 0, -1))
+
+
+def test_date_keeps_the_time_of_day(timespecs):
+    assert timespecs.compile('2016-06-02')[0] == CALENDAR
+    assert timespecs.timestamp('2016-06-02') == local(2016, 6, 2, 14, 30, 15)
+
+    with timespecs.anchored(NOW + 3600):
+        assert timespecs.timestamp('2016-06-02') == \
+            local(2016, 6, 2, 15, 30, 15)
+
+
+@pytest.mark.parametrize('string, expected', [
+    ('2016-06-02 09:00', local(2016, 6, 2, 9)),
+    ('2016-06-02T09:00:30', local(2016, 6, 2, 9, 0, 30)),
+    ('2016-06-02T09:00:00Z', calendar.timegm((2016, 6, 2, 9, 0, 0))),
+    ('2016-06-02T09:00:00+02:00', calendar.timegm((2016, 6, 2, 7, 0, 0))),
+    ('1464858000', 1464858000.0),
+    ('@1464858000.5', 1464858000.5),
+])
+def test_absolute(timespecs, string, expected):
+    assert timespecs.compile(string) == (ABSOLUTE, expected)
+
+
+@pytest.mark.parametrize('string, offset', [
+    ('now', 0),
+    ('+2 hours', 7200),
+    ('10 minutes', 600),
+])
+def test_offset(timespecs, string, offset):
+    assert timespecs.compile(string) == (OFFSET, offset)
+    assert timespecs.timestamp(string) == NOW + offset
+
+
+def test_calendar_is_cached_per_anchor(timespecs):
+    first = timespecs.timestamp('tomorrow 9am')
+    assert first == local(2016, 5, 2, 9)
+
+    parses = timespecs.stats['parses']
+    assert timespecs.timestamp('tomorrow 9am') == first
+    assert timespecs.stats['parses'] == parses
+
+    with timespecs.anchored(NOW + 86400):
+        assert timespecs.timestamp('tomorrow 9am') == local(2016, 5, 3, 9)
+
+
+def test_timedelta_reads_the_time_once():
+    # Every read of the clock is half a second later than the last
+    ticks = iter(NOW + 0.5 * i for i in range(100))
+    timespecs = TimespecCompiler(clock=lambda: next(ticks))
+
+    assert timespecs.timedelta('+1 hour').total_seconds() == 3600
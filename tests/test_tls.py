@@ -0,0 +1,52 @@
+import os
+
+import pytest
+import requests
+
+from icinga2client.api import ApiClient
+from icinga2client.api.tls import tls_context
+
+from benchmarks.fake import FakeIcinga
+
+
+@pytest.fixture(scope='module')
+def fake():
+    with FakeIcinga(host='localhost', hosts=2, services=1) as server:
+        yield server
+
+
+@pytest.fixture
+def ca(fake):
+    return os.path.join(fake.directory, 'cert.pem')
+
+
+def test_contexts_are_shared(ca):
+    assert tls_context(ca) is tls_context(ca)
+    assert tls_context(ca) is not tls_context(False)
+
+
+def test_sessions_are_resumed(fake, ca):
+    with ApiClient(fake.url, verify=ca) as client:
+        before = dict(client.tls_context.stats)
+
+        list(client.hosts())
+        client.reset_session()
+        list(client.hosts())
+
+        stats = client.tls_context.stats
+
+    assert stats['handshakes'] - before['handshakes'] == 2
+    assert stats['resumed'] - before['resumed'] > 0
+
+
+def test_certificate_is_verified(fake):
+    with ApiClient(fake.url) as client:
+        with pytest.raises(requests.exceptions.SSLError):
+            list(client.hosts())
+
+
+@pytest.mark.filterwarnings(
+    'ignore::urllib3.exceptions.InsecureRequestWarning')
+def test_verification_can_be_disabled(fake):
+    with ApiClient(fake.url, verify=False) as client:
+        assert len(list(client.hosts())) == 2
@@ -0,0 +1,111 @@
+"""
+Every documented form of each command parses. docopt leaves options named
+in any usage pattern out of ``[options]``, so an option named in one pattern
+must be named in every pattern which accepts it.
+"""
+
+import shlex
+
+import pytest
+from docopt import docopt, DocoptExit
+
+from icinga2client.cli import acknowledge, downtime
+
+DOWNTIME = [
+    'host web01',
+    'host web01 --plan',
+    'host web01 --all-services --plan',
+    'host web01 --plan --all-services --start=now --end="+1 hour"',
+    'remove host web01 --plan',
+    'service web01 http --plan',
+    'service web01 http --plan --comment=x --operator=me',
+    'remove service web01 http --plan',
+    'hostgroup web --all-services --plan',
+    'hostgroup web --plan --all-services',
+    'remove hostgroup web --plan',
+    'servicegroup http --plan',
+    'remove servicegroup http --plan',
+    'remove web01!0123 --plan',
+    'remove web01!0123',
+    'remove --author=bot --plan',
+    'remove --comment-match="Deploy *" --older-than="2 days" --plan',
+    'remove --ending-before=now --author=bot',
+    'remove --plan --older-than="1 day" --ending-before=now',
+    'remove --author=bot --comment-match=x --older-than="1 day" '
+    '--ending-before=now --plan',
+    '--stdin --plan',
+    '--stdin --plan --comment=x --operator=me --resume',
+    '--from-file=targets.csv --plan',
+    'remove --from-file=targets.csv --plan',
+    '--from-file=targets.csv --journal=j.jsonl --resume',
+    '--rollback',
+    '--rollback --journal=j.jsonl',
+]
+
+DOWNTIME_INVALID = [
+    '--rollback --plan',
+    'host web01 --author=bot',
+    'remove web01!0123 --start=now',
+    'service web01 --plan',
+    'remove hostgroup web --author=bot',
+    '--stdin --older-than="1 day"',
+    '--rollback --comment-match=x',
+]
+
+ACKNOWLEDGE = [
+    'host web01',
+    'host web01 --plan',
+    'host web01 --plan --sticky --comment=x --operator=me',
+    'remove host web01 --plan',
+    'service web01 http --plan',
+    'service web01 http --expiry="+1 day" --plan --suppress-notifications',
+    'remove service web01 http --plan',
+    'remove --author=bot --plan',
+    'remove --plan --comment-match="Deploy *" --older-than="2 days"',
+    'remove --author=bot --comment-match=x --older-than="1 day"',
+    '--stdin --plan',
+    '--from-file=targets.csv --plan --sticky',
+    'remove --stdin --plan',
+    '--stdin --resume --journal=j.jsonl',
+    '--rollback',
+    '--rollback --journal=j.jsonl',
+]
+
+ACKNOWLEDGE_INVALID = [
+    'host web01 --author=bot',
+    'remove service web01 http --older-than="1 day"',
+    'remove --author=bot --ending-before=now',
+    '--stdin --comment-match=x',
+]
+
+
+def parse(module, argv):
+    command = module.__name__.rsplit('.', 1)[-1]
+    return docopt(module.doc, argv=[command] + shlex.split(argv),
+                  options_first=False)
+
+
+@pytest.mark.parametrize('argv', DOWNTIME)
+def test_downtime(argv):
+    arguments = parse(downtime, argv)
+
+    assert arguments['--plan'] == ('--plan' in argv)
+
+
+@pytest.mark.parametrize('argv', DOWNTIME_INVALID)
+def test_downtime_invalid(argv):
+    with pytest.raises(DocoptExit):
+        parse(downtime, argv)
+
+
+@pytest.mark.parametrize('argv', ACKNOWLEDGE)
+def test_acknowledge(argv):
+    arguments = parse(acknowledge, argv)
+
+    assert arguments['--plan'] == ('--plan' in argv)
+
+
+@pytest.mark.parametrize('argv', ACKNOWLEDGE_INVALID)
+def test_acknowledge_invalid(argv):
+    with pytest.raises(DocoptExit):
+        parse(acknowledge, argv)